@@ -11,6 +11,53 @@ PROJECT_ROOT = Path(__file__).parent.parent
 DATA_DIR = PROJECT_ROOT / "data"
 PARSED_DATA_FILE = DATA_DIR / "parsed" / "latest_complete.json"
 
+# Как часто (в секундах) проверять появление нового снимка данных; 0 - не проверять.
+# В той же проверке обновляются индекс PDF и словарь вопросов: при 0 они читаются только при запуске
+DATA_RELOAD_INTERVAL = float(os.getenv('DATA_RELOAD_INTERVAL', '30'))
+
+# Хранилище состояний диалогов: sqlite (переживает перезапуск, общее для процессов) или memory
+FSM_STORAGE = os.getenv('FSM_STORAGE', 'sqlite')
+FSM_STORAGE_PATH = PROJECT_ROOT / os.getenv('FSM_STORAGE_PATH', 'data/bot_state.sqlite3')
+
+# Подписки на изменения программ и очередь уведомлений
+SUBSCRIPTIONS_PATH = PROJECT_ROOT / os.getenv('SUBSCRIPTIONS_PATH', 'data/subscriptions.sqlite3')
+
+# Сколько секунд Telegram может кэшировать ответы на inline-запросы
+INLINE_CACHE_TIME = int(os.getenv('INLINE_CACHE_TIME', '300'))
+
+# Режим получения обновлений: polling или webhook
+BOT_MODE = os.getenv('BOT_MODE', 'polling')
+
+# Число рабочих процессов: больше 1 - обновления распределяются по процессам по chat_id
+BOT_WORKERS = int(os.getenv('BOT_WORKERS', '1'))
+
+# Webhook: публичный адрес бота (https://example.com), путь и адрес, на котором слушает сервер
+WEBHOOK_BASE_URL = os.getenv('WEBHOOK_BASE_URL', '')
+WEBHOOK_PATH = os.getenv('WEBHOOK_PATH', '/telegram/webhook')
+WEBHOOK_HOST = os.getenv('WEBHOOK_HOST', '0.0.0.0')
+WEBHOOK_PORT = int(os.getenv('WEBHOOK_PORT', '8080'))
+
+# Секрет, который Telegram присылает в заголовке каждого запроса
+WEBHOOK_SECRET = os.getenv('WEBHOOK_SECRET', '')
+
+# Сколько обновлений обрабатывается одновременно
+WEBHOOK_MAX_CONCURRENCY = int(os.getenv('WEBHOOK_MAX_CONCURRENCY', '64'))
+
+# Сколько сообщений в секунду бот отправляет во все чаты (лимит Telegram - около 30);
+# при нескольких рабочих процессах делится между ними
+SEND_RATE_LIMIT = float(os.getenv('SEND_RATE_LIMIT', '30'))
+
+# Метрики в формате Prometheus (http://METRICS_HOST:METRICS_PORT/metrics); 0 - отключить.
+# При нескольких рабочих процессах процесс N слушает METRICS_PORT + N
+METRICS_HOST = os.getenv('METRICS_HOST', '127.0.0.1')
+METRICS_PORT = int(os.getenv('METRICS_PORT', '9464'))
+
+# Порог (мс), после которого блокировка event loop пишется в лог со стеком и обработчиком; 0 - отключить
+LOOP_LAG_THRESHOLD = float(os.getenv('LOOP_LAG_THRESHOLD', '100')) / 1000
+
+# Адрес Bot API (локальный сервер Bot API или заглушка для тестов); пусто - api.telegram.org
+TELEGRAM_API_URL = os.getenv('TELEGRAM_API_URL', '')
+
 # Настройки бота
 BOT_CONFIG = {
     'parse_mode': 'Markdown',
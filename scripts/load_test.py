@@ -0,0 +1,239 @@
+# scripts/load_test.py
+
+import argparse
+import asyncio
+import os
+import signal
+import socket
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Set
+
+import aiohttp
+
+# Добавляем корневую директорию в путь
+PROJECT_ROOT = Path(__file__).parent.parent
+sys.path.append(str(PROJECT_ROOT))
+
+from config.bot_config import WEBHOOK_PATH
+from src.loadtest.fake_api import BOT_USER, FakeBotAPI
+from src.loadtest.workload import LatencyTracker, StepResult, UpdateFactory, run_step
+
+# Нагрузочный тест бота.
+# Запускает бота (scripts/run_bot.py) отдельным процессом против локальной
+# заглушки Bot API и подает обновления ступенями возрастающей интенсивности.
+# Для каждой ступени печатаются задержки ответа p50/p95/p99; ступень, на
+# которой бот перестает успевать, считается точкой насыщения.
+#
+#   python scripts/load_test.py --rates 10,25,50,100,200 --step-duration 20
+#   python scripts/load_test.py --mode webhook --workers 4 --api-latency 50
+
+LOAD_TEST_TOKEN = f"{BOT_USER['id']}:LOAD-TEST"
+
+# Сколько ждать запуска и остановки бота (секунды)
+START_TIMEOUT = 60.0
+STOP_TIMEOUT = 30.0
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Нагрузочный тест Telegram бота ИТМО")
+    parser.add_argument('--mode', choices=('polling', 'webhook'), default='polling',
+                        help="режим получения обновлений ботом")
+    parser.add_argument('--workers', type=int, default=1, help="число рабочих процессов бота (BOT_WORKERS)")
+    parser.add_argument('--rates', default='10,25,50,100,200,400',
+                        help="интенсивности ступеней, обновлений в секунду")
+    parser.add_argument('--step-duration', type=float, default=20.0, help="длительность ступени, секунды")
+    parser.add_argument('--drain', type=float, default=10.0, help="ожидание ответов после ступени, секунды")
+    parser.add_argument('--users', type=int, default=5000, help="число пользователей")
+    parser.add_argument('--api-latency', type=float, default=20.0, help="задержка ответа Bot API, мс")
+    parser.add_argument('--api-jitter', type=float, default=10.0, help="разброс задержки Bot API, мс")
+    parser.add_argument('--max-p99', type=float, default=1000.0,
+                        help="p99 задержки (мс), выше которого бот считается насыщенным")
+    parser.add_argument('--keep-rate-limits', action='store_true',
+                        help="не отключать лимиты отправки Telegram (иначе меряется сам бот)")
+    parser.add_argument('--continue-after-saturation', action='store_true',
+                        help="проходить все ступени, даже после насыщения")
+    parser.add_argument('--seed', type=int, default=None, help="seed генератора обновлений")
+    return parser.parse_args()
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+async def start_bot(args: argparse.Namespace, api_url: str, webhook_port: int,
+                    workdir: Path) -> asyncio.subprocess.Process:
+    """Бот в отдельном процессе; состояние и логи - во временной папке"""
+    env = dict(
+        os.environ,
+        PYTHONUNBUFFERED='1',
+        TELEGRAM_BOT_TOKEN=LOAD_TEST_TOKEN,
+        TELEGRAM_API_URL=api_url,
+        BOT_WORKERS=str(args.workers),
+        FSM_STORAGE_PATH=str(workdir / 'bot_state.sqlite3'),
+        SUBSCRIPTIONS_PATH=str(workdir / 'subscriptions.sqlite3'),
+        METRICS_PORT='0',
+        WEBHOOK_BASE_URL='',
+        WEBHOOK_HOST='127.0.0.1',
+        WEBHOOK_PORT=str(webhook_port),
+        WEBHOOK_SECRET='',
+    )
+    if not args.keep_rate_limits:
+        env['SEND_RATE_LIMIT'] = '1000000'
+
+    log = open(workdir / 'bot.log', 'wb')
+    return await asyncio.create_subprocess_exec(
+        sys.executable, str(PROJECT_ROOT / 'scripts' / 'run_bot.py'), args.mode,
+        env=env, stdout=log, stderr=asyncio.subprocess.STDOUT, cwd=PROJECT_ROOT
+    )
+
+
+async def wait_ready(args: argparse.Namespace, api: FakeBotAPI, process: asyncio.subprocess.Process,
+                     webhook_port: int) -> bool:
+    deadline = time.monotonic() + START_TIMEOUT
+    while time.monotonic() < deadline:
+        if process.returncode is not None:
+            return False
+        if args.mode == 'polling':
+            if api.polls:
+                return True
+        else:
+            try:
+                _, writer = await asyncio.open_connection('127.0.0.1', webhook_port)
+                writer.close()
+                await writer.wait_closed()
+                return True
+            except OSError:
+                pass
+        await asyncio.sleep(0.2)
+    return False
+
+
+async def stop_bot(process: asyncio.subprocess.Process) -> None:
+    if process.returncode is not None:
+        return
+    process.send_signal(signal.SIGINT)
+    try:
+        await asyncio.wait_for(process.wait(), timeout=STOP_TIMEOUT)
+    except asyncio.TimeoutError:
+        print("⚠️ Бот не остановился, завершаем процесс")
+        process.kill()
+        await process.wait()
+
+
+def is_saturated(step: StepResult, max_p99: float) -> bool:
+    """Бот не ответил на часть обновлений или хвост задержек вышел за предел"""
+    if step.sent and step.completed < step.sent * 0.99:
+        return True
+    _, _, p99 = step.quantiles()
+    return step.completed > 0 and p99 * 1000 > max_p99
+
+
+def print_header() -> None:
+    print(f"{'цель/с':>8} {'отправлено':>11} {'ответов':>8} {'ответов/с':>10} "
+          f"{'p50, мс':>9} {'p95, мс':>9} {'p99, мс':>9} {'нет польз.':>11}")
+
+
+def print_step(step: StepResult, saturated: bool) -> None:
+    p50, p95, p99 = (value * 1000 for value in step.quantiles())
+    mark = "  ⚠️ насыщение" if saturated else ""
+    print(f"{step.rate:>8g} {step.sent:>11} {step.completed:>8} {step.throughput:>10.1f} "
+          f"{p50:>9.1f} {p95:>9.1f} {p99:>9.1f} {step.skipped:>11}{mark}")
+
+
+async def main():
+    args = parse_args()
+    rates = [float(rate) for rate in args.rates.split(',') if rate.strip()]
+
+    tracker = LatencyTracker(args.users)
+    factory = UpdateFactory(args.seed)
+    api = FakeBotAPI(args.api_latency / 1000, args.api_jitter / 1000, on_reply=tracker.on_reply)
+    api_port = free_port()
+    webhook_port = free_port()
+    await api.start('127.0.0.1', api_port)
+
+    workdir = Path(tempfile.mkdtemp(prefix='itmo-bot-load-'))
+    # Бот сохраняет file_id отправленных PDF в data/ - после теста убираем файл заглушки
+    file_ids = PROJECT_ROOT / 'data' / f"telegram_file_ids_{BOT_USER['id']}.json"
+    file_ids_existed = file_ids.exists()
+
+    print(f"🚀 Нагрузочный тест: режим {args.mode}, процессов {args.workers}, "
+          f"задержка Bot API {args.api_latency:g}±{args.api_jitter:g} мс")
+    print(f"📁 Логи бота: {workdir / 'bot.log'}")
+
+    process = await start_bot(args, f"http://127.0.0.1:{api_port}", webhook_port, workdir)
+    session = aiohttp.ClientSession()
+    webhook_tasks: Set[asyncio.Task] = set()
+    webhook_errors = 0
+    next_update_id = 1
+
+    async def post_update(update: Dict[str, Any]) -> None:
+        nonlocal webhook_errors
+        try:
+            async with session.post(f"http://127.0.0.1:{webhook_port}{WEBHOOK_PATH}", json=update) as response:
+                if response.status != 200:
+                    webhook_errors += 1
+        except aiohttp.ClientError:
+            webhook_errors += 1
+
+    async def submit(update: Dict[str, Any]) -> None:
+        nonlocal next_update_id
+        if args.mode == 'polling':
+            api.push_update(update)
+            return
+        # Запрос к webhook не задерживает генератор
+        task = asyncio.create_task(post_update({'update_id': next_update_id, **update}))
+        next_update_id += 1
+        webhook_tasks.add(task)
+        task.add_done_callback(webhook_tasks.discard)
+
+    results: List[StepResult] = []
+    saturation_rate = None
+    try:
+        if not await wait_ready(args, api, process, webhook_port):
+            print(f"❌ Бот не запустился, см. {workdir / 'bot.log'}")
+            return
+        print("✅ Бот запущен\n")
+        print_header()
+
+        for rate in rates:
+            step = await run_step(rate, args.step_duration, tracker, factory, submit, args.drain)
+            saturated = is_saturated(step, args.max_p99)
+            results.append(step)
+            print_step(step, saturated)
+            if saturated and saturation_rate is None:
+                saturation_rate = rate
+                if not args.continue_after_saturation:
+                    break
+    finally:
+        if webhook_tasks:
+            await asyncio.gather(*webhook_tasks, return_exceptions=True)
+        await session.close()
+        await stop_bot(process)
+        await api.stop()
+        if not file_ids_existed:
+            file_ids.unlink(missing_ok=True)
+            file_ids.with_name(f".{file_ids.name}.lock").unlink(missing_ok=True)
+
+    print()
+    print("📊 Вызовы Bot API: " + ", ".join(f"{method} {count}" for method, count in api.calls.most_common()))
+    if webhook_errors:
+        print(f"⚠️ Ошибок webhook: {webhook_errors}")
+    if any(step.skipped for step in results):
+        print("ℹ️ Не хватало свободных пользователей - увеличьте --users")
+
+    sustained = [step.rate for step in results if saturation_rate is not None and step.rate < saturation_rate]
+    if saturation_rate is None:
+        print(f"✅ Насыщение не достигнуто, бот держит {rates[-1]:g} обновлений/с")
+    elif sustained:
+        print(f"🔴 Насыщение: бот держит {max(sustained):g} обновлений/с и не успевает при {saturation_rate:g}")
+    else:
+        print(f"🔴 Бот не успевает уже при {saturation_rate:g} обновлений/с")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
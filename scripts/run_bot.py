@@ -12,6 +12,11 @@ load_dotenv()
 # Добавляем корневую директорию в путь
 sys.path.append(str(Path(__file__).parent.parent))
 
+from config.bot_config import (
+    BOT_MODE, BOT_WORKERS, WEBHOOK_BASE_URL, WEBHOOK_PATH, WEBHOOK_HOST, WEBHOOK_PORT,
+    WEBHOOK_SECRET, WEBHOOK_MAX_CONCURRENCY
+)
+from src.bot.sharding import ShardedRuntime
 from src.bot.telegram_bot import ITMOBot
 
 async def main():
@@ -28,13 +33,38 @@ async def main():
         print("\nПолучить токен: https://t.me/BotFather")
         return
     
-    print("🤖 Запуск Telegram бота ИТМО...")
+    # Режим можно передать аргументом: python scripts/run_bot.py webhook
+    mode = sys.argv[1] if len(sys.argv) > 1 else BOT_MODE
+    if mode not in ('polling', 'webhook'):
+        print(f"❌ Неизвестный режим: {mode} (polling или webhook)")
+        return
+    
+    print(f"🤖 Запуск Telegram бота ИТМО ({mode})...")
     print("Нажмите Ctrl+C для остановки")
     
+    if BOT_WORKERS > 1:
+        # Несколько процессов: этот процесс только принимает и раскладывает обновления
+        runtime = ShardedRuntime(token, BOT_WORKERS)
+        if mode == 'webhook':
+            await runtime.run_webhook(
+                WEBHOOK_BASE_URL, WEBHOOK_PATH, WEBHOOK_HOST, WEBHOOK_PORT,
+                secret_token=WEBHOOK_SECRET
+            )
+        else:
+            await runtime.run_polling()
+        print("✅ Бот остановлен")
+        return
+    
     bot = ITMOBot(token)
     
     try:
-        await bot.start_polling()
+        if mode == 'webhook':
+            await bot.start_webhook(
+                WEBHOOK_BASE_URL, WEBHOOK_PATH, WEBHOOK_HOST, WEBHOOK_PORT,
+                secret_token=WEBHOOK_SECRET, max_concurrency=WEBHOOK_MAX_CONCURRENCY
+            )
+        else:
+            await bot.start_polling()
     except KeyboardInterrupt:
         print("\n🛑 Остановка бота...")
     except Exception as e:
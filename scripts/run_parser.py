@@ -1,9 +1,14 @@
 
 import asyncio
+import os
 import sys
 from pathlib import Path
 from datetime import datetime
 
+# Загрузка .env файла
+from dotenv import load_dotenv
+load_dotenv()
+
 # Добавляем корневую директорию в путь
 sys.path.append(str(Path(__file__).parent.parent))
 
@@ -19,7 +24,9 @@ class ITMOParser:
         current_dir = Path(__file__).resolve()
         project_root = current_dir.parent.parent
         
-        self.data_manager = DataManager(project_root)
+        # Сжатие снимка: SNAPSHOT_COMPRESSION=gzip|zstd (по умолчанию обычный JSON)
+        compression = os.getenv('SNAPSHOT_COMPRESSION') or None
+        self.data_manager = DataManager(project_root, compression=compression)
         self.pdf_manager = PDFManager(self.data_manager.pdf_dir)
         
         self.programs = {
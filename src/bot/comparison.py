@@ -0,0 +1,255 @@
+import re
+from collections import OrderedDict
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from aiogram.types import InlineKeyboardButton, InlineKeyboardMarkup
+
+from src.parsers.models import Program
+from src.bot.russian import tokenize
+from src.bot.views import PROGRAM_BUTTONS, escape_markdown
+
+try:
+    import numpy as np
+    COMPARISON_AVAILABLE = True
+except ImportError:
+    COMPARISON_AVAILABLE = False
+
+# Сравнение любого набора программ.
+# При загрузке снимка характеристики программ собираются в матрицы NumPy,
+# где строка - программа: стоимость, длительность, места по видам, зачетные
+# единицы по блокам и матрица "программа x курс". Число общих курсов для
+# всех пар - произведение этой матрицы на транспонированную, поэтому
+# сравнение выбранных программ - выборка строк и ячеек, а не обход данных.
+# Готовые тексты сравнений кэшируются по набору программ.
+
+# Сколько программ можно сравнить за раз (иначе сообщение не помещается)
+MAX_SELECTED = 5
+
+# Сколько наборов программ держать в кэше текстов
+RENDER_CACHE_SIZE = 256
+
+# Сколько общих курсов перечислять по названию
+SHARED_COURSES_SHOWN = 5
+
+# Префиксы callback_data экрана выбора
+CALLBACK_TOGGLE = 'cmp_toggle_'
+CALLBACK_ALL = 'cmp_all'
+CALLBACK_SHOW = 'cmp_show'
+
+# Виды мест: (заголовок, столбец матрицы мест)
+PLACE_KINDS = (('бюджет', 0), ('целевые', 1), ('контракт', 2))
+
+COST_KEY = 'стоимость контрактного обучения (год)'
+DURATION_KEY = 'длительность'
+
+NUMBER_RE = re.compile(r'\d+(?:[.,]\d+)?')
+
+
+def parse_cost(text: Optional[str]) -> float:
+    """Стоимость в рублях из строки вида "599 000 ₽" (NaN, если не указана)"""
+    digits = re.sub(r'\D', '', text or '')
+    return float(digits) if digits else float('nan')
+
+
+def parse_duration(text: Optional[str]) -> float:
+    """Длительность в годах из строки вида "2 года" или "18 месяцев" (NaN, если не указана)"""
+    match = NUMBER_RE.search(text or '')
+    if not match:
+        return float('nan')
+    value = float(match.group().replace(',', '.'))
+    return value / 12 if 'месяц' in text.lower() else value
+
+
+def _format_rubles(value: float) -> str:
+    return f"{int(value):,}".replace(',', ' ') + " ₽"
+
+
+def _format_years(value: float) -> str:
+    return f"{value:g}".replace('.', ',') + " г."
+
+
+def _normalize(name: str) -> str:
+    return ' '.join(tokenize(name))
+
+
+class ProgramComparison:
+    """Матрицы характеристик программ снимка и сравнение наборов программ"""
+
+    def __init__(self, programs: Dict[str, Program]):
+        self.program_ids: List[str] = list(programs)
+        self.titles: List[str] = [programs[program_id].title for program_id in self.program_ids]
+        self.index: Dict[str, int] = {program_id: i for i, program_id in enumerate(self.program_ids)}
+        self._cache: 'OrderedDict[Tuple[str, ...], str]' = OrderedDict()
+
+        if not COMPARISON_AVAILABLE:
+            return
+
+        count = len(self.program_ids)
+        self.cost = np.full(count, np.nan)
+        self.duration = np.full(count, np.nan)
+        self.places = np.zeros((count, len(PLACE_KINDS)), dtype=np.int64)
+
+        # Столбцы блоков и курсов - объединение по всем программам в порядке появления
+        self.block_names: List[str] = []
+        block_columns: Dict[str, int] = {}
+        self.course_names: List[str] = []
+        course_columns: Dict[str, int] = {}
+        block_cells: List[Tuple[int, int, int]] = []
+        course_cells: List[Tuple[int, int]] = []
+
+        for row, program_id in enumerate(self.program_ids):
+            program = programs[program_id]
+            web_data = program.web_data
+            if web_data:
+                self.cost[row] = parse_cost(web_data.basic_info.get(COST_KEY))
+                self.duration[row] = parse_duration(web_data.basic_info.get(DURATION_KEY))
+                for direction in web_data.directions:
+                    self.places[row] += (direction.budget_places, direction.target_places,
+                                         direction.contract_places)
+
+            curriculum = program.curriculum_data
+            if not curriculum:
+                continue
+            for block in curriculum.blocks:
+                column = block_columns.setdefault(_normalize(block.name), len(block_columns))
+                if column == len(self.block_names):
+                    self.block_names.append(block.name)
+                block_cells.append((row, column, block.total_credits))
+            for _, _, course in curriculum.iter_courses():
+                column = course_columns.setdefault(_normalize(course.name), len(course_columns))
+                if column == len(self.course_names):
+                    self.course_names.append(course.name)
+                course_cells.append((row, column))
+
+        self.block_credits = np.zeros((count, len(self.block_names)), dtype=np.int64)
+        self.has_block = np.zeros((count, len(self.block_names)), dtype=bool)
+        for row, column, credits in block_cells:
+            self.block_credits[row, column] += credits
+            self.has_block[row, column] = True
+
+        self.courses = np.zeros((count, len(self.course_names)), dtype=np.int32)
+        if course_cells:
+            rows, columns = zip(*course_cells)
+            self.courses[list(rows), list(columns)] = 1
+
+        # shared[i, j] - число общих курсов программ i и j, на диагонали - число курсов программы
+        self.shared = self.courses @ self.courses.T
+        sizes = np.diag(self.shared)
+        union = sizes[:, None] + sizes[None, :] - self.shared
+        self.similarity = np.divide(self.shared, union, out=np.zeros(self.shared.shape), where=union > 0)
+
+    def __len__(self) -> int:
+        return len(self.program_ids)
+
+    # --- Сравнение ---
+
+    def compare(self, program_ids: Sequence[str]) -> Optional[str]:
+        """Текст сравнения набора программ; None, если программ в снимке нет или их меньше двух"""
+        rows = [self.index[program_id] for program_id in dict.fromkeys(program_ids) if program_id in self.index]
+        if len(rows) < 2 or not COMPARISON_AVAILABLE:
+            return None
+
+        key = tuple(self.program_ids[row] for row in rows)
+        text = self._cache.get(key)
+        if text is None:
+            text = self._render(np.array(rows))
+            self._cache[key] = text
+            if len(self._cache) > RENDER_CACHE_SIZE:
+                self._cache.popitem(last=False)
+        else:
+            self._cache.move_to_end(key)
+        return text
+
+    def _render(self, rows: 'np.ndarray') -> str:
+        numbers = [f"{position}." for position in range(1, len(rows) + 1)]
+        lines = ["🔄 *Сравнение программ*", ""]
+        lines += [f"{number} {escape_markdown(self.titles[row])}" for number, row in zip(numbers, rows)]
+
+        def values(column: 'np.ndarray', fmt) -> str:
+            return " · ".join(
+                f"{number} {fmt(value) if not np.isnan(value) else 'нет данных'}"
+                for number, value in zip(numbers, column)
+            )
+
+        cost = self.cost[rows]
+        lines += ["", "💰 *Стоимость (год):*", values(cost, _format_rubles)]
+        known = cost[~np.isnan(cost)]
+        if len(known) > 1 and known.max() > known.min():
+            lines.append(f"Разница: {_format_rubles(known.max() - known.min())}")
+
+        lines += ["", "⏱ *Длительность:*", values(self.duration[rows], _format_years)]
+
+        places = self.places[rows]
+        lines += ["", "🎯 *Места:*"]
+        for title, column in PLACE_KINDS:
+            lines.append(f"• {title}: " + " · ".join(
+                f"{number} {value}" for number, value in zip(numbers, places[:, column])
+            ))
+
+        # Блоки, которые есть хотя бы у одной из выбранных программ
+        block_columns = np.flatnonzero(self.has_block[rows].any(axis=0))
+        if len(block_columns):
+            credits = self.block_credits[np.ix_(rows, block_columns)]
+            present = self.has_block[np.ix_(rows, block_columns)]
+            lines += ["", "📚 *Зачетные единицы по блокам:*"]
+            for k, column in enumerate(block_columns):
+                lines.append(f"• {escape_markdown(self.block_names[column])}: " + " · ".join(
+                    f"{number} {credits[i, k] if present[i, k] else '-'}" for i, number in enumerate(numbers)
+                ))
+
+        shared = self.shared[np.ix_(rows, rows)]
+        similarity = self.similarity[np.ix_(rows, rows)]
+        lines += ["", "📘 *Разных курсов в плане:*", " · ".join(
+            f"{number} {shared[i, i]}" for i, number in enumerate(numbers)
+        )]
+        lines += ["", "🔗 *Общие курсы:*"]
+        for i in range(len(rows)):
+            for j in range(i + 1, len(rows)):
+                lines.append(f"• {numbers[i]} и {numbers[j]}: {shared[i, j]} "
+                             f"(сходство {similarity[i, j]:.0%})")
+
+        common = np.flatnonzero(self.courses[rows].all(axis=0))
+        if len(rows) > 2:
+            lines.append(f"• У всех выбранных: {len(common)}")
+        if len(common):
+            names = [escape_markdown(self.course_names[column]) for column in common[:SHARED_COURSES_SHOWN]]
+            more = f" и еще {len(common) - len(names)}" if len(common) > len(names) else ""
+            lines.append("Например: " + "; ".join(names) + more)
+
+        return "\n".join(lines)
+
+    # --- Выбор программ ---
+
+    def selection_keyboard(self, selected: Sequence[str]) -> InlineKeyboardMarkup:
+        chosen = set(selected)
+        buttons = [
+            [InlineKeyboardButton(
+                text=f"{'✅' if program_id in chosen else '⬜'} "
+                     f"{PROGRAM_BUTTONS.get(program_id) or self.titles[row]}",
+                callback_data=f"{CALLBACK_TOGGLE}{program_id}"
+            )]
+            for row, program_id in enumerate(self.program_ids)
+        ]
+        if len(selected) >= 2:
+            buttons.append([InlineKeyboardButton(text=f"📊 Сравнить ({len(selected)})", callback_data=CALLBACK_SHOW)])
+        if 2 <= len(self.program_ids) <= MAX_SELECTED:
+            buttons.append([InlineKeyboardButton(text="📋 Сравнить все", callback_data=CALLBACK_ALL)])
+        buttons.append([InlineKeyboardButton(text="🏠 Главное меню", callback_data="back_main")])
+        return InlineKeyboardMarkup(inline_keyboard=buttons)
+
+
+def selection_text(selected: Sequence[str]) -> str:
+    """Текст экрана выбора программ"""
+    return (
+        "🔄 *Сравнение программ*\n\n"
+        f"Отметьте от 2 до {MAX_SELECTED} программ и нажмите «Сравнить».\n"
+        f"Выбрано: {len(selected)}"
+    )
+
+
+def result_keyboard() -> InlineKeyboardMarkup:
+    """Кнопки под результатом сравнения"""
+    return InlineKeyboardMarkup(inline_keyboard=[
+        [InlineKeyboardButton(text="✏️ Изменить выбор", callback_data="compare_programs")],
+        [InlineKeyboardButton(text="🏠 Главное меню", callback_data="back_main")]
+    ])
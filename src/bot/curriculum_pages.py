@@ -0,0 +1,228 @@
+from typing import Dict, List, Optional, Tuple
+
+from aiogram.types import InlineKeyboardButton, InlineKeyboardMarkup
+
+from src.parsers.models import Block, Program, SubBlock
+from src.bot.views import escape_markdown, message_length
+
+# Постраничный просмотр учебного плана.
+# Все курсы программы раскладываются в одну последовательность страниц:
+# блок -> подблоки по семестрам -> курсы подблока кусками. Страницы и их
+# клавиатуры собираются при загрузке снимка с запасом до лимита длины
+# сообщения Telegram, поэтому переход на любую страницу - это выбор готовой
+# строки по номеру и edit_text.
+
+# Тело страницы (в UTF-16 единицах, как считает Telegram): лимит сообщения 4096,
+# остальное - запас под заголовок страницы и разметку
+PAGE_LIMIT = 3500
+
+# Курсов на странице (чтобы страницу было удобно читать с телефона)
+COURSES_PER_PAGE = 20
+
+# Префикс callback_data экранов плана: cur:<program_id>:<экран>[:<номер>]
+CALLBACK_PREFIX = 'cur:'
+
+CURRICULUM_UPDATED_TEXT = "ℹ️ Учебный план обновился, выберите раздел заново"
+
+
+def callback_data(program_id: str, screen: str, number: Optional[int] = None) -> str:
+    data = f"{CALLBACK_PREFIX}{program_id}:{screen}"
+    return data if number is None else f"{data}:{number}"
+
+
+def parse_callback(data: str) -> Optional[Tuple[str, str, Optional[int]]]:
+    """(program_id, экран, номер) из callback_data; None для чужих данных"""
+    if not data.startswith(CALLBACK_PREFIX):
+        return None
+    parts = data[len(CALLBACK_PREFIX):].split(':')
+    if len(parts) == 2:
+        return parts[0], parts[1], None
+    if len(parts) == 3 and parts[2].isdigit():
+        return parts[0], parts[1], int(parts[2])
+    return None
+
+
+def _semester_label(semester: Optional[int]) -> str:
+    return f"{semester} семестр" if semester is not None else "без семестра"
+
+
+def _sub_block_label(sub_block: SubBlock) -> str:
+    """Подпись кнопки подблока; семестр добавляется, если его нет в названии"""
+    label = sub_block.name
+    if sub_block.semester is not None and 'семестр' not in label.lower():
+        label = f"{sub_block.semester} семестр · {label}"
+    return f"{label} ({len(sub_block.courses)})"
+
+
+def _sub_block_order(sub_blocks: List[SubBlock]) -> List[SubBlock]:
+    """Подблоки по семестрам; подблоки без семестра - в конце, порядок внутри семестра сохраняется"""
+    return sorted(sub_blocks, key=lambda sub_block: (sub_block.semester is None, sub_block.semester or 0))
+
+
+def _chunk_lines(lines: List[str], limit: int, per_page: int) -> List[List[str]]:
+    """Жадная раскладка строк по страницам: не больше per_page строк и limit символов"""
+    pages: List[List[str]] = []
+    page: List[str] = []
+    size = 0
+    for line in lines:
+        length = message_length(line) + 1
+        if page and (len(page) >= per_page or size + length > limit):
+            pages.append(page)
+            page, size = [], 0
+        page.append(line)
+        size += length
+    if page:
+        pages.append(page)
+    return pages
+
+
+class _Section:
+    """Страницы одного подблока"""
+    __slots__ = ('block_index', 'sub_block', 'first_page', 'bodies')
+
+    def __init__(self, block_index: int, sub_block: SubBlock, first_page: int, bodies: List[str]):
+        self.block_index = block_index
+        self.sub_block = sub_block
+        self.first_page = first_page
+        self.bodies = bodies
+
+
+class ProgramPages:
+    """Готовые экраны учебного плана одной программы"""
+    __slots__ = ('program_id', 'pages', 'blocks', 'block_list')
+
+    def __init__(self, program_id: str, program: Program):
+        self.program_id = program_id
+        title = escape_markdown(program.title)
+        blocks = program.curriculum_data.blocks if program.curriculum_data else []
+
+        # Подблоки каждого блока вместе с номерами их страниц в общей последовательности
+        sections: List[List[_Section]] = []
+        page_count = 0
+        for block_index, block in enumerate(blocks):
+            block_sections = []
+            for sub_block in _sub_block_order(block.sub_blocks):
+                bodies = self._course_bodies(sub_block)
+                block_sections.append(_Section(block_index, sub_block, page_count, bodies))
+                page_count += len(bodies)
+            sections.append(block_sections)
+
+        self.pages: List[Tuple[str, InlineKeyboardMarkup]] = []
+        for block, block_sections in zip(blocks, sections):
+            for section in block_sections:
+                for number, body in enumerate(section.bodies):
+                    self.pages.append(self._page(title, block, section, number, body, page_count))
+
+        self.blocks: List[Tuple[str, InlineKeyboardMarkup]] = [
+            self._block_screen(title, block, block_sections)
+            for block, block_sections in zip(blocks, sections)
+        ]
+        self.block_list = self._block_list(title, blocks)
+
+    # --- Отрисовка ---
+
+    @staticmethod
+    def _course_bodies(sub_block: SubBlock) -> List[str]:
+        lines = [
+            f"{number}. {escape_markdown(course.name)} - {course.credits} з.ед., {course.hours} ч"
+            for number, course in enumerate(sub_block.courses, 1)
+        ] or ["_Курсов нет_"]
+        return ["\n".join(chunk) for chunk in _chunk_lines(lines, PAGE_LIMIT, COURSES_PER_PAGE)]
+
+    def _page(self, title: str, block: Block, section: _Section, number: int, body: str,
+              page_count: int) -> Tuple[str, InlineKeyboardMarkup]:
+        index = section.first_page + number
+        sub_block = section.sub_block
+        part = f" (часть {number + 1} из {len(section.bodies)})" if len(section.bodies) > 1 else ""
+        text = (
+            f"📚 *{title}*\n"
+            f"📋 {escape_markdown(block.name)}\n"
+            f"📖 *{escape_markdown(sub_block.name)}*{part}\n"
+            f"🗓 {_semester_label(sub_block.semester)}, {sub_block.total_credits} з.ед., "
+            f"{sub_block.total_hours} ч\n\n"
+            f"{body}\n\n"
+            f"Страница {index + 1} из {page_count}"
+        )
+
+        navigation = []
+        if index > 0:
+            navigation.append(InlineKeyboardButton(
+                text="◀️ Назад", callback_data=callback_data(self.program_id, 'page', index - 1)
+            ))
+        if index + 1 < page_count:
+            navigation.append(InlineKeyboardButton(
+                text="Вперед ▶️", callback_data=callback_data(self.program_id, 'page', index + 1)
+            ))
+        buttons = [navigation] if navigation else []
+        buttons.extend([
+            [InlineKeyboardButton(text="⬆️ К блоку",
+                                  callback_data=callback_data(self.program_id, 'block', section.block_index))],
+            [InlineKeyboardButton(text="📋 Все блоки", callback_data=callback_data(self.program_id, 'blocks'))],
+        ])
+        return text, InlineKeyboardMarkup(inline_keyboard=buttons)
+
+    def _block_screen(self, title: str, block: Block,
+                      sections: List[_Section]) -> Tuple[str, InlineKeyboardMarkup]:
+        text = (
+            f"📚 *{title}*\n"
+            f"📋 *{escape_markdown(block.name)}*\n"
+            f"Трудоемкость: {block.total_credits} з.ед., {block.total_hours} ч\n\n"
+            "Выберите раздел:"
+        )
+        buttons = [
+            [InlineKeyboardButton(
+                text=_sub_block_label(section.sub_block),
+                callback_data=callback_data(self.program_id, 'page', section.first_page)
+            )]
+            for section in sections
+        ]
+        buttons.append([InlineKeyboardButton(text="📋 Все блоки",
+                                             callback_data=callback_data(self.program_id, 'blocks'))])
+        return text, InlineKeyboardMarkup(inline_keyboard=buttons)
+
+    def _block_list(self, title: str, blocks: List[Block]) -> Tuple[str, InlineKeyboardMarkup]:
+        if not blocks:
+            text = f"📚 *{title}*\n\n❌ Данные учебного плана не загружены"
+        else:
+            lines = [
+                f"{number}. *{escape_markdown(block.name)}* - {block.total_credits} з.ед., "
+                f"курсов: {sum(len(sub_block.courses) for sub_block in block.sub_blocks)}"
+                for number, block in enumerate(blocks, 1)
+            ]
+            text = f"📚 *{title}*\n\n📋 *Блоки учебного плана:*\n" + "\n".join(lines)
+
+        buttons = [
+            [InlineKeyboardButton(text=f"{number}. {block.name}",
+                                  callback_data=callback_data(self.program_id, 'block', number - 1))]
+            for number, block in enumerate(blocks, 1)
+        ]
+        buttons.append([InlineKeyboardButton(text="⬅️ К учебному плану",
+                                             callback_data=f"curriculum_{self.program_id}")])
+        return text, InlineKeyboardMarkup(inline_keyboard=buttons)
+
+    # --- Доступ ---
+
+    def screen(self, name: str, number: Optional[int]) -> Optional[Tuple[str, InlineKeyboardMarkup]]:
+        """Готовый экран; None, если номер не относится к этому снимку"""
+        if name == 'blocks':
+            return self.block_list
+        screens = {'block': self.blocks, 'page': self.pages}.get(name)
+        if screens is None or number is None or number >= len(screens):
+            return None
+        return screens[number]
+
+
+class CurriculumPages:
+    """Постраничные экраны учебных планов всех программ снимка"""
+    __slots__ = ('programs',)
+
+    def __init__(self, programs: Dict[str, Program]):
+        self.programs: Dict[str, ProgramPages] = {
+            program_id: ProgramPages(program_id, program)
+            for program_id, program in programs.items()
+        }
+
+    def screen(self, program_id: str, name: str,
+               number: Optional[int] = None) -> Optional[Tuple[str, InlineKeyboardMarkup]]:
+        pages = self.programs.get(program_id)
+        return pages.screen(name, number) if pages else None
@@ -0,0 +1,93 @@
+import json
+import logging
+import os
+import tempfile
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, Optional
+
+try:
+    import fcntl
+    FILE_LOCK_AVAILABLE = True
+except ImportError:
+    FILE_LOCK_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+
+class FileIdCache:
+    """Кэш file_id Telegram для отправленных файлов
+
+    Ключ - SHA-256 содержимого файла, поэтому после изменения PDF файл
+    загружается заново, а для неизменного PDF повторно используется file_id.
+    file_id действителен только для бота, который его получил, поэтому
+    у каждого бота свой файл кэша.
+
+    Запись идет из потоков (asyncio.to_thread) и, при запуске в нескольких
+    процессах, из разных процессов в один файл. Поэтому изменение делается
+    под блокировкой: файл перечитывается, изменение накладывается на
+    прочитанное и сохраняется - записи других процессов не теряются.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._file_ids: Dict[str, str] = self._load()
+
+    def _load(self) -> Dict[str, str]:
+        if not self.path.exists():
+            return {}
+
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            logger.error(f"Ошибка чтения кэша file_id {self.path}: {e}")
+            return {}
+
+    def _save(self, file_ids: Dict[str, str]) -> None:
+        """Атомарная запись кэша на диск"""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_name = tempfile.mkstemp(dir=self.path.parent, prefix=f".{self.path.name}.", suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(file_ids, f, ensure_ascii=False, indent=2)
+            os.replace(tmp_name, self.path)
+        except BaseException:
+            Path(tmp_name).unlink(missing_ok=True)
+            raise
+
+    @contextmanager
+    def _locked(self) -> Iterator[Dict[str, str]]:
+        """Актуальное содержимое файла под блокировкой потоков и процессов"""
+        with self._lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.path.with_name(f".{self.path.name}.lock"), 'w') as lock_file:
+                if FILE_LOCK_AVAILABLE:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX)
+                file_ids = self._load()
+                yield file_ids
+                # Обработчики читают словарь без блокировки - подменяем его целиком
+                self._file_ids = file_ids
+
+    def get(self, content_hash: str) -> Optional[str]:
+        """file_id для содержимого файла"""
+        return self._file_ids.get(content_hash)
+
+    def set(self, content_hash: str, file_id: str) -> None:
+        """Запоминание file_id (блокирующая запись на диск)"""
+        if self._file_ids.get(content_hash) == file_id:
+            return
+        with self._locked() as file_ids:
+            if file_ids.get(content_hash) != file_id:
+                file_ids[content_hash] = file_id
+                self._save(file_ids)
+
+    def discard(self, content_hash: str, file_id: Optional[str] = None) -> None:
+        """Удаление устаревшего file_id (только если это он, а не уже полученный заново)"""
+        with self._locked() as file_ids:
+            current = file_ids.get(content_hash)
+            if current is not None and (file_id is None or current == file_id):
+                del file_ids[content_hash]
+                self._save(file_ids)
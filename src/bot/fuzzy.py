@@ -0,0 +1,97 @@
+import heapq
+from typing import Dict, FrozenSet, List, Tuple
+
+from src.parsers.models import Course, Program
+
+from .russian import tokenize
+
+# Нечеткий поиск курса по названию с опечатками.
+# Название раскладывается на триграммы символов (как в pg_trgm: каждое слово
+# дополняется пробелами), индекс хранит для каждой триграммы список названий.
+# Кандидаты - только названия с общими триграммами, поэтому запрос не
+# сравнивается с каждым курсом, как при переборе с расстоянием Левенштейна.
+
+DEFAULT_LIMIT = 3
+
+# Минимальная похожесть (доля общих триграмм), ниже которой совпадение не показывается
+DEFAULT_THRESHOLD = 0.35
+
+
+def trigrams(text: str) -> FrozenSet[str]:
+    """Множество триграмм текста"""
+    result = set()
+    for word in tokenize(text):
+        padded = f"  {word} "
+        for i in range(len(padded) - 2):
+            result.add(padded[i:i + 3])
+    return frozenset(result)
+
+
+class FuzzyMatch:
+    """Курс, похожий на запрос, и программы, где он читается"""
+    __slots__ = ('name', 'similarity', 'occurrences')
+
+    def __init__(self, name: str, similarity: float, occurrences: List[Tuple[str, Course]]):
+        self.name = name
+        self.similarity = similarity
+        self.occurrences = occurrences
+
+
+class CourseTrigramIndex:
+    """Триграммный индекс названий курсов всех программ"""
+
+    def __init__(self, programs: Dict[str, Program]):
+        self.names: List[str] = []
+        self._sizes: List[int] = []
+        self._occurrences: List[List[Tuple[str, Course]]] = []
+        self._postings: Dict[str, List[int]] = {}
+
+        name_ids: Dict[str, int] = {}
+        for program in programs.values():
+            curriculum = program.curriculum_data
+            if not curriculum:
+                continue
+
+            for _, _, course in curriculum.iter_courses():
+                name_id = name_ids.get(course.name)
+                if name_id is None:
+                    name_id = self._add_name(course.name)
+                    name_ids[course.name] = name_id
+                self._occurrences[name_id].append((program.title, course))
+
+    def _add_name(self, name: str) -> int:
+        name_id = len(self.names)
+        grams = trigrams(name)
+        self.names.append(name)
+        self._sizes.append(len(grams))
+        self._occurrences.append([])
+        for gram in grams:
+            self._postings.setdefault(gram, []).append(name_id)
+        return name_id
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def search(self, query: str, limit: int = DEFAULT_LIMIT,
+               threshold: float = DEFAULT_THRESHOLD) -> List[FuzzyMatch]:
+        """Самые похожие названия курсов (похожесть - коэффициент Жаккара по триграммам)"""
+        query_grams = trigrams(query)
+        if not query_grams:
+            return []
+
+        common: Dict[int, int] = {}
+        for gram in query_grams:
+            for name_id in self._postings.get(gram, ()):
+                common[name_id] = common.get(name_id, 0) + 1
+
+        query_size = len(query_grams)
+        scored = []
+        for name_id, shared in common.items():
+            similarity = shared / (query_size + self._sizes[name_id] - shared)
+            if similarity >= threshold:
+                scored.append((similarity, -name_id))
+
+        return [
+            FuzzyMatch(self.names[-negative_id], similarity, self._occurrences[-negative_id])
+            for similarity, negative_id in heapq.nlargest(limit, scored)
+        ]
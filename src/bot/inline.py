@@ -0,0 +1,207 @@
+from collections import OrderedDict
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from aiogram.types import InlineQueryResultArticle, InputTextMessageContent
+
+from src.parsers.models import Block, Course, Direction, Program, SubBlock
+from src.bot.russian import tokenize
+from src.bot.views import RenderedViews, escape_markdown
+
+# Inline-режим: @bot <запрос> в любом чате.
+# Названия программ, направлений и курсов раскладываются на слова, и каждое
+# слово кладется в префиксное дерево. В узле дерева хранятся номера записей,
+# у которых есть слово с этим префиксом, уже упорядоченные по важности,
+# поэтому ответ на запрос - спуск по дереву на длину слова и срез готового
+# списка. Результаты (InlineQueryResultArticle) собираются при загрузке
+# снимка. Запросы приходят на каждое нажатие клавиши, поэтому ответы еще
+# и кэшируются по нормализованному запросу: следующий символ фильтрует
+# результат предыдущего префикса, а не обходит дерево заново.
+
+# Результатов в одном ответе (Telegram допускает до 50)
+RESULTS_PER_ANSWER = 20
+
+# Сколько нормализованных запросов держать в кэше
+QUERY_CACHE_SIZE = 2048
+
+# Слова запроса сверх этого числа не учитываются
+MAX_QUERY_WORDS = 6
+
+
+class _TrieNode:
+    __slots__ = ('children', 'entries')
+
+    def __init__(self):
+        self.children: Dict[str, '_TrieNode'] = {}
+        self.entries: List[int] = []
+
+
+class _Entry:
+    """Запись индекса: слова названия и готовый результат"""
+    __slots__ = ('words', 'result')
+
+    def __init__(self, words: Tuple[str, ...], result: InlineQueryResultArticle):
+        self.words = words
+        self.result = result
+
+    def matches(self, tokens: Sequence[str]) -> bool:
+        """Каждое слово запроса - префикс какого-то слова записи"""
+        return all(any(word.startswith(token) for word in self.words) for token in tokens)
+
+
+def _article(entry_id: int, title: str, description: str, text: str) -> InlineQueryResultArticle:
+    return InlineQueryResultArticle(
+        id=str(entry_id),
+        title=title,
+        description=description,
+        input_message_content=InputTextMessageContent(message_text=text, parse_mode="Markdown")
+    )
+
+
+def _semesters_label(semesters: List[int]) -> str:
+    if not semesters:
+        return "без семестра"
+    if len(semesters) == 1:
+        return f"{semesters[0]} семестр"
+    return f"{', '.join(map(str, semesters))} семестры"
+
+
+class InlineIndex:
+    """Префиксный индекс программ, направлений и курсов для inline-запросов"""
+
+    def __init__(self, programs: Dict[str, Program], views: RenderedViews):
+        self._entries: List[_Entry] = []
+        self._root = _TrieNode()
+        self._programs: List[int] = []
+        self._cache: 'OrderedDict[str, Sequence[int]]' = OrderedDict()
+
+        # Записи добавляются по убыванию важности: программы, направления, курсы.
+        # Номера записей растут в том же порядке, поэтому списки в узлах уже упорядочены
+        for program_id, program in programs.items():
+            self._programs.append(self._add_program(program, views.text('program', program_id)))
+
+        for program in programs.values():
+            for direction in (program.web_data.directions if program.web_data else []):
+                self._add_direction(program, direction)
+
+        for program in programs.values():
+            if program.curriculum_data:
+                self._add_courses(program)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    # --- Построение ---
+
+    def _add(self, names: Sequence[str], title: str, description: str, text: str) -> int:
+        entry_id = len(self._entries)
+        words = tuple(dict.fromkeys(word for name in names for word in tokenize(name)))
+        self._entries.append(_Entry(words, _article(entry_id, title, description, text)))
+
+        # Запись попадает в узел один раз, даже если префикс есть у нескольких ее слов
+        visited = set()
+        for word in words:
+            node = self._root
+            for char in word:
+                node = node.children.setdefault(char, _TrieNode())
+                if id(node) not in visited:
+                    visited.add(id(node))
+                    node.entries.append(entry_id)
+        return entry_id
+
+    def _add_program(self, program: Program, text: str) -> int:
+        basic_info = program.web_data.basic_info if program.web_data else {}
+        details = [
+            value for key, value in basic_info.items()
+            if 'стоимость' in key.lower() or 'длительность' in key.lower()
+        ]
+        return self._add(
+            [program.title, program.program_id],
+            f"🎓 {program.title}",
+            " · ".join(details) or "Магистратура ИТМО",
+            text
+        )
+
+    def _add_direction(self, program: Program, direction: Direction) -> None:
+        text = (
+            f"🎯 *{escape_markdown(direction.code)} {escape_markdown(direction.name)}*\n"
+            f"🎓 {escape_markdown(program.title)}\n\n"
+            f"• Бюджетных мест: {direction.budget_places}\n"
+            f"• Целевых мест: {direction.target_places}\n"
+            f"• Контрактных мест: {direction.contract_places}"
+        )
+        self._add(
+            [direction.name, direction.code],
+            f"🎯 {direction.code} {direction.name}",
+            f"{program.title} · бюджет {direction.budget_places}, контракт {direction.contract_places}",
+            text
+        )
+
+    def _add_courses(self, program: Program) -> None:
+        # Один курс может читаться в нескольких семестрах - это одна запись
+        occurrences: Dict[str, List[Tuple[Block, SubBlock, Course]]] = {}
+        for block, sub_block, course in program.curriculum_data.iter_courses():
+            occurrences.setdefault(course.name, []).append((block, sub_block, course))
+
+        def order(name: str) -> Tuple[int, str]:
+            semesters = [course.semester for _, _, course in occurrences[name] if course.semester is not None]
+            return min(semesters, default=99), name
+
+        for name in sorted(occurrences, key=order):
+            block, sub_block, course = occurrences[name][0]
+            semesters = sorted({c.semester for _, _, c in occurrences[name] if c.semester is not None})
+            when = _semesters_label(semesters)
+            text = (
+                f"📘 *{escape_markdown(name)}*\n"
+                f"🎓 {escape_markdown(program.title)}\n"
+                f"📋 {escape_markdown(block.name)}\n"
+                f"📖 {escape_markdown(sub_block.name)}\n"
+                f"🗓 {when}, {course.credits} з.ед., {course.hours} ч"
+            )
+            self._add([name], f"📘 {name}", f"{program.title} · {when} · {course.credits} з.ед.", text)
+
+    # --- Запросы ---
+
+    def _node(self, prefix: str) -> Optional[_TrieNode]:
+        node = self._root
+        for char in prefix:
+            node = node.children.get(char)
+            if node is None:
+                return None
+        return node
+
+    def lookup(self, query: str) -> Sequence[int]:
+        """Номера записей под запрос, от важных к менее важным"""
+        tokens = tokenize(query)[:MAX_QUERY_WORDS]
+        if not tokens:
+            return self._programs
+
+        key = ' '.join(tokens)
+        cached = self._cache.get(key)
+        if cached is not None:
+            self._cache.move_to_end(key)
+            return cached
+
+        if len(tokens) == 1:
+            node = self._node(tokens[0])
+            found: Sequence[int] = node.entries if node else ()
+        else:
+            # Результат запроса без последнего символа содержит все результаты этого запроса
+            parent = self._cache.get(key[:-1].rstrip())
+            if parent is None:
+                nodes = [self._node(token) for token in tokens]
+                parent = min((node.entries for node in nodes), key=len) if all(nodes) else ()
+            found = [entry_id for entry_id in parent if self._entries[entry_id].matches(tokens)]
+
+        self._cache[key] = found
+        if len(self._cache) > QUERY_CACHE_SIZE:
+            self._cache.popitem(last=False)
+        return found
+
+    def answer(self, query: str, offset: str = "",
+               limit: int = RESULTS_PER_ANSWER) -> Tuple[List[InlineQueryResultArticle], str]:
+        """Страница результатов и offset следующей страницы ("" - страниц больше нет)"""
+        start = int(offset) if offset.isdigit() else 0
+        found = self.lookup(query)
+        results = [self._entries[entry_id].result for entry_id in found[start:start + limit]]
+        next_offset = str(start + limit) if start + limit < len(found) else ""
+        return results, next_offset
@@ -0,0 +1,162 @@
+import json
+import logging
+from collections import deque
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from .russian import stem_tokens
+
+logger = logging.getLogger(__name__)
+
+# Словарь по умолчанию (если config/intents.json отсутствует или поврежден):
+# интент -> экран ответа и фразы, по которым он распознается
+DEFAULT_VOCABULARY = {
+    'cost': {
+        'screen': 'cost',
+        'phrases': ['стоимость', 'цена', 'сколько стоит'],
+    },
+    'contacts': {
+        'screen': 'contacts_all',
+        'phrases': ['контакт', 'телефон', 'email', 'менеджер'],
+    },
+    'admission': {
+        'screen': 'admission_all',
+        'phrases': ['поступление', 'экзамен', 'когда поступать'],
+    },
+    'courses': {
+        'screen': 'courses_all',
+        'phrases': ['курсы', 'предметы', 'учебный план'],
+    },
+    'duration': {
+        'screen': 'duration',
+        'phrases': ['длительность', 'срок', 'сколько лет'],
+    },
+}
+
+
+class Intent:
+    """Интент: имя, экран ответа и приоритет (порядок в словаре)"""
+    __slots__ = ('name', 'screen', 'priority')
+
+    def __init__(self, name: str, screen: str, priority: int):
+        self.name = name
+        self.screen = screen
+        self.priority = priority
+
+
+class IntentMatcher:
+    """Автомат Ахо-Корасик над основами слов.
+
+    Все фразы всех интентов (с синонимами) приводятся к последовательностям
+    основ слов, поэтому любые словоформы ("стоимость", "стоимости") совпадают.
+    Сообщение проходится один раз, стоимость не зависит от числа интентов.
+    Каждое совпадение добавляет интенту вес, равный длине фразы в словах;
+    побеждает интент с наибольшим счетом, при равенстве - более ранний в словаре.
+    """
+
+    def __init__(self, vocabulary: Dict[str, Dict]):
+        self.intents: List[Intent] = []
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[List[Tuple[int, int]]] = [[]]
+
+        for priority, (name, spec) in enumerate(vocabulary.items()):
+            self.intents.append(Intent(name, spec['screen'], priority))
+            for phrase in spec['phrases']:
+                tokens = stem_tokens(phrase)
+                if tokens:
+                    self._add_pattern(tokens, priority)
+
+        self._build_failure_links()
+
+    def _add_pattern(self, tokens: List[str], intent_index: int) -> None:
+        state = 0
+        for token in tokens:
+            next_state = self._goto[state].get(token)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][token] = next_state
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append([])
+            state = next_state
+        self._output[state].append((intent_index, len(tokens)))
+
+    def _build_failure_links(self) -> None:
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for token, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fallback = self._fail[state]
+                while fallback and token not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[next_state] = self._goto[fallback].get(token, 0)
+                # Совпадения суффиксов наследуются по ссылке неудачи
+                self._output[next_state] = self._output[next_state] + self._output[self._fail[next_state]]
+
+    def _score(self, text: str) -> Dict[int, int]:
+        """Счет каждого найденного интента (по индексу) за один проход по сообщению"""
+        totals: Dict[int, int] = {}
+        state = 0
+        goto = self._goto
+        fail = self._fail
+
+        for token in stem_tokens(text):
+            while state and token not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(token, 0)
+            for intent_index, weight in self._output[state]:
+                totals[intent_index] = totals.get(intent_index, 0) + weight
+
+        return totals
+
+    def scores(self, text: str) -> Dict[str, int]:
+        """Счет каждого найденного интента по имени"""
+        return {self.intents[index].name: score for index, score in self._score(text).items()}
+
+    def match(self, text: str) -> Optional[Intent]:
+        """Лучший интент для сообщения"""
+        totals = self._score(text)
+        if not totals:
+            return None
+
+        best = max(totals, key=lambda index: (totals[index], -index))
+        return self.intents[best]
+
+
+class IntentEngine:
+    """Распознавание интентов со словарем из JSON и горячей перезагрузкой"""
+
+    def __init__(self, vocabulary_file: Path):
+        self.vocabulary_file = vocabulary_file
+        self._mtime: Optional[int] = None
+        self.matcher = IntentMatcher(DEFAULT_VOCABULARY)
+        self.reload_if_changed()
+
+    def reload_if_changed(self) -> bool:
+        """Перекомпиляция автомата, если файл словаря изменился (блокирующий вызов)"""
+        try:
+            mtime = self.vocabulary_file.stat().st_mtime_ns
+        except FileNotFoundError:
+            return False
+
+        if mtime == self._mtime:
+            return False
+
+        try:
+            with open(self.vocabulary_file, 'r', encoding='utf-8') as f:
+                matcher = IntentMatcher(json.load(f))
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            logger.error(f"Словарь интентов {self.vocabulary_file} не загружен: {e}")
+            self._mtime = mtime
+            return False
+
+        # Замена одной ссылкой: запросы видят либо старый, либо новый автомат
+        self.matcher = matcher
+        self._mtime = mtime
+        logger.info(f"Словарь интентов загружен: {len(matcher.intents)} интентов")
+        return True
+
+    def match(self, text: str) -> Optional[Intent]:
+        return self.matcher.match(text)
@@ -0,0 +1,185 @@
+import asyncio
+import logging
+import sys
+import threading
+import time
+import traceback
+from types import CodeType, FrameType
+from typing import Dict, List, Optional
+
+from aiogram import Dispatcher
+
+from src.bot.metrics import MetricsRegistry
+
+logger = logging.getLogger(__name__)
+
+# Контроль задержек event loop.
+# Корутина просыпается каждые SAMPLE_INTERVAL секунд и измеряет, насколько
+# позже положенного ее разбудили: это время, на которое event loop был занят
+# синхронной работой. Сторожевой поток следит за отметками корутины и, если
+# очередной отметки нет дольше порога, снимает стек потока event loop - в
+# этот момент в стеке находится блокирующий вызов и обработчик, из которого
+# он сделан. Когда loop освобождается, задержка, стек и обработчик пишутся
+# в лог и в метрики.
+
+# Как часто измерять задержку (секунды)
+SAMPLE_INTERVAL = 0.05
+
+# Сколько внутренних кадров стека показывать в отчете
+STACK_DEPTH = 15
+
+# Если loop не отвечает так долго (в порогах), сторожевой поток пишет в лог сразу
+HANG_FACTOR = 50
+
+# Корзины гистограммы задержек (секунды)
+LAG_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+OUTSIDE_HANDLERS = 'вне обработчиков'
+
+
+class _Stall:
+    """Стек, снятый во время задержки"""
+    __slots__ = ('handler', 'stack')
+
+    def __init__(self, handler: str, stack: List[str]):
+        self.handler = handler
+        self.stack = stack
+
+
+class LoopLagMonitor:
+    """Измерение задержек event loop и поиск блокирующих обработчиков"""
+
+    def __init__(self, dispatcher: Dispatcher, threshold: float,
+                 registry: Optional[MetricsRegistry] = None):
+        self.dispatcher = dispatcher
+        self.threshold = threshold
+        self.max_lag = 0.0
+
+        self._handlers: Dict[CodeType, str] = {}
+        self._heartbeat = time.monotonic()
+        self._loop_thread_id: Optional[int] = None
+        self._stall: Optional[_Stall] = None
+        self._stall_lock = threading.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self._watchdog: Optional[threading.Thread] = None
+        self._stopped = threading.Event()
+
+        self._lag = self._stalls = None
+        if registry is not None:
+            self._lag = registry.histogram(
+                'itmo_bot_event_loop_lag_seconds', 'Задержка пробуждения корутин event loop',
+                buckets=LAG_BUCKETS
+            )
+            self._stalls = registry.counter(
+                'itmo_bot_event_loop_stalls_total', 'Блокировки event loop дольше порога', ('handler',)
+            )
+
+    def _collect_handlers(self) -> None:
+        """Код всех обработчиков диспетчера - по нему обработчик находится в стеке"""
+        for observer in self.dispatcher.observers.values():
+            for handler in observer.handlers:
+                callback = getattr(handler.callback, '__func__', handler.callback)
+                code = getattr(callback, '__code__', None)
+                if code is not None:
+                    self._handlers[code] = callback.__name__
+
+    def _find_handler(self, frame: Optional[FrameType]) -> str:
+        while frame is not None:
+            name = self._handlers.get(frame.f_code)
+            if name is not None:
+                return name
+            frame = frame.f_back
+        return OUTSIDE_HANDLERS
+
+    def _capture(self) -> Optional[_Stall]:
+        """Стек потока event loop (вызывается из сторожевого потока)"""
+        frame = sys._current_frames().get(self._loop_thread_id)
+        if frame is None:
+            return None
+        stack = traceback.format_list(traceback.extract_stack(frame)[-STACK_DEPTH:])
+        return _Stall(self._find_handler(frame), stack)
+
+    # --- Поток event loop ---
+
+    async def start(self) -> None:
+        if self.threshold <= 0 or self._task is not None:
+            return
+        self._collect_handlers()
+        self._loop_thread_id = threading.get_ident()
+        self._heartbeat = time.monotonic()
+        self._stopped.clear()
+        self._task = asyncio.create_task(self._sample())
+        self._watchdog = threading.Thread(target=self._watch, name='loop-lag-watchdog', daemon=True)
+        self._watchdog.start()
+
+    async def stop(self) -> None:
+        self._stopped.set()
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._watchdog is not None:
+            await asyncio.to_thread(self._watchdog.join)
+            self._watchdog = None
+
+    async def _sample(self) -> None:
+        while True:
+            expected = time.monotonic() + SAMPLE_INTERVAL
+            await asyncio.sleep(SAMPLE_INTERVAL)
+            now = time.monotonic()
+            self._heartbeat = now
+            lag = max(0.0, now - expected)
+
+            if self._lag is not None:
+                self._lag.observe(lag)
+            self.max_lag = max(self.max_lag, lag)
+
+            with self._stall_lock:
+                stall, self._stall = self._stall, None
+            if lag >= self.threshold:
+                self._report(lag, stall)
+
+    def _report(self, lag: float, stall: Optional[_Stall]) -> None:
+        handler = stall.handler if stall else OUTSIDE_HANDLERS
+        if self._stalls is not None:
+            self._stalls.inc((handler,))
+        if stall is None:
+            logger.warning(f"Event loop заблокирован на {lag * 1000:.0f} мс (стек не снят)")
+            return
+        logger.warning(
+            f"Event loop заблокирован на {lag * 1000:.0f} мс, обработчик: {handler}\n"
+            + ''.join(stall.stack).rstrip()
+        )
+
+    # --- Сторожевой поток ---
+
+    def _watch(self) -> None:
+        interval = max(self.threshold / 10, 0.005)
+        captured_for: Optional[float] = None
+        hang_logged_for: Optional[float] = None
+
+        while not self._stopped.wait(interval):
+            heartbeat = self._heartbeat
+            blocked = time.monotonic() - heartbeat - SAMPLE_INTERVAL
+            # Стек снимается заранее, с половины порога: задержка может закончиться
+            # чуть позже порога, а пока loop занят, стек не меняется по сути
+            if blocked < self.threshold / 2:
+                continue
+
+            if captured_for != heartbeat:
+                captured_for = heartbeat
+                stall = self._capture()
+                with self._stall_lock:
+                    self._stall = stall
+
+            if blocked >= self.threshold * HANG_FACTOR and hang_logged_for != heartbeat:
+                hang_logged_for = heartbeat
+                stall = self._capture()
+                logger.error(
+                    f"Event loop не отвечает уже {blocked:.1f} с, обработчик: "
+                    f"{stall.handler if stall else OUTSIDE_HANDLERS}\n"
+                    + (''.join(stall.stack).rstrip() if stall else '')
+                )
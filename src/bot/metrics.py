@@ -0,0 +1,347 @@
+import bisect
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence, Tuple
+
+from aiogram import BaseMiddleware, Bot, Dispatcher
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware, NextRequestMiddlewareType
+from aiogram.methods import Response, TelegramMethod
+from aiogram.methods.base import TelegramType
+from aiogram.types import TelegramObject, Update
+from aiohttp import web
+
+logger = logging.getLogger(__name__)
+
+# Метрики бота в текстовом формате Prometheus.
+# Значения хранятся в словарях по кортежу меток и обновляются из event loop
+# без блокировок; на обработку обновления приходится пара вызовов
+# perf_counter и поиск корзины гистограммы, поэтому метрики можно держать
+# включенными постоянно. Отдельный HTTP-сервер на локальном адресе отдает
+# их по /metrics.
+
+# Границы корзин гистограмм (секунды), как у клиента Prometheus по умолчанию
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+Labels = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(names: Sequence[str], values: Labels, extra: str = '') -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metric:
+    """Базовый класс метрики с метками"""
+    kind = ''
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+    def samples(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(Metric):
+    """Монотонно растущий счетчик"""
+    kind = 'counter'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Labels, float] = {}
+
+    def inc(self, labels: Labels = (), amount: float = 1) -> None:
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+    def value(self, labels: Labels = ()) -> float:
+        return self._values.get(labels, 0)
+
+    def samples(self) -> List[str]:
+        return [
+            f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}"
+            for labels, value in sorted(self._values.items())
+        ]
+
+
+class Gauge(Metric):
+    """Текущее значение (может расти и убывать) или функция, вызываемая при сборе"""
+    kind = 'gauge'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 collect: Optional[Callable[[], float]] = None):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Labels, float] = {}
+        self._collect = collect
+
+    def inc(self, labels: Labels = (), amount: float = 1) -> None:
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+    def dec(self, labels: Labels = (), amount: float = 1) -> None:
+        self._values[labels] = self._values.get(labels, 0) - amount
+
+    def set(self, value: float, labels: Labels = ()) -> None:
+        self._values[labels] = value
+
+    def value(self, labels: Labels = ()) -> float:
+        return self._values.get(labels, 0)
+
+    def samples(self) -> List[str]:
+        if self._collect is not None:
+            self._values[()] = self._collect()
+        return [
+            f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}"
+            for labels, value in sorted(self._values.items())
+        ]
+
+
+class _HistogramValue:
+    __slots__ = ('buckets', 'sum', 'count')
+
+    def __init__(self, size: int):
+        self.buckets = [0] * size
+        self.sum = 0.0
+        self.count = 0
+
+
+class Histogram(Metric):
+    """Распределение значений по корзинам"""
+    kind = 'histogram'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.bounds = tuple(sorted(buckets))
+        self._values: Dict[Labels, _HistogramValue] = {}
+
+    def observe(self, value: float, labels: Labels = ()) -> None:
+        histogram = self._values.get(labels)
+        if histogram is None:
+            # Последняя корзина - +Inf
+            histogram = self._values[labels] = _HistogramValue(len(self.bounds) + 1)
+        histogram.buckets[bisect.bisect_left(self.bounds, value)] += 1
+        histogram.sum += value
+        histogram.count += 1
+
+    def count(self, labels: Labels = ()) -> int:
+        histogram = self._values.get(labels)
+        return histogram.count if histogram else 0
+
+    def samples(self) -> List[str]:
+        lines = []
+        bounds = self.bounds + (float('inf'),)
+        for labels, histogram in sorted(self._values.items()):
+            cumulative = 0
+            for bound, count in zip(bounds, histogram.buckets):
+                cumulative += count
+                bucket_labels = _format_labels(self.labelnames, labels, f'le="{_format_value(bound)}"')
+                lines.append(f"{self.name}_bucket{bucket_labels} {cumulative}")
+            label_text = _format_labels(self.labelnames, labels)
+            lines.append(f"{self.name}_sum{label_text} {_format_value(histogram.sum)}")
+            lines.append(f"{self.name}_count{label_text} {histogram.count}")
+        return lines
+
+
+class MetricsRegistry:
+    """Набор метрик процесса"""
+
+    def __init__(self):
+        self._metrics: Dict[str, Metric] = {}
+
+    def register(self, metric: Metric) -> Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f"Метрика {metric.name} уже зарегистрирована")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+              collect: Optional[Callable[[], float]] = None) -> Gauge:
+        return self.register(Gauge(name, documentation, labelnames, collect))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self) -> str:
+        """Все метрики в текстовом формате Prometheus"""
+        lines = []
+        for metric in self._metrics.values():
+            try:
+                samples = metric.samples()
+            except Exception as e:
+                logger.error(f"Ошибка сбора метрики {metric.name}: {e}")
+                continue
+            lines.extend(metric.header())
+            lines.extend(samples)
+        return '\n'.join(lines) + '\n'
+
+
+class BotMetrics:
+    """Метрики обработки обновлений и запросов к Bot API"""
+
+    def __init__(self, registry: Optional[MetricsRegistry] = None):
+        self.registry = registry or MetricsRegistry()
+        registry = self.registry
+
+        self.updates = registry.counter(
+            'itmo_bot_updates_total', 'Полученные обновления по типу', ('type',)
+        )
+        self.update_duration = registry.histogram(
+            'itmo_bot_update_duration_seconds', 'Полное время обработки обновления', ('type',)
+        )
+        self.handler_duration = registry.histogram(
+            'itmo_bot_handler_duration_seconds', 'Время работы обработчика', ('handler',)
+        )
+        self.handler_errors = registry.counter(
+            'itmo_bot_handler_errors_total', 'Исключения в обработчиках', ('handler', 'error')
+        )
+        self.handler_in_flight = registry.gauge(
+            'itmo_bot_handler_in_flight', 'Обработчики, выполняющиеся сейчас', ('handler',)
+        )
+        self.api_duration = registry.histogram(
+            'itmo_bot_api_request_duration_seconds', 'Время запроса к Bot API', ('method',)
+        )
+        self.api_errors = registry.counter(
+            'itmo_bot_api_errors_total', 'Ошибки запросов к Bot API', ('method', 'error')
+        )
+
+    def install(self, dispatcher: Dispatcher, bot: Bot) -> None:
+        """Подключение middleware к диспетчеру и сессии бота"""
+        dispatcher.update.outer_middleware(UpdateMetricsMiddleware(self))
+        # Внутренний middleware вызывается только для обновлений, нашедших обработчик
+        handler_middleware = HandlerMetricsMiddleware(self)
+        for name, observer in dispatcher.observers.items():
+            if name not in ('update', 'error'):
+                observer.middleware(handler_middleware)
+        bot.session.middleware(ApiMetricsMiddleware(self))
+
+
+def _handler_name(data: Dict[str, Any]) -> str:
+    handler = data.get('handler')
+    callback = getattr(handler, 'callback', None)
+    return getattr(callback, '__name__', None) or 'unknown'
+
+
+class UpdateMetricsMiddleware(BaseMiddleware):
+    """Число обновлений и полное время их обработки (включая фильтры)"""
+
+    def __init__(self, metrics: BotMetrics):
+        self.metrics = metrics
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any],
+    ) -> Any:
+        labels = (event.event_type if isinstance(event, Update) else type(event).__name__,)
+        self.metrics.updates.inc(labels)
+        started = time.perf_counter()
+        try:
+            return await handler(event, data)
+        finally:
+            self.metrics.update_duration.observe(time.perf_counter() - started, labels)
+
+
+class HandlerMetricsMiddleware(BaseMiddleware):
+    """Время работы, ошибки и число выполняющихся вызовов каждого обработчика"""
+
+    def __init__(self, metrics: BotMetrics):
+        self.metrics = metrics
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any],
+    ) -> Any:
+        metrics = self.metrics
+        labels = (_handler_name(data),)
+        metrics.handler_in_flight.inc(labels)
+        started = time.perf_counter()
+        try:
+            return await handler(event, data)
+        except Exception as e:
+            metrics.handler_errors.inc(labels + (type(e).__name__,))
+            raise
+        finally:
+            metrics.handler_duration.observe(time.perf_counter() - started, labels)
+            metrics.handler_in_flight.dec(labels)
+
+
+class ApiMetricsMiddleware(BaseRequestMiddleware):
+    """Время и ошибки запросов к Bot API (без ожидания в очереди отправки)"""
+
+    def __init__(self, metrics: BotMetrics):
+        self.metrics = metrics
+
+    async def __call__(
+        self,
+        make_request: NextRequestMiddlewareType[TelegramType],
+        bot: Bot,
+        method: TelegramMethod[TelegramType],
+    ) -> Response[TelegramType]:
+        labels = (method.__api_method__,)
+        started = time.perf_counter()
+        try:
+            return await make_request(bot, method)
+        except Exception as e:
+            self.metrics.api_errors.inc(labels + (type(e).__name__,))
+            raise
+        finally:
+            self.metrics.api_duration.observe(time.perf_counter() - started, labels)
+
+
+class MetricsServer:
+    """HTTP-сервер с /metrics"""
+
+    def __init__(self, registry: MetricsRegistry, host: str, port: int):
+        self.registry = registry
+        self.host = host
+        self.port = port
+        self._runner: Optional[web.AppRunner] = None
+
+    async def _handle(self, request: web.Request) -> web.Response:
+        return web.Response(
+            body=self.registry.render().encode('utf-8'),
+            headers={'Content-Type': CONTENT_TYPE}
+        )
+
+    async def start(self) -> None:
+        app = web.Application()
+        app.router.add_get('/metrics', self._handle)
+        runner = web.AppRunner(app, access_log=None)
+        await runner.setup()
+        try:
+            await web.TCPSite(runner, self.host, self.port).start()
+        except OSError as e:
+            await runner.cleanup()
+            logger.error(f"Не удалось запустить сервер метрик на {self.host}:{self.port}: {e}")
+            return
+        self._runner = runner
+        logger.info(f"Метрики доступны на http://{self.host}:{self.port}/metrics")
+
+    async def stop(self) -> None:
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
@@ -0,0 +1,120 @@
+import logging
+import os
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+from src.parsers.pdf_store import PDFStore, file_sha256
+
+logger = logging.getLogger(__name__)
+
+# Индекс PDF учебных планов в памяти.
+# Меню учебного плана показывает кнопку скачивания, только если PDF есть,
+# а при отправке нужен хэш файла для кэша file_id. Раньше каждое меню
+# проверяло диск из обработчика; теперь папка PDF сканируется при запуске
+# и повторно, когда меняется ее содержимое, а обработчики только читают
+# готовый словарь program_id -> PDFEntry. Изменения проверяются вместе со
+# снимком данных (раз в DATA_RELOAD_INTERVAL); при 0 индекс не обновляется.
+
+LEGACY_SUFFIX = '_curriculum.pdf'
+
+
+class PDFEntry:
+    """Доступный PDF программы"""
+    __slots__ = ('path', 'size', 'mtime_ns', 'sha256')
+
+    def __init__(self, path: Path, size: int, mtime_ns: int, sha256: str):
+        self.path = path
+        self.size = size
+        self.mtime_ns = mtime_ns
+        self.sha256 = sha256
+
+
+def _stat(path: Path) -> Optional[os.stat_result]:
+    try:
+        return path.stat()
+    except (FileNotFoundError, NotADirectoryError):
+        return None
+
+
+class PDFIndex:
+    """Наличие, размер и хэш PDF каждой программы
+
+    Источники те же, что у прежнего поиска: сначала привязки контентно-
+    адресуемого хранилища, затем старые файлы {program_id}_curriculum.pdf.
+    """
+
+    def __init__(self, store: PDFStore):
+        self.store = store
+        self.entries: Dict[str, PDFEntry] = {}
+        self._signature: Optional[Tuple] = None
+        # Хэши старых файлов по отпечатку: неизменный файл не читается повторно
+        self._hashes: Dict[Tuple[str, int, int], str] = {}
+
+    def get(self, program_id: str) -> Optional[PDFEntry]:
+        return self.entries.get(program_id)
+
+    def available(self, program_id: str) -> bool:
+        return program_id in self.entries
+
+    def _signature_now(self) -> Tuple:
+        """Отпечаток папок и индекса хранилища вместе с уже найденными файлами.
+
+        Время изменения папки меняется при создании, удалении и переименовании
+        файлов (в том числе при атомарной замене), а отпечатки найденных файлов
+        замечают перезапись на месте.
+        """
+        parts = []
+        for path in (self.store.pdf_dir, self.store.blobs_dir, self.store.index_file):
+            stat = _stat(path)
+            parts.append((stat.st_mtime_ns, stat.st_size) if stat else None)
+        for program_id, entry in sorted(self.entries.items()):
+            stat = _stat(entry.path)
+            parts.append((program_id, (stat.st_mtime_ns, stat.st_size) if stat else None))
+        return tuple(parts)
+
+    def refresh_if_changed(self) -> bool:
+        """Пересканирование папки PDF, если она изменилась (блокирующий вызов)"""
+        signature = self._signature_now()
+        if signature == self._signature:
+            return False
+
+        entries = self._scan()
+        # Замена одной ссылкой: обработчики видят либо старый, либо новый индекс
+        self.entries = entries
+        self._signature = self._signature_now()
+        logger.info(f"Индекс PDF обновлен, учебных планов: {len(entries)}")
+        return True
+
+    def _scan(self) -> Dict[str, PDFEntry]:
+        entries: Dict[str, PDFEntry] = {}
+        if not self.store.pdf_dir.exists():
+            logger.warning(f"Папка PDF не найдена: {self.store.pdf_dir}")
+            return entries
+
+        # Blob'ы хранилища названы по хэшу - содержимое не читается
+        for program_id, sha256 in self.store.programs().items():
+            path = self.store.blob_path(sha256)
+            stat = _stat(path)
+            if stat is not None:
+                entries[program_id] = PDFEntry(path, stat.st_size, stat.st_mtime_ns, sha256)
+
+        hashes: Dict[Tuple[str, int, int], str] = {}
+        for path in self.store.pdf_dir.glob(f"*{LEGACY_SUFFIX}"):
+            program_id = path.name[:-len(LEGACY_SUFFIX)]
+            stat = _stat(path)
+            if program_id in entries or stat is None:
+                continue
+
+            key = (str(path), stat.st_mtime_ns, stat.st_size)
+            sha256 = self._hashes.get(key)
+            if sha256 is None:
+                try:
+                    sha256 = file_sha256(path)
+                except OSError as e:
+                    logger.error(f"PDF {path} не прочитан: {e}")
+                    continue
+            hashes[key] = sha256
+            entries[program_id] = PDFEntry(path, stat.st_size, stat.st_mtime_ns, sha256)
+
+        self._hashes = hashes
+        return entries
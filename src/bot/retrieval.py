@@ -0,0 +1,194 @@
+from collections import Counter
+from typing import Dict, List
+
+from src.parsers.models import Course, Program
+
+from .russian import stem, stem_tokens
+
+try:
+    import numpy as np
+    from scipy import sparse
+    RETRIEVAL_AVAILABLE = True
+except ImportError:
+    RETRIEVAL_AVAILABLE = False
+
+# Поиск ответа на произвольный вопрос без сети и GPU.
+# Текстовые поля снимка режутся на короткие фрагменты, по ним строится
+# разреженная матрица TF-IDF (фрагменты x основы слов) с нормированными
+# строками. Вопросы переводятся в такие же векторы, и косинусная близость
+# ко всем фрагментам считается одним умножением разреженных матриц.
+
+DEFAULT_LIMIT = 3
+
+# Минимальная косинусная близость, ниже которой фрагмент не считается ответом
+DEFAULT_THRESHOLD = 0.2
+
+# Служебные слова вопросов не участвуют в поиске ("как" не должно находить "русский язык как иностранный")
+STOP_WORDS = frozenset(stem(word) for word in (
+    'а', 'и', 'в', 'во', 'на', 'по', 'о', 'об', 'про', 'для', 'у', 'с', 'со', 'к', 'ко', 'за',
+    'из', 'от', 'до', 'не', 'ли', 'же', 'бы', 'как', 'что', 'кто', 'где', 'когда', 'это', 'такое',
+    'есть', 'мне', 'я', 'вы', 'какой', 'какая', 'какие', 'каком', 'можно',
+))
+
+
+def _terms(text: str) -> Counter:
+    return Counter(token for token in stem_tokens(text) if token not in STOP_WORDS)
+
+
+class Passage:
+    """Фрагмент текста программы"""
+    __slots__ = ('program_id', 'program_title', 'text')
+
+    def __init__(self, program_id: str, program_title: str, text: str):
+        self.program_id = program_id
+        self.program_title = program_title
+        self.text = text
+
+
+class PassageHit:
+    """Найденный фрагмент и его близость к вопросу"""
+    __slots__ = ('passage', 'score')
+
+    def __init__(self, passage: Passage, score: float):
+        self.passage = passage
+        self.score = score
+
+
+def _semesters(semesters: List[int]) -> str:
+    return f"{', '.join(map(str, sorted(semesters)))} семестр" if semesters else "семестр не указан"
+
+
+def build_passages(programs: Dict[str, Program]) -> List[Passage]:
+    """Фрагменты всех текстовых полей снимка"""
+    passages = []
+
+    for program_id, program in programs.items():
+        title = program.title
+
+        def add(text: str):
+            passages.append(Passage(program_id, title, text))
+
+        web_data = program.web_data
+        if web_data:
+            for key, value in web_data.basic_info.items():
+                add(f"{key.capitalize()}: {value}")
+            for direction in web_data.directions:
+                add(
+                    f"Направление {direction.code} {direction.name}: "
+                    f"бюджетных мест {direction.budget_places}, целевых {direction.target_places}, "
+                    f"контрактных {direction.contract_places}"
+                )
+            if web_data.manager_name:
+                contacts = ', '.join(web_data.manager_contacts)
+                add(f"Менеджер программы: {web_data.manager_name}" + (f" ({contacts})" if contacts else ""))
+
+        curriculum = program.curriculum_data
+        if curriculum:
+            for block in curriculum.blocks:
+                add(f"{block.name}: {block.total_credits} зет, {block.total_hours} ч")
+
+            # Курс, читающийся в нескольких семестрах, - один фрагмент
+            courses: Dict[str, List[Course]] = {}
+            for _, _, course in curriculum.iter_courses():
+                courses.setdefault(course.name, []).append(course)
+            for name, occurrences in courses.items():
+                semesters = [course.semester for course in occurrences if course.semester is not None]
+                add(f"Курс «{name}»: {_semesters(list(set(semesters)))}, {occurrences[0].credits} зет")
+
+    return passages
+
+
+class TfidfIndex:
+    """Матрица TF-IDF по фрагментам снимка"""
+
+    def __init__(self, programs: Dict[str, Program]):
+        self.passages: List[Passage] = []
+        self._vocabulary: Dict[str, int] = {}
+        self._matrix_t = None
+
+        if not RETRIEVAL_AVAILABLE:
+            return
+
+        self.passages = build_passages(programs)
+        if not self.passages:
+            return
+
+        rows: List[int] = []
+        cols: List[int] = []
+        counts: List[int] = []
+        for row, passage in enumerate(self.passages):
+            # Название программы входит во фрагмент, чтобы вопрос о конкретной программе ранжировался выше
+            tokens = _terms(f"{passage.program_title} {passage.text}")
+            for token, count in tokens.items():
+                rows.append(row)
+                cols.append(self._vocabulary.setdefault(token, len(self._vocabulary)))
+                counts.append(count)
+
+        shape = (len(self.passages), len(self._vocabulary))
+        matrix = sparse.csr_matrix(
+            (np.asarray(counts, dtype=np.float32), (rows, cols)), shape=shape
+        )
+
+        # Сглаженный idf, как в sklearn: log((1 + N) / (1 + df)) + 1
+        document_frequency = np.bincount(cols, minlength=shape[1])
+        self._idf = (np.log((1 + shape[0]) / (1 + document_frequency)) + 1).astype(np.float32)
+
+        # Транспонированная матрица: вопросы (k x V) умножаются на нее за один вызов
+        self._matrix_t = self._weight(matrix).T.tocsr()
+
+    def _weight(self, counts):
+        """Сублинейный tf * idf и нормировка строк по L2"""
+        weighted = counts.copy()
+        weighted.data = 1 + np.log(weighted.data)
+        weighted = weighted.multiply(self._idf).tocsr()
+        norms = np.sqrt(np.asarray(weighted.multiply(weighted).sum(axis=1)).ravel())
+        norms[norms == 0] = 1
+        return sparse.diags(1 / norms) @ weighted
+
+    def _vectorize(self, questions: List[str]):
+        rows: List[int] = []
+        cols: List[int] = []
+        counts: List[int] = []
+        for row, question in enumerate(questions):
+            tokens = _terms(question)
+            for token, count in tokens.items():
+                col = self._vocabulary.get(token)
+                if col is not None:
+                    rows.append(row)
+                    cols.append(col)
+                    counts.append(count)
+
+        matrix = sparse.csr_matrix(
+            (np.asarray(counts, dtype=np.float32), (rows, cols)),
+            shape=(len(questions), len(self._vocabulary))
+        )
+        return self._weight(matrix)
+
+    def __len__(self) -> int:
+        return len(self.passages)
+
+    def search_many(self, questions: List[str], limit: int = DEFAULT_LIMIT,
+                    threshold: float = DEFAULT_THRESHOLD) -> List[List[PassageHit]]:
+        """Лучшие фрагменты для каждого вопроса (один проход для всей пачки)"""
+        if self._matrix_t is None or not questions:
+            return [[] for _ in questions]
+
+        similarities = (self._vectorize(questions) @ self._matrix_t).toarray()
+        limit = min(limit, similarities.shape[1])
+
+        results = []
+        for scores in similarities:
+            top = np.argpartition(scores, -limit)[-limit:]
+            top = top[np.argsort(-scores[top], kind='stable')]
+            results.append([
+                PassageHit(self.passages[index], float(scores[index]))
+                for index in top
+                if scores[index] >= threshold
+            ])
+
+        return results
+
+    def search(self, question: str, limit: int = DEFAULT_LIMIT,
+               threshold: float = DEFAULT_THRESHOLD) -> List[PassageHit]:
+        """Лучшие фрагменты для вопроса"""
+        return self.search_many([question], limit, threshold)[0]
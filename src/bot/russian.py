@@ -0,0 +1,153 @@
+import re
+from functools import lru_cache
+from typing import List, Optional, Tuple
+
+# Нормализация русского текста: токенизация и стемминг по алгоритму
+# Snowball (Porter) для русского языка. Нужен, чтобы "стоимость",
+# "стоимости" и "стоимостью" сводились к одной основе.
+
+VOWELS = frozenset('аеиоуыэюя')
+
+TOKEN_RE = re.compile(r'[a-zа-яё0-9]+')
+
+_PERFECTIVE_GERUND_1 = ('в', 'вши', 'вшись')
+_PERFECTIVE_GERUND_2 = ('ив', 'ивши', 'ившись', 'ыв', 'ывши', 'ывшись')
+_REFLEXIVE = ('ся', 'сь')
+_ADJECTIVE = (
+    'ее', 'ие', 'ые', 'ое', 'ими', 'ыми', 'ей', 'ий', 'ый', 'ой', 'ем', 'им', 'ым', 'ом',
+    'его', 'ого', 'ему', 'ому', 'их', 'ых', 'ую', 'юю', 'ая', 'яя', 'ою', 'ею'
+)
+_PARTICIPLE_1 = ('ем', 'нн', 'вш', 'ющ', 'щ')
+_PARTICIPLE_2 = ('ивш', 'ывш', 'ующ')
+_VERB_1 = (
+    'ла', 'на', 'ете', 'йте', 'ли', 'й', 'л', 'ем', 'н', 'ло', 'но', 'ет', 'ют', 'ны',
+    'ть', 'ешь', 'нно'
+)
+_VERB_2 = (
+    'ила', 'ыла', 'ена', 'ейте', 'уйте', 'ите', 'или', 'ыли', 'ей', 'уй', 'ил', 'ыл', 'им',
+    'ым', 'ен', 'ило', 'ыло', 'ено', 'ят', 'ует', 'уют', 'ит', 'ыт', 'ены', 'ить', 'ыть',
+    'ишь', 'ую', 'ю'
+)
+_NOUN = (
+    'а', 'ев', 'ов', 'ие', 'ье', 'е', 'иями', 'ями', 'ами', 'еи', 'ии', 'и', 'ией', 'ей',
+    'ой', 'ий', 'й', 'иям', 'ям', 'ием', 'ем', 'ам', 'ом', 'о', 'у', 'ах', 'иях', 'ях',
+    'ы', 'ь', 'ию', 'ью', 'ю', 'ия', 'ья', 'я'
+)
+_SUPERLATIVE = ('ейш', 'ейше')
+_DERIVATIONAL = ('ост', 'ость')
+
+
+def _regions(word: str) -> Tuple[int, int]:
+    """Начала областей RV и R2"""
+    length = len(word)
+
+    rv = length
+    for i, char in enumerate(word):
+        if char in VOWELS:
+            rv = i + 1
+            break
+
+    r1 = length
+    for i in range(1, length):
+        if word[i - 1] in VOWELS and word[i] not in VOWELS:
+            r1 = i + 1
+            break
+
+    r2 = length
+    for i in range(r1 + 1, length):
+        if word[i - 1] in VOWELS and word[i] not in VOWELS:
+            r2 = i + 1
+            break
+
+    return rv, r2
+
+
+def _strip(word: str, limit: int, endings: Tuple[str, ...],
+           after_a: Tuple[str, ...] = ()) -> Optional[str]:
+    """Удаление самого длинного окончания в области [limit:].
+
+    Окончания из after_a удаляются только после "а"/"я".
+    Как в Snowball, если самое длинное окончание не подошло, короче не ищем.
+    """
+    best = ''
+    for ending in endings + after_a:
+        if len(ending) > len(best) and word.endswith(ending) and len(word) - len(ending) >= limit:
+            best = ending
+
+    if not best:
+        return None
+
+    stem = word[:-len(best)]
+    if best in after_a and best not in endings:
+        if len(stem) - 1 < limit or stem[-1] not in 'ая':
+            return None
+
+    return stem
+
+
+def _step1(word: str, rv: int) -> str:
+    stem = _strip(word, rv, _PERFECTIVE_GERUND_2, _PERFECTIVE_GERUND_1)
+    if stem is not None:
+        return stem
+
+    stem = _strip(word, rv, _REFLEXIVE)
+    if stem is not None:
+        word = stem
+
+    stem = _strip(word, rv, _ADJECTIVE)
+    if stem is not None:
+        participle = _strip(stem, rv, _PARTICIPLE_2, _PARTICIPLE_1)
+        return participle if participle is not None else stem
+
+    for endings, after_a in ((_VERB_2, _VERB_1), (_NOUN, ())):
+        stem = _strip(word, rv, endings, after_a)
+        if stem is not None:
+            return stem
+
+    return word
+
+
+@lru_cache(maxsize=65536)
+def stem(word: str) -> str:
+    """Основа русского слова"""
+    word = word.lower().replace('ё', 'е')
+    rv, r2 = _regions(word)
+    if rv >= len(word):
+        return word
+
+    word = _step1(word, rv)
+
+    # Шаг 2: окончание "и"
+    if word.endswith('и') and len(word) - 1 >= rv:
+        word = word[:-1]
+
+    # Шаг 3: словообразующие суффиксы в R2
+    stem_r2 = _strip(word, r2, _DERIVATIONAL)
+    if stem_r2 is not None:
+        word = stem_r2
+
+    # Шаг 4: "нн" -> "н", превосходная степень, мягкий знак
+    if word.endswith('нн') and len(word) - 2 >= rv:
+        return word[:-1]
+
+    superlative = _strip(word, rv, _SUPERLATIVE)
+    if superlative is not None:
+        word = superlative
+        if word.endswith('нн') and len(word) - 2 >= rv:
+            word = word[:-1]
+        return word
+
+    if word.endswith('ь') and len(word) - 1 >= rv:
+        word = word[:-1]
+
+    return word
+
+
+def tokenize(text: str) -> List[str]:
+    """Разбиение текста на слова в нижнем регистре"""
+    return TOKEN_RE.findall(text.lower().replace('ё', 'е'))
+
+
+def stem_tokens(text: str) -> List[str]:
+    """Основы всех слов текста"""
+    return [stem(token) for token in tokenize(text)]
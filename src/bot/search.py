@@ -0,0 +1,132 @@
+import heapq
+import math
+from typing import Dict, List, Optional, Tuple
+
+from src.parsers.models import Block, Course, Program, SubBlock
+
+from .russian import stem_tokens
+
+# Полнотекстовый поиск курсов по всем программам.
+# Документ - курс учебного плана вместе с блоком, подблоком и программой.
+# Инвертированный индекс (основа слова -> документы) строится один раз
+# при загрузке снимка, запрос проходит только по спискам своих основ.
+
+# Вес основы в зависимости от поля, где она встретилась
+FIELD_WEIGHTS = (
+    ('course', 3.0),
+    ('sub_block', 1.0),
+    ('block', 1.0),
+    ('program', 0.5),
+)
+
+DEFAULT_LIMIT = 10
+
+
+class SearchHit:
+    """Найденный курс"""
+    __slots__ = ('program_id', 'program_title', 'block', 'sub_block', 'course', 'score')
+
+    def __init__(self, program_id: str, program_title: str, block: Block,
+                 sub_block: SubBlock, course: Course, score: float = 0.0):
+        self.program_id = program_id
+        self.program_title = program_title
+        self.block = block
+        self.sub_block = sub_block
+        self.course = course
+        self.score = score
+
+
+class SearchResult:
+    """Лучшие совпадения и общее число найденных курсов"""
+    __slots__ = ('hits', 'total')
+
+    def __init__(self, hits: List[SearchHit], total: int):
+        self.hits = hits
+        self.total = total
+
+
+class CourseSearchIndex:
+    """Инвертированный индекс курсов с русским стеммингом"""
+
+    def __init__(self, programs: Dict[str, Program]):
+        self.documents: List[SearchHit] = []
+        self._postings: Dict[str, Dict[int, float]] = {}
+
+        for program_id, program in programs.items():
+            curriculum = program.curriculum_data
+            if not curriculum:
+                continue
+
+            program_stems = set(stem_tokens(program.title))
+            for block, sub_block, course in curriculum.iter_courses():
+                doc_id = len(self.documents)
+                self.documents.append(SearchHit(program_id, program.title, block, sub_block, course))
+
+                fields = {
+                    'course': stem_tokens(course.name),
+                    'sub_block': stem_tokens(sub_block.name),
+                    'block': stem_tokens(block.name),
+                    'program': program_stems,
+                }
+                for field_name, weight in FIELD_WEIGHTS:
+                    for token in fields[field_name]:
+                        postings = self._postings.setdefault(token, {})
+                        # Основа учитывается один раз - с весом самого важного поля
+                        if postings.get(doc_id, 0.0) < weight:
+                            postings[doc_id] = weight
+
+        # Редкие основы важнее частых (idf)
+        total = len(self.documents)
+        self._idf: Dict[str, float] = {
+            token: math.log(1 + total / len(postings))
+            for token, postings in self._postings.items()
+        }
+
+    def __len__(self) -> int:
+        return len(self.documents)
+
+    def search(self, query: str, limit: int = DEFAULT_LIMIT) -> SearchResult:
+        """Курсы, подходящие под запрос, от лучших к худшим.
+
+        Показываются курсы с наибольшим числом совпавших слов запроса,
+        упорядоченные по весу совпадений и семестру.
+        """
+        tokens = list(dict.fromkeys(stem_tokens(query)))
+        # Однобуквенные слова ("a", "и") учитываются, только если других нет
+        tokens = [token for token in tokens if len(token) > 1] or tokens
+        if not tokens:
+            return SearchResult([], 0)
+
+        scores: Dict[int, float] = {}
+        matched: Dict[int, int] = {}
+        for token in tokens:
+            postings = self._postings.get(token)
+            if not postings:
+                continue
+            idf = self._idf[token]
+            for doc_id, weight in postings.items():
+                scores[doc_id] = scores.get(doc_id, 0.0) + weight * idf
+                matched[doc_id] = matched.get(doc_id, 0) + 1
+
+        if not scores:
+            return SearchResult([], 0)
+
+        # Если есть курсы со всеми словами запроса, частичные совпадения не показываем
+        best_matched = max(matched.values())
+        candidates = [doc_id for doc_id, count in matched.items() if count == best_matched]
+
+        top = heapq.nsmallest(limit, candidates, key=lambda doc_id: self._rank(doc_id, scores[doc_id]))
+
+        hits = []
+        for doc_id in top:
+            document = self.documents[doc_id]
+            hits.append(SearchHit(
+                document.program_id, document.program_title, document.block,
+                document.sub_block, document.course, scores[doc_id]
+            ))
+
+        return SearchResult(hits, len(candidates))
+
+    def _rank(self, doc_id: int, score: float) -> Tuple[float, int, int]:
+        semester: Optional[int] = self.documents[doc_id].course.semester
+        return -score, semester if semester is not None else 99, doc_id
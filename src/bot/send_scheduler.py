@@ -0,0 +1,212 @@
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from aiogram import Bot
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware, NextRequestMiddlewareType
+from aiogram.exceptions import TelegramRetryAfter
+from aiogram.methods import Response, TelegramMethod
+from aiogram.methods.base import TelegramType
+
+logger = logging.getLogger(__name__)
+
+# Планировщик исходящих сообщений.
+# Все запросы к Bot API, отправляющие или изменяющие сообщения, проходят
+# через два ведра токенов: общее на бота (~30 сообщений в секунду) и свое
+# у каждого чата (1 в секунду в личке, 20 в минуту в группах). Пока токена
+# нет, запрос ждет; ответы на действия пользователя получают токены раньше
+# массовых рассылок. На RetryAfter чат ставится на паузу на указанное
+# Telegram время, и запрос повторяется - сообщение не теряется.
+
+# Приоритеты: меньше - раньше
+INTERACTIVE = 0
+BULK = 1
+
+# Общий лимит бота (сообщений в секунду); всплеск мал, чтобы в любую секунду не выйти за лимит
+GLOBAL_RATE = 30.0
+GLOBAL_BURST = 3
+
+# Лимиты одного чата: личные чаты и группы (chat_id < 0)
+PRIVATE_RATE = 1.0
+GROUP_RATE = 20 / 60
+CHAT_BURST = 3
+
+# Сколько раз повторять запрос после RetryAfter
+MAX_RETRIES = 5
+
+# Ведра чатов, не использовавшиеся столько секунд, удаляются
+IDLE_BUCKET_TTL = 300.0
+
+# Методы, на которые распространяются лимиты Telegram
+LIMITED_PREFIXES = ('send', 'copy', 'forward', 'edit')
+UNLIMITED_METHODS = frozenset({'sendChatAction'})
+
+_priority: ContextVar[int] = ContextVar('send_priority', default=INTERACTIVE)
+
+
+@contextmanager
+def bulk_sends() -> Iterator[None]:
+    """Отправки внутри блока идут с низким приоритетом (рассылки)"""
+    token = _priority.set(BULK)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+class TokenBucket:
+    """Ведро токенов с резервированием: токен берется сразу, даже в долг"""
+    __slots__ = ('rate', 'capacity', 'tokens', 'updated')
+
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self) -> float:
+        """Через сколько секунд появится токен"""
+        self._refill(time.monotonic())
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+    def reserve(self) -> float:
+        """Взять токен; возвращает, сколько ждать до его появления"""
+        wait = self.wait_time()
+        self.tokens -= 1
+        return wait
+
+    def pause(self, seconds: float) -> None:
+        """Не выдавать токены ближайшие seconds секунд"""
+        self._refill(time.monotonic())
+        self.tokens = min(self.tokens, 0.0) - seconds * self.rate
+
+
+class PriorityLimiter:
+    """Общее ведро бота: ожидающие получают токены в порядке приоритета"""
+
+    def __init__(self, rate: float, capacity: int):
+        self.bucket = TokenBucket(rate, capacity)
+        self._waiters: List[Tuple[int, int, asyncio.Future]] = []
+        self._sequence = itertools.count()
+        self._pump: Optional[asyncio.Task] = None
+
+    @property
+    def waiting(self) -> int:
+        return len(self._waiters)
+
+    async def acquire(self, priority: int) -> None:
+        if not self._waiters and self.bucket.wait_time() == 0:
+            self.bucket.reserve()
+            return
+
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._sequence), future))
+        if self._pump is None or self._pump.done():
+            self._pump = asyncio.create_task(self._release_waiters())
+        await future
+
+    async def _release_waiters(self) -> None:
+        while self._waiters:
+            wait = self.bucket.wait_time()
+            if wait > 0:
+                await asyncio.sleep(wait)
+                continue
+            _, _, future = heapq.heappop(self._waiters)
+            # Токен не тратится на запрос, который уже отменен
+            if not future.done():
+                self.bucket.reserve()
+                future.set_result(None)
+
+    def close(self) -> None:
+        if self._pump is not None:
+            self._pump.cancel()
+
+
+class _ChatLimit:
+    __slots__ = ('bucket', 'lock', 'used')
+
+    def __init__(self, rate: float):
+        self.bucket = TokenBucket(rate, CHAT_BURST)
+        # Сообщения чата уходят строго по очереди, в том числе при повторах
+        self.lock = asyncio.Lock()
+        self.used = time.monotonic()
+
+
+class SendScheduler(BaseRequestMiddleware):
+    """Middleware сессии бота: лимиты Telegram, приоритеты и повтор после RetryAfter"""
+
+    def __init__(self, global_rate: float = GLOBAL_RATE, max_retries: int = MAX_RETRIES):
+        self.limiter = PriorityLimiter(global_rate, max(1, min(GLOBAL_BURST, int(global_rate))))
+        self.max_retries = max_retries
+        self._chats: Dict[int, _ChatLimit] = {}
+        self._last_cleanup = time.monotonic()
+
+    @property
+    def waiting(self) -> int:
+        """Число запросов, ожидающих общий лимит"""
+        return self.limiter.waiting
+
+    def _chat(self, chat_id: int) -> _ChatLimit:
+        now = time.monotonic()
+        if now - self._last_cleanup > IDLE_BUCKET_TTL:
+            self._last_cleanup = now
+            for key, chat in list(self._chats.items()):
+                if now - chat.used > IDLE_BUCKET_TTL and not chat.lock.locked():
+                    del self._chats[key]
+
+        chat = self._chats.get(chat_id)
+        if chat is None:
+            chat = self._chats[chat_id] = _ChatLimit(GROUP_RATE if chat_id < 0 else PRIVATE_RATE)
+        chat.used = now
+        return chat
+
+    async def __call__(
+        self,
+        make_request: NextRequestMiddlewareType[TelegramType],
+        bot: Bot,
+        method: TelegramMethod[TelegramType],
+    ) -> Response[TelegramType]:
+        chat_id = getattr(method, 'chat_id', None)
+        api_method = method.__api_method__
+        if (not isinstance(chat_id, int) or api_method in UNLIMITED_METHODS
+                or not api_method.startswith(LIMITED_PREFIXES)):
+            return await self._request(make_request, bot, method, None)
+
+        chat = self._chat(chat_id)
+        async with chat.lock:
+            await asyncio.sleep(chat.bucket.reserve())
+            await self.limiter.acquire(_priority.get())
+            return await self._request(make_request, bot, method, chat)
+
+    async def _request(self, make_request: NextRequestMiddlewareType[TelegramType], bot: Bot,
+                       method: TelegramMethod[TelegramType],
+                       chat: Optional[_ChatLimit]) -> Response[TelegramType]:
+        attempt = 0
+        while True:
+            try:
+                return await make_request(bot, method)
+            except TelegramRetryAfter as e:
+                if attempt >= self.max_retries:
+                    raise
+                attempt += 1
+                logger.warning(
+                    f"Flood control на {method.__api_method__} (чат {getattr(method, 'chat_id', None)}), "
+                    f"повтор через {e.retry_after} с"
+                )
+                if chat is not None:
+                    chat.bucket.pause(e.retry_after)
+                await asyncio.sleep(e.retry_after)
+                if chat is not None:
+                    await self.limiter.acquire(_priority.get())
+
+    def close(self) -> None:
+        self.limiter.close()
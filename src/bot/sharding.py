@@ -0,0 +1,298 @@
+import asyncio
+import logging
+import multiprocessing
+import queue
+import secrets
+import signal
+import struct
+import zlib
+from typing import Any, Dict, List, Optional
+
+from aiogram import Bot
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.client.telegram import TelegramAPIServer
+from aiogram.methods import TelegramMethod
+from aiohttp import web
+
+from config.bot_config import METRICS_PORT, TELEGRAM_API_URL
+from src.bot.telegram_bot import ITMOBot
+
+logger = logging.getLogger(__name__)
+
+# Запуск бота в нескольких процессах.
+# Один процесс (ingress) получает обновления от Telegram (long polling или
+# webhook) и раскладывает их по очередям рабочих процессов по хэшу chat_id.
+# Каждый рабочий процесс - полноценный ITMOBot со своей копией снимка данных.
+# Все обновления одного чата попадают в один процесс и там обрабатываются
+# строго по очереди, разные чаты - параллельно.
+
+# Размер очереди рабочего процесса; при заполнении ingress ждет
+QUEUE_SIZE = 1000
+
+# Сколько обновлений одного процесса обрабатывается одновременно
+WORKER_CONCURRENCY = 64
+
+# Сколько полученных из очереди обновлений процесс держит у себя (в обработке и
+# в ожидании предыдущих обновлений своего чата); при заполнении чтение очереди ждет
+WORKER_BACKLOG = QUEUE_SIZE
+
+# Сколько секунд ждать рабочие процессы при остановке
+STOP_TIMEOUT = 30.0
+
+POLLING_TIMEOUT = 30
+
+
+def update_chat_id(update: Dict[str, Any]) -> int:
+    """Чат, к которому относится обновление (для inline-запросов - пользователь)"""
+    for key, event in update.items():
+        if key == 'update_id' or not isinstance(event, dict):
+            continue
+        chat = event.get('chat') or (event.get('message') or {}).get('chat')
+        if chat:
+            return chat['id']
+        user = event.get('from') or event.get('user')
+        if user:
+            return user['id']
+    return 0
+
+
+def shard_for(chat_id: int, shards: int) -> int:
+    """Номер рабочего процесса для чата (стабилен между запусками)"""
+    return zlib.crc32(struct.pack('<q', chat_id)) % shards
+
+
+def _create_bot(token: str) -> Bot:
+    session = AiohttpSession(api=TelegramAPIServer.from_base(TELEGRAM_API_URL)) if TELEGRAM_API_URL else None
+    return Bot(token=token, session=session)
+
+
+# --- Рабочий процесс ---
+
+class ShardWorker:
+    """Обработка обновлений своей доли чатов"""
+
+    def __init__(self, index: int, shards: int, token: str, updates: multiprocessing.Queue):
+        self.index = index
+        self.shards = shards
+        self.updates = updates
+        # У каждого процесса свой сервер метрик; уведомления подписчикам процесс
+        # рассылает только своим чатам - с тем же порядком и лимитами, что и ответы
+        self.bot = ITMOBot(token, metrics_port=METRICS_PORT + index if METRICS_PORT else 0,
+                           owns_chat=self.owns_chat)
+        self._slots = asyncio.Semaphore(WORKER_CONCURRENCY)
+        self._backlog = asyncio.Semaphore(WORKER_BACKLOG)
+        self._chains: Dict[int, asyncio.Task] = {}
+
+    async def run(self):
+        dp = self.bot.dp
+        await dp.emit_startup(bot=self.bot.bot, dispatcher=dp, **dp.workflow_data)
+        logger.info(f"Рабочий процесс {self.index} запущен")
+
+        try:
+            while True:
+                batch = await asyncio.to_thread(self._next_batch)
+                stop = False
+                for update in batch:
+                    if update is None:
+                        stop = True
+                        break
+                    await self._backlog.acquire()
+                    self._schedule(update)
+                if stop:
+                    break
+        finally:
+            if self._chains:
+                await asyncio.wait(set(self._chains.values()), timeout=STOP_TIMEOUT)
+            await dp.emit_shutdown(bot=self.bot.bot, dispatcher=dp, **dp.workflow_data)
+            await self.bot.stop()
+            logger.info(f"Рабочий процесс {self.index} остановлен")
+
+    def owns_chat(self, chat_id: int) -> bool:
+        return shard_for(chat_id, self.shards) == self.index
+
+    def _next_batch(self) -> List[Optional[Dict[str, Any]]]:
+        """Первое обновление - с ожиданием, остальные накопившиеся - без"""
+        batch = [self.updates.get()]
+        while len(batch) < WORKER_CONCURRENCY:
+            try:
+                batch.append(self.updates.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _schedule(self, update: Dict[str, Any]):
+        # Обновление чата ждет завершения предыдущего обновления того же чата
+        chat_id = update_chat_id(update)
+        previous = self._chains.get(chat_id)
+        task = asyncio.create_task(self._process(update, previous))
+        self._chains[chat_id] = task
+        task.add_done_callback(lambda done: self._release(chat_id, done))
+
+    def _release(self, chat_id: int, task: asyncio.Task):
+        self._backlog.release()
+        if self._chains.get(chat_id) is task:
+            del self._chains[chat_id]
+
+    async def _process(self, update: Dict[str, Any], previous: Optional[asyncio.Task]):
+        if previous is not None:
+            await asyncio.wait([previous])
+
+        # Слот занимается только на время обработки: обновления, ждущие свой чат,
+        # не отнимают слоты у других чатов
+        async with self._slots:
+            try:
+                result = await self.bot.dp.feed_raw_update(self.bot.bot, update)
+                if isinstance(result, TelegramMethod):
+                    await self.bot.dp.silent_call_request(bot=self.bot.bot, result=result)
+            except Exception:
+                logger.exception(f"Ошибка обработки обновления {update.get('update_id')}")
+
+
+def _worker_main(index: int, shards: int, token: str, updates: multiprocessing.Queue):
+    """Точка входа рабочего процесса"""
+    # Сигналы остановки получает вся группа процессов, а останавливает рабочие
+    # процессы ingress - после того как перестанет принимать обновления
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, signal.SIG_IGN)
+    worker = ShardWorker(index, shards, token, updates)
+    asyncio.run(worker.run())
+
+
+# --- Ingress ---
+
+class ShardedRuntime:
+    """Ingress и рабочие процессы бота"""
+
+    def __init__(self, token: str, workers: int):
+        self.token = token
+        self.workers = workers
+        self._context = multiprocessing.get_context('spawn')
+        self._queues = [self._context.Queue(QUEUE_SIZE) for _ in range(workers)]
+        self._processes: List[Optional[multiprocessing.Process]] = [None] * workers
+        self._stop = asyncio.Event()
+
+    def _start_worker(self, index: int):
+        process = self._context.Process(
+            target=_worker_main,
+            args=(index, self.workers, self.token, self._queues[index]),
+            name=f"itmo-bot-worker-{index}",
+            daemon=True
+        )
+        process.start()
+        self._processes[index] = process
+
+    def _ensure_workers(self):
+        """Перезапуск упавших рабочих процессов.
+
+        Обновления, еще лежащие в очереди, получит новый процесс. Обновления,
+        которые упавший процесс уже забрал из очереди, но не обработал,
+        теряются: они были только в его памяти.
+        """
+        for index, process in enumerate(self._processes):
+            if process is not None and not process.is_alive():
+                logger.error(f"Рабочий процесс {index} завершился (код {process.exitcode}), перезапускаем; "
+                             f"обновления, которые он успел забрать из очереди, потеряны")
+                self._start_worker(index)
+
+    async def route(self, update: Dict[str, Any]):
+        """Передача обновления рабочему процессу его чата"""
+        updates = self._queues[shard_for(update_chat_id(update), self.workers)]
+        try:
+            updates.put_nowait(update)
+        except queue.Full:
+            await asyncio.to_thread(updates.put, update)
+
+    def _install_signal_handlers(self):
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            try:
+                loop.add_signal_handler(sig, self._stop.set)
+            except NotImplementedError:
+                pass
+
+    async def _stop_workers(self):
+        for updates in self._queues:
+            await asyncio.to_thread(updates.put, None)
+        for index, process in enumerate(self._processes):
+            if process is None:
+                continue
+            await asyncio.to_thread(process.join, STOP_TIMEOUT)
+            if process.is_alive():
+                logger.warning(f"Рабочий процесс {index} не остановился, завершаем")
+                process.kill()
+
+    async def run_polling(self):
+        """Ingress через long polling"""
+        for index in range(self.workers):
+            self._start_worker(index)
+        self._install_signal_handlers()
+
+        bot = _create_bot(self.token)
+        offset = None
+        logger.info(f"Бот запущен (polling, рабочих процессов: {self.workers})!")
+
+        try:
+            await bot.delete_webhook()
+            while not self._stop.is_set():
+                self._ensure_workers()
+                polling = asyncio.create_task(bot.get_updates(offset=offset, timeout=POLLING_TIMEOUT))
+                stopping = asyncio.create_task(self._stop.wait())
+                await asyncio.wait({polling, stopping}, return_when=asyncio.FIRST_COMPLETED)
+                stopping.cancel()
+                if not polling.done():
+                    polling.cancel()
+                    break
+
+                try:
+                    updates = polling.result()
+                except Exception as e:
+                    logger.error(f"Ошибка получения обновлений: {e}")
+                    await asyncio.sleep(1)
+                    continue
+
+                for update in updates:
+                    await self.route(update.model_dump(mode='json', by_alias=True, exclude_none=True))
+                    offset = update.update_id + 1
+        finally:
+            await self._stop_workers()
+            await bot.session.close()
+
+    async def run_webhook(self, base_url: str, path: str, host: str, port: int,
+                          secret_token: Optional[str] = None):
+        """Ingress через webhook"""
+        for index in range(self.workers):
+            self._start_worker(index)
+        self._install_signal_handlers()
+
+        async def handle(request: web.Request) -> web.Response:
+            if secret_token and not secrets.compare_digest(
+                request.headers.get("X-Telegram-Bot-Api-Secret-Token", ""), secret_token
+            ):
+                return web.Response(body="Unauthorized", status=401)
+            if self._stop.is_set():
+                return web.Response(status=503)
+            await self.route(await request.json())
+            return web.json_response({})
+
+        app = web.Application()
+        app.router.add_post(path, handle)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, host, port)
+        await site.start()
+
+        bot = _create_bot(self.token)
+        try:
+            if base_url:
+                await bot.set_webhook(url=base_url.rstrip("/") + path, secret_token=secret_token or None)
+            logger.info(f"Бот запущен (webhook {host}:{port}{path}, рабочих процессов: {self.workers})!")
+            while not self._stop.is_set():
+                self._ensure_workers()
+                try:
+                    await asyncio.wait_for(self._stop.wait(), timeout=1)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            await runner.cleanup()
+            await self._stop_workers()
+            await bot.session.close()
@@ -0,0 +1,218 @@
+import random
+import zlib
+from typing import Dict, FrozenSet, List, Optional, Set, Tuple
+
+from src.parsers.models import Program
+from src.bot.fuzzy import trigrams
+from src.bot.russian import tokenize
+
+# Похожие курсы и программы без попарного сравнения названий.
+# Название курса раскладывается на триграммы (как в нечетком поиске), по
+# ним считается MinHash-подпись: для каждой из NUM_HASHES хэш-функций -
+# минимальный хэш триграммы. Доля совпавших позиций двух подписей - оценка
+# коэффициента Жаккара их множеств триграмм. Подпись режется на BANDS полос
+# по ROWS позиций (LSH): похожие названия почти наверняка совпадают хотя бы
+# в одной полосе и попадают в одну корзину, поэтому кандидаты в дубли -
+# только соседи по корзинам, а точная похожесть проверяется лишь для них.
+
+NUM_HASHES = 64
+BANDS = 16
+ROWS = NUM_HASHES // BANDS
+
+# Названия с похожестью (Жаккар по триграммам) не ниже порога считаются одним курсом.
+# При 16 полосах по 4 позиции пара с похожестью 0.7 попадает в общую корзину с вероятностью ~99%
+SIMILARITY_THRESHOLD = 0.7
+
+# Простое число больше 2^32 для хэш-функций (a * x + b) mod P
+_PRIME = 4294967311
+
+_SEED = 2024
+
+
+def _hash_functions() -> List[Tuple[int, int]]:
+    rng = random.Random(_SEED)
+    return [(rng.randrange(1, _PRIME), rng.randrange(0, _PRIME)) for _ in range(NUM_HASHES)]
+
+
+HASH_FUNCTIONS = _hash_functions()
+
+
+def shingles(name: str) -> FrozenSet[int]:
+    """Хэши триграмм названия (crc32 - одинаков во всех процессах)"""
+    return frozenset(zlib.crc32(gram.encode('utf-8')) for gram in trigrams(name))
+
+
+def hash_values(shingle: int) -> Tuple[int, ...]:
+    """Значения всех хэш-функций для одной триграммы"""
+    return tuple((a * shingle + b) % _PRIME for a, b in HASH_FUNCTIONS)
+
+
+def minhash(hashes: FrozenSet[int], cache: Dict[int, Tuple[int, ...]]) -> Tuple[int, ...]:
+    """MinHash-подпись: поэлементный минимум значений хэш-функций по триграммам.
+
+    Триграммы повторяются в разных названиях, поэтому их значения берутся из кэша.
+    """
+    if not hashes:
+        return (_PRIME,) * NUM_HASHES
+    rows = []
+    for shingle in hashes:
+        values = cache.get(shingle)
+        if values is None:
+            values = cache[shingle] = hash_values(shingle)
+        rows.append(values)
+    return tuple(map(min, *rows)) if len(rows) > 1 else rows[0]
+
+
+def jaccard(first: FrozenSet[int], second: FrozenSet[int]) -> float:
+    if not first or not second:
+        return 0.0
+    return len(first & second) / len(first | second)
+
+
+class _Course:
+    """Уникальное (после нормализации) название курса и программы, где оно есть"""
+    __slots__ = ('name', 'shingles', 'programs', 'neighbours')
+
+    def __init__(self, name: str, shingles_: FrozenSet[int]):
+        self.name = name
+        self.shingles = shingles_
+        self.programs: Dict[str, str] = {}
+        # Похожие названия: номер курса -> похожесть
+        self.neighbours: Dict[int, float] = {}
+
+
+class ProgramOverlap:
+    """Программа, похожая на данную по составу курсов.
+
+    exact - курсы с одинаковым (после нормализации) названием, столько же
+    показывает сравнение программ; similar - курсы, у которых в другой
+    программе есть только похожее название.
+    """
+    __slots__ = ('program_id', 'title', 'exact', 'similar', 'similarity')
+
+    def __init__(self, program_id: str, title: str, exact: int, similar: int, similarity: float):
+        self.program_id = program_id
+        self.title = title
+        self.exact = exact
+        self.similar = similar
+        self.similarity = similarity
+
+
+class SharedCourse:
+    """Курс программы и его совпадение в другой программе"""
+    __slots__ = ('name', 'other_name', 'similarity', 'exact')
+
+    def __init__(self, name: str, other_name: str, similarity: float, exact: bool):
+        self.name = name
+        self.other_name = other_name
+        self.similarity = similarity
+        self.exact = exact
+
+
+class CourseSimilarityIndex:
+    """MinHash/LSH-индекс названий курсов всех программ"""
+
+    def __init__(self, programs: Dict[str, Program]):
+        self.titles: Dict[str, str] = {program_id: program.title for program_id, program in programs.items()}
+        self._courses: List[_Course] = []
+        self._buckets: Dict[Tuple[int, Tuple[int, ...]], List[int]] = {}
+        self._hash_values: Dict[int, Tuple[int, ...]] = {}
+        # Курсы каждой программы (номера уникальных названий)
+        self._program_courses: Dict[str, List[int]] = {program_id: [] for program_id in programs}
+
+        ids: Dict[str, int] = {}
+        for program_id, program in programs.items():
+            if not program.curriculum_data:
+                continue
+            for _, _, course in program.curriculum_data.iter_courses():
+                key = ' '.join(tokenize(course.name))
+                course_id = ids.get(key)
+                if course_id is None:
+                    course_id = ids[key] = self._add(course.name)
+                entry = self._courses[course_id]
+                if program_id not in entry.programs:
+                    entry.programs[program_id] = course.name
+                    self._program_courses[program_id].append(course_id)
+
+        # Кандидаты в похожие - только пары из общих корзин
+        for members in self._buckets.values():
+            for i, first in enumerate(members):
+                for second in members[i + 1:]:
+                    if second in self._courses[first].neighbours:
+                        continue
+                    similarity = jaccard(self._courses[first].shingles, self._courses[second].shingles)
+                    if similarity >= SIMILARITY_THRESHOLD:
+                        self._courses[first].neighbours[second] = similarity
+                        self._courses[second].neighbours[first] = similarity
+
+        self._overlaps: Dict[str, List[ProgramOverlap]] = {
+            program_id: self._rank_programs(program_id) for program_id in programs
+        }
+
+    def _add(self, name: str) -> int:
+        course_id = len(self._courses)
+        course = _Course(name, shingles(name))
+        self._courses.append(course)
+        signature = minhash(course.shingles, self._hash_values)
+        for band in range(BANDS):
+            key = (band, signature[band * ROWS:(band + 1) * ROWS])
+            self._buckets.setdefault(key, []).append(course_id)
+        return course_id
+
+    def __len__(self) -> int:
+        return len(self._courses)
+
+    # --- Курсы ---
+
+    def _match(self, course_id: int, program_id: str, other_program: str) -> Optional[SharedCourse]:
+        """Совпадение курса в другой программе: тот же курс или самое похожее название"""
+        course = self._courses[course_id]
+        name = course.programs[program_id]
+        if other_program in course.programs:
+            return SharedCourse(name, course.programs[other_program], 1.0, True)
+        best: Optional[SharedCourse] = None
+        for neighbour_id, similarity in course.neighbours.items():
+            other_name = self._courses[neighbour_id].programs.get(other_program)
+            if other_name is not None and (best is None or similarity > best.similarity):
+                best = SharedCourse(name, other_name, similarity, False)
+        return best
+
+    def shared_courses(self, program_id: str, other_program: str) -> List[SharedCourse]:
+        """Курсы программы, которые есть (или почти такие же есть) в другой программе"""
+        shared = []
+        for course_id in self._program_courses.get(program_id, ()):
+            match = self._match(course_id, program_id, other_program)
+            if match is not None:
+                shared.append(match)
+        return shared
+
+    # --- Программы ---
+
+    def _rank_programs(self, program_id: str) -> List[ProgramOverlap]:
+        """Программы с общими курсами, от самых похожих.
+
+        Похожесть - доля курсов обеих программ, нашедших пару в другой программе.
+        Перебираются только программы, где есть тот же или похожий курс.
+        """
+        own = self._program_courses[program_id]
+        others: Set[str] = set()
+        for course_id in own:
+            course = self._courses[course_id]
+            others.update(course.programs)
+            for neighbour_id in course.neighbours:
+                others.update(self._courses[neighbour_id].programs)
+        others.discard(program_id)
+
+        overlaps = []
+        for other in others:
+            shared = self.shared_courses(program_id, other)
+            shared_back = len(self.shared_courses(other, program_id))
+            exact = sum(course.exact for course in shared)
+            total = len(own) + len(self._program_courses[other])
+            overlaps.append(ProgramOverlap(other, self.titles[other], exact, len(shared) - exact,
+                                           (len(shared) + shared_back) / total))
+        overlaps.sort(key=lambda overlap: (-overlap.similarity, overlap.title))
+        return overlaps
+
+    def similar_programs(self, program_id: str) -> List[ProgramOverlap]:
+        return self._overlaps.get(program_id, [])
@@ -0,0 +1,50 @@
+from typing import Any, Dict, List, Optional, Tuple
+
+from src.parsers.models import Program, programs_to_dict
+from src.parsers.snapshot_diff import HashNode, build_tree
+from src.bot.comparison import ProgramComparison
+from src.bot.curriculum_pages import CurriculumPages
+from src.bot.fuzzy import CourseTrigramIndex
+from src.bot.inline import InlineIndex
+from src.bot.retrieval import TfidfIndex
+from src.bot.search import CourseSearchIndex
+from src.bot.similarity import CourseSimilarityIndex
+from src.bot.views import RenderedViews
+
+# Версия снимка: путь, время изменения и размер файла
+DataVersion = Tuple[str, int, int]
+
+
+class BotSnapshot:
+    """Снимок данных вместе со всеми структурами, построенными по нему.
+
+    Строится целиком вне event loop и подменяется в боте одной ссылкой,
+    поэтому экраны, индексы и данные всегда относятся к одному снимку.
+    """
+    __slots__ = ('programs', 'version', 'tree', 'views', 'curriculum', 'search', 'course_names', 'passages', 'inline', 'comparison', 'similarity')
+
+    def __init__(self, programs: Dict[str, Program], version: Optional[DataVersion] = None):
+        self.programs = programs
+        self.version = version
+        # Дерево хэшей без значений: по нему видно, какие программы изменились,
+        # а копия снимка в виде словарей после построения не хранится
+        self.tree: HashNode = build_tree(programs_to_dict(programs), keep_values=False)
+        self.views = RenderedViews(programs)
+        self.curriculum = CurriculumPages(programs)
+        self.search = CourseSearchIndex(programs)
+        self.course_names = CourseTrigramIndex(programs)
+        self.passages = TfidfIndex(programs)
+        self.inline = InlineIndex(programs, self.views)
+        self.comparison = ProgramComparison(programs)
+        self.similarity = CourseSimilarityIndex(programs)
+
+    @property
+    def digest(self) -> str:
+        return self.tree.digest.hex()
+
+    def program_dicts(self, program_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Программы в формате JSON (только перечисленные, которые есть в снимке)"""
+        return {
+            program_id: self.programs[program_id].to_dict()
+            for program_id in program_ids if program_id in self.programs
+        }
@@ -0,0 +1,219 @@
+import asyncio
+import json
+import logging
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Set, Tuple
+
+from aiogram.exceptions import DataNotDictLikeError
+from aiogram.fsm.state import State
+from aiogram.fsm.storage.base import BaseStorage, DefaultKeyBuilder, KeyBuilder, StateType, StorageKey
+
+logger = logging.getLogger(__name__)
+
+# Хранилище состояний FSM в локальном SQLite.
+# Состояния переживают перезапуск бота и доступны нескольким процессам
+# (WAL: читатели не блокируют писателя). Запись идет пачками: изменения
+# сразу попадают в кэш процесса, а в базу сбрасываются одной транзакцией
+# раз в flush_interval. Кэш рассчитан на то, что один чат в каждый момент
+# обслуживает один процесс.
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS fsm (
+    key TEXT PRIMARY KEY,
+    state TEXT,
+    data TEXT NOT NULL,
+    updated_at REAL NOT NULL
+)
+"""
+
+# Сколько записей держать в кэше процесса
+DEFAULT_CACHE_SIZE = 10000
+
+# Как часто (секунды) сбрасывать изменения в базу
+DEFAULT_FLUSH_INTERVAL = 0.05
+
+
+class _Record:
+    __slots__ = ('state', 'data')
+
+    def __init__(self, state: Optional[str], data: Dict[str, Any]):
+        self.state = state
+        self.data = data
+
+
+class SQLiteStorage(BaseStorage):
+    """Хранилище FSM в SQLite с кэшем чтения и пакетной записью"""
+
+    def __init__(self, path: Path, key_builder: Optional[KeyBuilder] = None,
+                 cache_size: int = DEFAULT_CACHE_SIZE,
+                 flush_interval: float = DEFAULT_FLUSH_INTERVAL):
+        self.path = path
+        self.key_builder = key_builder or DefaultKeyBuilder(with_bot_id=True, with_destiny=True)
+        self.cache_size = cache_size
+        self.flush_interval = flush_interval
+
+        self._cache: 'OrderedDict[str, _Record]' = OrderedDict()
+        self._dirty: Set[str] = set()
+        self._flushing: Set[str] = set()
+        self._flush_task: Optional[asyncio.Task] = None
+        self._flush_lock = asyncio.Lock()
+
+        # Одно соединение на процесс; обращения из потоков пула сериализуются
+        self._db_lock = threading.Lock()
+        self._db = self._connect()
+
+    def _connect(self) -> sqlite3.Connection:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        db = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute("PRAGMA synchronous=NORMAL")
+        db.execute("PRAGMA busy_timeout=5000")
+        db.execute(SCHEMA)
+        return db
+
+    # --- База ---
+
+    def _read(self, key: str) -> _Record:
+        with self._db_lock:
+            row = self._db.execute("SELECT state, data FROM fsm WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return _Record(None, {})
+        return _Record(row[0], json.loads(row[1]))
+
+    def _write(self, records: Iterable[Tuple[str, Optional[_Record]]]) -> None:
+        """Запись пачки изменений одной транзакцией (None - удалить запись)"""
+        now = time.time()
+        upserts: List[Tuple[str, Optional[str], str, float]] = []
+        deletes: List[Tuple[str]] = []
+        for key, record in records:
+            if record is None or (record.state is None and not record.data):
+                deletes.append((key,))
+            else:
+                upserts.append((key, record.state, json.dumps(record.data, ensure_ascii=False), now))
+
+        with self._db_lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                if upserts:
+                    self._db.executemany(
+                        "INSERT INTO fsm (key, state, data, updated_at) VALUES (?, ?, ?, ?) "
+                        "ON CONFLICT(key) DO UPDATE SET state = excluded.state, "
+                        "data = excluded.data, updated_at = excluded.updated_at",
+                        upserts
+                    )
+                if deletes:
+                    self._db.executemany("DELETE FROM fsm WHERE key = ?", deletes)
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+
+    # --- Кэш ---
+
+    async def _get_record(self, key: StorageKey) -> Tuple[str, _Record]:
+        db_key = self.key_builder.build(key)
+        record = self._cache.get(db_key)
+        if record is not None:
+            self._cache.move_to_end(db_key)
+            return db_key, record
+
+        record = await asyncio.to_thread(self._read, db_key)
+        # Пока читали, запись могла появиться в кэше - она новее базы
+        cached = self._cache.get(db_key)
+        if cached is not None:
+            return db_key, cached
+
+        self._remember(db_key, record)
+        return db_key, record
+
+    def _remember(self, db_key: str, record: _Record) -> None:
+        self._cache[db_key] = record
+        self._cache.move_to_end(db_key)
+
+        # Вытесняются самые старые записи, уже сохраненные в базе
+        skipped = 0
+        while len(self._cache) > self.cache_size and skipped < len(self._cache):
+            old_key = next(iter(self._cache))
+            if old_key in self._dirty or old_key in self._flushing:
+                self._cache.move_to_end(old_key)
+                skipped += 1
+            else:
+                del self._cache[old_key]
+
+    def _mark_dirty(self, db_key: str) -> None:
+        self._dirty.add(db_key)
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self._flush_later())
+
+    async def _flush_later(self) -> None:
+        # Изменения, появившиеся во время записи, уходят следующей пачкой
+        while self._dirty:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"Ошибка записи состояний FSM в {self.path}: {e}")
+
+    async def flush(self) -> None:
+        """Сброс накопленных изменений в базу"""
+        async with self._flush_lock:
+            if not self._dirty:
+                return
+
+            keys = list(self._dirty)
+            self._dirty.clear()
+            self._flushing.update(keys)
+            # Снимок записей: изменения во время записи попадут в следующую пачку
+            batch = []
+            for key in keys:
+                record = self._cache.get(key)
+                batch.append((key, _Record(record.state, dict(record.data)) if record else None))
+
+            try:
+                await asyncio.to_thread(self._write, batch)
+            except BaseException:
+                self._dirty.update(keys)
+                raise
+            finally:
+                self._flushing.clear()
+
+    # --- BaseStorage ---
+
+    async def set_state(self, key: StorageKey, state: StateType = None) -> None:
+        db_key, record = await self._get_record(key)
+        record.state = state.state if isinstance(state, State) else state
+        self._remember(db_key, record)
+        self._mark_dirty(db_key)
+
+    async def get_state(self, key: StorageKey) -> Optional[str]:
+        _, record = await self._get_record(key)
+        return record.state
+
+    async def set_data(self, key: StorageKey, data: Mapping[str, Any]) -> None:
+        if not isinstance(data, dict):
+            raise DataNotDictLikeError(
+                f"Data must be a dict or dict-like object, got {type(data).__name__}"
+            )
+        db_key, record = await self._get_record(key)
+        record.data = data.copy()
+        self._remember(db_key, record)
+        self._mark_dirty(db_key)
+
+    async def get_data(self, key: StorageKey) -> Dict[str, Any]:
+        _, record = await self._get_record(key)
+        return record.data.copy()
+
+    async def close(self) -> None:
+        if self._flush_task is not None and not self._flush_task.done():
+            self._flush_task.cancel()
+            try:
+                await self._flush_task
+            except asyncio.CancelledError:
+                pass
+        await self.flush()
+        with self._db_lock:
+            self._db.close()
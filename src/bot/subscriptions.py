@@ -0,0 +1,472 @@
+import asyncio
+import json
+import logging
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from aiogram import Bot
+from aiogram.exceptions import TelegramBadRequest, TelegramForbiddenError
+
+from src.parsers.snapshot_diff import Change, Changeset, changed_programs, diff_snapshots
+from src.bot.send_scheduler import bulk_sends
+from src.bot.snapshot import BotSnapshot
+from src.bot.views import change_notification
+
+logger = logging.getLogger(__name__)
+
+# Подписки на изменения программ.
+# При появлении нового снимка бот сравнивает его с предыдущим (по деревьям
+# хэшей), и для каждой изменившейся программы одним INSERT ... SELECT
+# кладет уведомление каждому подписчику в таблицу outbox. Отдельная задача
+# разбирает outbox пачками и отправляет сообщения с низким приоритетом,
+# поэтому рассылка не мешает ответам пользователям и продолжается после
+# перезапуска. Несколько процессов бота работают с одной базой: снимок
+# публикуется ровно одним из них (сравнение с последним разосланным хэшем
+# в транзакции), а строки outbox процессы забирают себе на время отправки.
+# При шардировании по чатам процесс забирает только уведомления своих чатов,
+# чтобы они шли через его очередь отправки, как и ответы этим чатам.
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS subscriptions (
+    program_id TEXT NOT NULL,
+    chat_id INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    PRIMARY KEY (program_id, chat_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS subscriptions_chat ON subscriptions (chat_id);
+CREATE TABLE IF NOT EXISTS outbox (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    chat_id INTEGER NOT NULL,
+    text TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    claimed_until REAL NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS outbox_claim ON outbox (claimed_until, id);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+# Хэш последнего снимка, по которому разосланы уведомления
+NOTIFIED_DIGEST_KEY = 'notified_digest'
+
+# Сколько уведомлений забирать из outbox за раз
+DELIVERY_BATCH = 100
+
+# На сколько секунд строки outbox закрепляются за процессом (после падения их заберет другой)
+CLAIM_LEASE = 300.0
+
+# Как часто проверять outbox, если новых уведомлений не было
+POLL_INTERVAL = 5.0
+
+# Пауза после временной ошибки отправки
+RETRY_DELAY = 10.0
+
+# Ключ basic_info со стоимостью обучения
+COST_KEY = 'стоимость'
+
+PLACES_FIELDS = (
+    ('budget_places', 'бюджетных мест'),
+    ('target_places', 'целевых мест'),
+    ('contract_places', 'контрактных мест'),
+)
+
+# Сколько названий курсов перечислять в уведомлении
+MAX_LISTED_COURSES = 5
+
+
+# --- Описание изменений ---
+
+def _cost_changes(old: Dict[str, str], new: Dict[str, str]) -> List[str]:
+    lines = []
+    for key in dict.fromkeys([*old, *new]):
+        if COST_KEY in key.lower() and old.get(key) != new.get(key):
+            lines.append(f"{key.capitalize()}: {old.get(key) or '—'} → {new.get(key) or '—'}")
+    return lines
+
+
+def _places_changes(old: List[Dict[str, Any]], new: List[Dict[str, Any]]) -> List[str]:
+    old_by_code = {direction['code']: direction for direction in old}
+    new_by_code = {direction['code']: direction for direction in new}
+    lines = []
+
+    for code, direction in new_by_code.items():
+        previous = old_by_code.get(code)
+        if previous is None:
+            lines.append(f"Новое направление {code} {direction['name']}")
+            continue
+        for field_name, label in PLACES_FIELDS:
+            if previous[field_name] != direction[field_name]:
+                lines.append(f"Направление {code}: {label} {previous[field_name]} → {direction[field_name]}")
+
+    for code in old_by_code.keys() - new_by_code.keys():
+        lines.append(f"Направление {code} больше не набирает")
+
+    return lines
+
+
+def _web_data_changes(field_name: str, old: Any, new: Any) -> List[str]:
+    if field_name == 'basic_info':
+        return _cost_changes(old or {}, new or {})
+    if field_name == 'directions':
+        return _places_changes(old or [], new or [])
+    return []
+
+
+def _listed(names: List[str]) -> str:
+    shown = ', '.join(f"«{name}»" for name in names[:MAX_LISTED_COURSES])
+    rest = len(names) - MAX_LISTED_COURSES
+    return f"{shown} и еще {rest}" if rest > 0 else shown
+
+
+def describe_changes(changes: List[Change]) -> List[str]:
+    """Изменения программы, о которых стоит сообщить подписчикам:
+    стоимость, число мест и учебный план"""
+    lines: List[str] = []
+    curriculum_changed = False
+    courses: Dict[str, List[str]] = {'added': [], 'removed': [], 'modified': []}
+
+    for change in changes:
+        path = change.path
+        if len(path) == 1:
+            if change.kind == 'removed':
+                lines.append("Программа больше не публикуется на сайте")
+            continue
+
+        section = path[1]
+        if section == 'web_data':
+            if len(path) == 2:
+                # Раздел появился или пропал целиком - сравниваем поля
+                old, new = change.old or {}, change.new or {}
+                for field_name in ('basic_info', 'directions'):
+                    lines.extend(_web_data_changes(field_name, old.get(field_name), new.get(field_name)))
+            else:
+                lines.extend(_web_data_changes(path[2], change.old, change.new))
+        elif section == 'curriculum_data':
+            curriculum_changed = True
+            if change.level == 'course':
+                course = change.new if change.kind == 'added' else change.old
+                courses[change.kind].append(course['name'])
+
+    if curriculum_changed:
+        lines.append("Обновлен учебный план")
+        for kind, label in (('added', 'Новые курсы'), ('removed', 'Убраны курсы'), ('modified', 'Изменены курсы')):
+            names = list(dict.fromkeys(courses[kind]))
+            if names:
+                lines.append(f"{label}: {_listed(names)}")
+
+    return lines
+
+
+def _program_title(program_id: str, snapshot: BotSnapshot, changes: List[Change]) -> str:
+    program = snapshot.programs.get(program_id)
+    if program is not None:
+        return program.title
+    # Удаленная программа - название из старого значения
+    for change in changes:
+        if len(change.path) == 1 and isinstance(change.old, dict):
+            web_data = change.old.get('web_data') or {}
+            if web_data.get('program_title'):
+                return web_data['program_title']
+    return program_id
+
+
+def snapshot_changeset(old: BotSnapshot, new: BotSnapshot) -> Changeset:
+    """Изменения между снимками бота.
+
+    Деревья снимков хранят только хэши, поэтому по ним находятся изменившиеся
+    программы, а изменения со значениями считаются по словарям только этих программ.
+    """
+    program_ids = changed_programs(old.tree, new.tree)
+    detailed = diff_snapshots(old.program_dicts(program_ids), new.program_dicts(program_ids))
+    return Changeset(old.digest, new.digest, detailed.changes)
+
+
+def build_notifications(changeset: Changeset, snapshot: BotSnapshot) -> Dict[str, str]:
+    """Тексты уведомлений по программам (только программы с важными изменениями)"""
+    notifications = {}
+    for program_id in changeset.changed_programs:
+        changes = changeset.for_program(program_id)
+        lines = describe_changes(changes)
+        if lines:
+            notifications[program_id] = change_notification(_program_title(program_id, snapshot, changes), lines)
+    return notifications
+
+
+# --- Хранилище ---
+
+class SubscriptionStore:
+    """Подписки, очередь уведомлений и хэш последнего разосланного снимка (SQLite)"""
+
+    def __init__(self, path: Path, owns_chat: Optional[Callable[[int], bool]] = None):
+        self.path = path
+        # Чаты, уведомления которых забирает этот процесс (None - все)
+        self.owns_chat = owns_chat
+        self._lock = threading.Lock()
+        self._db = self._connect()
+
+    def _connect(self) -> sqlite3.Connection:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        db = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute("PRAGMA synchronous=NORMAL")
+        db.execute("PRAGMA busy_timeout=5000")
+        db.executescript(SCHEMA)
+        if self.owns_chat is not None:
+            owns_chat = self.owns_chat
+            db.create_function('owns_chat', 1, lambda chat_id: int(owns_chat(chat_id)), deterministic=True)
+        return db
+
+    def subscribe(self, chat_id: int, program_id: str) -> bool:
+        """Подписка; False - чат уже подписан"""
+        with self._lock:
+            cursor = self._db.execute(
+                "INSERT OR IGNORE INTO subscriptions (program_id, chat_id, created_at) VALUES (?, ?, ?)",
+                (program_id, chat_id, time.time())
+            )
+        return cursor.rowcount > 0
+
+    def unsubscribe(self, chat_id: int, program_id: str) -> bool:
+        """Отписка; False - чат не был подписан"""
+        with self._lock:
+            cursor = self._db.execute(
+                "DELETE FROM subscriptions WHERE program_id = ? AND chat_id = ?", (program_id, chat_id)
+            )
+        return cursor.rowcount > 0
+
+    def toggle(self, chat_id: int, program_id: str) -> bool:
+        """Переключение подписки; возвращает, подписан ли чат теперь"""
+        if self.unsubscribe(chat_id, program_id):
+            return False
+        self.subscribe(chat_id, program_id)
+        return True
+
+    def unsubscribe_all(self, chat_id: int) -> int:
+        """Отписка чата от всех программ; возвращает число снятых подписок"""
+        with self._lock:
+            cursor = self._db.execute("DELETE FROM subscriptions WHERE chat_id = ?", (chat_id,))
+        return cursor.rowcount
+
+    def subscriptions(self, chat_id: int) -> List[str]:
+        """Программы, на которые подписан чат"""
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT program_id FROM subscriptions WHERE chat_id = ? ORDER BY created_at", (chat_id,)
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def notified_digest(self) -> Optional[str]:
+        with self._lock:
+            row = self._db.execute("SELECT value FROM meta WHERE key = ?", (NOTIFIED_DIGEST_KEY,)).fetchone()
+        return row[0] if row else None
+
+    def publish(self, old_digest: Optional[str], new_digest: str, notifications: Dict[str, str]) -> Optional[int]:
+        """Постановка уведомлений в очередь всем подписчикам программ.
+
+        Выполняется, только если последний разосланный снимок - old_digest,
+        поэтому один переход между снимками публикуется ровно один раз.
+        Возвращает число уведомлений или None, если переход уже опубликован.
+        """
+        now = time.time()
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._db.execute("SELECT value FROM meta WHERE key = ?", (NOTIFIED_DIGEST_KEY,)).fetchone()
+                if (row[0] if row else None) != old_digest:
+                    self._db.execute("ROLLBACK")
+                    return None
+
+                self._db.execute(
+                    "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (NOTIFIED_DIGEST_KEY, new_digest)
+                )
+                queued = 0
+                for program_id, text in notifications.items():
+                    cursor = self._db.execute(
+                        "INSERT INTO outbox (chat_id, text, created_at) "
+                        "SELECT chat_id, ?, ? FROM subscriptions WHERE program_id = ?",
+                        (text, now, program_id)
+                    )
+                    queued += cursor.rowcount
+                self._db.execute("COMMIT")
+                return queued
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+
+    def claim(self, limit: int, lease: float) -> List[Tuple[int, int, str]]:
+        """Забрать пачку неотправленных уведомлений на время lease секунд"""
+        now = time.time()
+        owned = " AND owns_chat(chat_id)" if self.owns_chat is not None else ""
+        with self._lock:
+            rows = self._db.execute(
+                "UPDATE outbox SET claimed_until = ? WHERE id IN ("
+                f"SELECT id FROM outbox WHERE claimed_until < ?{owned} ORDER BY id LIMIT ?"
+                ") RETURNING id, chat_id, text",
+                (now + lease, now, limit)
+            ).fetchall()
+        return sorted(rows)
+
+    def complete(self, ids: List[int]) -> None:
+        """Удаление отправленных уведомлений"""
+        with self._lock:
+            self._db.executemany("DELETE FROM outbox WHERE id = ?", [(item_id,) for item_id in ids])
+
+    def release(self, ids: List[int]) -> None:
+        """Возврат уведомлений в очередь"""
+        with self._lock:
+            self._db.executemany("UPDATE outbox SET claimed_until = 0 WHERE id = ?", [(item_id,) for item_id in ids])
+
+    def pending(self) -> int:
+        """Число уведомлений в очереди"""
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM outbox").fetchone()[0]
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+
+# --- Рассылка ---
+
+class ChangeNotifier:
+    """Публикация изменений снимков и доставка уведомлений подписчикам"""
+
+    def __init__(self, bot: Bot, store: SubscriptionStore, changes_file: Path):
+        self.bot = bot
+        self.store = store
+        self.changes_file = changes_file
+        self._wake = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self, snapshot: BotSnapshot) -> None:
+        """Догоняем изменения, пропущенные пока бот не работал, и запускаем доставку"""
+        try:
+            await self._catch_up(snapshot)
+        except Exception as e:
+            logger.error(f"Ошибка проверки пропущенных изменений: {e}")
+        if self._task is None:
+            self._task = asyncio.create_task(self._deliver())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _catch_up(self, snapshot: BotSnapshot) -> None:
+        if not snapshot.programs:
+            return
+
+        notified = await asyncio.to_thread(self.store.notified_digest)
+        if notified == snapshot.digest:
+            return
+        if notified is None:
+            # Первый запуск: отсчет изменений начинается с текущего снимка
+            await asyncio.to_thread(self.store.publish, None, snapshot.digest, {})
+            return
+
+        # Парсер сохраняет diff с предыдущим снимком - подходит, если он связывает наши снимки
+        changeset = await asyncio.to_thread(self._load_changes_file)
+        if changeset is None or changeset.old_digest != notified or changeset.new_digest != snapshot.digest:
+            logger.warning("Снимок данных изменился, пока бот не работал, но diff недоступен - уведомления пропущены")
+            changeset = Changeset(notified, snapshot.digest)
+        await self._publish(changeset, snapshot)
+
+    def _load_changes_file(self) -> Optional[Changeset]:
+        try:
+            with open(self.changes_file, 'r', encoding='utf-8') as f:
+                return Changeset.from_dict(json.load(f))
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning(f"Не удалось прочитать {self.changes_file}: {e}")
+            return None
+
+    async def snapshot_changed(self, old: BotSnapshot, new: BotSnapshot) -> None:
+        """Уведомления об изменениях между снимками"""
+        if old.digest == new.digest:
+            return
+        if not old.programs:
+            # Бот запущен без данных: отсчет начинается с первого настоящего снимка, как при запуске
+            await self._catch_up(new)
+            return
+        changeset = await asyncio.to_thread(snapshot_changeset, old, new)
+        await self._publish(changeset, new)
+
+    async def _publish(self, changeset: Changeset, snapshot: BotSnapshot) -> None:
+        notifications = await asyncio.to_thread(build_notifications, changeset, snapshot)
+        queued = await asyncio.to_thread(
+            self.store.publish, changeset.old_digest, changeset.new_digest, notifications
+        )
+        if queued is None:
+            notified = await asyncio.to_thread(self.store.notified_digest)
+            if notified == changeset.new_digest:
+                # Переход уже опубликовал другой процесс
+                logger.debug(f"Изменения снимка {changeset.new_digest} уже опубликованы")
+            else:
+                logger.warning(f"Изменения снимка {changeset.new_digest} не опубликованы: последний разосланный "
+                               f"снимок {notified}, ожидался {changeset.old_digest}")
+            return
+
+        logger.info(f"Уведомлений об изменениях в очереди: {queued} (программы: {', '.join(notifications) or '-'})")
+        if queued:
+            self._wake.set()
+
+    async def _deliver(self) -> None:
+        """Разбор outbox пачками; рассылка идет с низким приоритетом"""
+        while True:
+            self._wake.clear()
+            try:
+                batch = await asyncio.to_thread(self.store.claim, DELIVERY_BATCH, CLAIM_LEASE)
+            except Exception as e:
+                logger.error(f"Ошибка чтения очереди уведомлений: {e}")
+                batch = []
+
+            if not batch:
+                try:
+                    await asyncio.wait_for(self._wake.wait(), timeout=POLL_INTERVAL)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            done: List[int] = []
+            failed: List[int] = []
+            try:
+                with bulk_sends():
+                    await asyncio.gather(*(self._send(item, done, failed) for item in batch))
+            finally:
+                # При остановке неотправленные уведомления сразу возвращаются в очередь
+                finished = set(done) | set(failed)
+                failed.extend(item_id for item_id, _, _ in batch if item_id not in finished)
+                await asyncio.to_thread(self._finish, done, failed)
+
+            if failed:
+                await asyncio.sleep(RETRY_DELAY)
+
+    def _finish(self, done: List[int], failed: List[int]) -> None:
+        if done:
+            self.store.complete(done)
+        if failed:
+            self.store.release(failed)
+
+    async def _send(self, item: Tuple[int, int, str], done: List[int], failed: List[int]) -> None:
+        item_id, chat_id, text = item
+        try:
+            await self.bot.send_message(chat_id, text, parse_mode="Markdown")
+        except TelegramForbiddenError:
+            # Пользователь заблокировал бота - подписки больше не нужны
+            await asyncio.to_thread(self.store.unsubscribe_all, chat_id)
+        except TelegramBadRequest as e:
+            logger.warning(f"Уведомление для чата {chat_id} не принято Telegram: {e}")
+        except Exception as e:
+            logger.warning(f"Не удалось отправить уведомление в чат {chat_id}: {e}")
+            failed.append(item_id)
+            return
+        done.append(item_id)
@@ -1,18 +1,50 @@
 # src/bot/telegram_bot.py
 
 import asyncio
-import json
 import logging
+import signal
 from pathlib import Path
-from typing import Dict, Any, Optional
+from typing import Callable, Dict, Any, List, Optional
 from datetime import datetime
 
 from aiogram import Bot, Dispatcher, F
-from aiogram.types import Message, InlineKeyboardMarkup, InlineKeyboardButton, CallbackQuery, FSInputFile
-from aiogram.filters import CommandStart, Command
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.client.telegram import TelegramAPIServer
+from aiogram.types import Message, CallbackQuery, FSInputFile, InlineQuery
+from aiogram.exceptions import TelegramBadRequest
+from aiogram.filters import CommandStart, Command, CommandObject
 from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import State, StatesGroup
 from aiogram.fsm.storage.memory import MemoryStorage
+from aiogram.webhook.aiohttp_server import setup_application
+from aiohttp import web
+
+from config.bot_config import (
+    BOT_WORKERS, DATA_RELOAD_INTERVAL, FSM_STORAGE, FSM_STORAGE_PATH, INLINE_CACHE_TIME, LOOP_LAG_THRESHOLD,
+    METRICS_HOST, METRICS_PORT, SEND_RATE_LIMIT, SUBSCRIPTIONS_PATH, TELEGRAM_API_URL
+)
+from src.parsers.data_manager import DataManager
+from src.parsers.models import Program
+from src.parsers.pdf_store import PDFStore
+from src.bot.comparison import (
+    CALLBACK_ALL, CALLBACK_SHOW, CALLBACK_TOGGLE, COMPARISON_AVAILABLE, MAX_SELECTED, result_keyboard,
+    selection_text
+)
+from src.bot.curriculum_pages import CALLBACK_PREFIX, CURRICULUM_UPDATED_TEXT, parse_callback
+from src.bot.file_id_cache import FileIdCache
+from src.bot.intents import IntentEngine
+from src.bot.loop_monitor import LoopLagMonitor
+from src.bot.metrics import BotMetrics, MetricsServer
+from src.bot.pdf_index import PDFIndex
+from src.bot.send_scheduler import SendScheduler
+from src.bot.sqlite_storage import SQLiteStorage
+from src.bot.subscriptions import ChangeNotifier, SubscriptionStore
+from src.bot.snapshot import BotSnapshot, DataVersion
+from src.bot.webhook import LimitedRequestHandler
+from src.bot.views import (
+    NOT_FOUND_TEXT, RenderedViews, SEARCH_USAGE_TEXT, fuzzy_course_results, retrieval_results, search_results,
+    shared_courses, shared_courses_keyboard, similar_programs, similar_programs_keyboard, subscriptions_list
+)
 
 # Настройка логирования
 logging.basicConfig(level=logging.INFO)
@@ -27,49 +59,199 @@ class BotStates(StatesGroup):
 class ITMOBot:
     """Telegram бот для консультаций по программам ИТМО"""
     
-    def __init__(self, token: str):
-        self.bot = Bot(token=token)
-        self.dp = Dispatcher(storage=MemoryStorage())
-        self.data = self._load_data()
+    def __init__(self, token: str, metrics_port: Optional[int] = None,
+                 owns_chat: Optional[Callable[[int], bool]] = None):
+        # Свой адрес Bot API - для локального сервера Bot API или заглушки в тестах
+        session = AiohttpSession(api=TelegramAPIServer.from_base(TELEGRAM_API_URL)) if TELEGRAM_API_URL else None
+        self.bot = Bot(token=token, session=session)
+        # Все исходящие сообщения идут через планировщик с лимитами Telegram
+        self.send_scheduler = SendScheduler(SEND_RATE_LIMIT / max(1, BOT_WORKERS))
+        self.bot.session.middleware(self.send_scheduler)
+        # Состояния диалогов в SQLite переживают перезапуск и горячую замену процессов
+        storage = SQLiteStorage(FSM_STORAGE_PATH) if FSM_STORAGE == 'sqlite' else MemoryStorage()
+        self.dp = Dispatcher(storage=storage)
+        
+        # Метрики обработчиков и запросов к Bot API (после планировщика - без времени ожидания в очереди)
+        self.metrics = BotMetrics()
+        self.metrics.install(self.dp, self.bot)
+        self.metrics.registry.gauge(
+            'itmo_bot_send_queue_waiting', 'Сообщения, ожидающие общий лимит отправки',
+            collect=lambda: self.send_scheduler.waiting
+        )
+        port = METRICS_PORT if metrics_port is None else metrics_port
+        self.metrics_server = MetricsServer(self.metrics.registry, METRICS_HOST, port) if port else None
+        # Поиск синхронных вызовов, блокирующих event loop
+        self.loop_monitor = LoopLagMonitor(self.dp, LOOP_LAG_THRESHOLD, self.metrics.registry)
+        
+        # Путь к данным
+        current_dir = Path(__file__).resolve()
+        self.project_root = current_dir.parent.parent.parent
+        self.data_manager = DataManager(self.project_root)
+        self.pdf_store = PDFStore(self.data_manager.pdf_dir)
+        # Наличие и хэши PDF в памяти: меню учебного плана не обращается к диску
+        self.pdf_index = PDFIndex(self.pdf_store)
+        self.pdf_index.refresh_if_changed()
+        
+        # file_id отправленных PDF (привязаны к боту, поэтому файл по id бота)
+        self.file_ids = FileIdCache(self.project_root / "data" / f"telegram_file_ids_{self.bot.id}.json")
+        
+        # Словарь интентов для ответов на вопросы (перечитывается при изменении)
+        self.intents = IntentEngine(self.project_root / "config" / "intents.json")
+        
+        # Подписки на изменения программ и рассылка уведомлений
+        # (в рабочем процессе шардированного запуска - только уведомления своих чатов)
+        self.subscriptions = SubscriptionStore(SUBSCRIPTIONS_PATH, owns_chat)
+        self.notifier = ChangeNotifier(
+            self.bot, self.subscriptions, self.data_manager.output_dir / "latest_changes.json"
+        )
+        
+        # Снимок данных с отрисованными экранами и индексами
+        self.snapshot = BotSnapshot({})
+        self._failed_version: Optional[DataVersion] = None
+        self._reload_task: Optional[asyncio.Task] = None
+        
+        version = self._get_data_version()
+        self._set_data(BotSnapshot(self._load_data(version), version))
         self._register_handlers()
     
-    def _load_data(self) -> Dict[str, Any]:
+    @property
+    def data(self) -> Dict[str, Program]:
+        return self.snapshot.programs
+    
+    @property
+    def views(self) -> RenderedViews:
+        return self.snapshot.views
+    
+    @property
+    def data_version(self) -> Optional[DataVersion]:
+        return self.snapshot.version
+    
+    def _get_data_version(self) -> Optional[DataVersion]:
+        """Версия снимка: путь, время изменения и размер файла"""
+        data_file = self.data_manager.find_latest_file()
+        if data_file is None:
+            return None
+        
+        try:
+            stat = data_file.stat()
+        except FileNotFoundError:
+            return None
+        
+        return str(data_file), stat.st_mtime_ns, stat.st_size
+    
+    def _load_data(self, version: Optional[DataVersion]) -> Dict[str, Program]:
         """Загрузка данных программ"""
         try:
-            # Путь к данным
-            current_dir = Path(__file__).resolve()
-            self.project_root = current_dir.parent.parent.parent
-            data_file = self.project_root / "data" / "parsed" / "latest_complete.json"
-            
-            if data_file.exists():
-                with open(data_file, 'r', encoding='utf-8') as f:
-                    return json.load(f)
+            if version is not None:
+                # Схема проверяется при загрузке, обработчики работают с валидными моделями
+                return self.data_manager.load_snapshot(Path(version[0]))
             else:
-                logger.error(f"Файл данных не найден: {data_file}")
+                logger.error(f"Файл данных не найден в {self.data_manager.output_dir}")
                 return {}
         except Exception as e:
             logger.error(f"Ошибка загрузки данных: {e}")
             return {}
     
+    def _set_data(self, snapshot: BotSnapshot):
+        """Атомарная замена данных бота.
+        
+        Вызывается только из потока event loop, поэтому обработчики видят
+        либо старый, либо новый снимок целиком вместе с экранами и индексами.
+        """
+        self.snapshot = snapshot
+    
+    async def reload_data(self) -> bool:
+        """Загрузка нового снимка вне event loop, если он изменился"""
+        version = await asyncio.to_thread(self._get_data_version)
+        if version is None or version == self.data_version or version == self._failed_version:
+            return False
+        
+        try:
+            data = await asyncio.to_thread(self.data_manager.load_snapshot, Path(version[0]))
+            snapshot = await asyncio.to_thread(BotSnapshot, data, version)
+        except Exception as e:
+            # Битый снимок не заменяет рабочие данные и не перечитывается до следующего изменения
+            self._failed_version = version
+            logger.error(f"Новый снимок данных не загружен, продолжаем со старым: {e}")
+            return False
+        
+        previous = self.snapshot
+        self._set_data(snapshot)
+        logger.info(f"Данные обновлены: {version[0]} ({len(data)} программ)")
+        
+        try:
+            await self.notifier.snapshot_changed(previous, snapshot)
+        except Exception as e:
+            logger.error(f"Ошибка постановки уведомлений об изменениях: {e}")
+        return True
+    
+    async def _watch_data(self):
+        """Фоновая проверка обновлений снимка данных"""
+        while True:
+            await asyncio.sleep(DATA_RELOAD_INTERVAL)
+            try:
+                await self.reload_data()
+                await asyncio.to_thread(self.intents.reload_if_changed)
+                await asyncio.to_thread(self.pdf_index.refresh_if_changed)
+            except Exception as e:
+                logger.error(f"Ошибка проверки обновлений данных: {e}")
+    
+    async def _on_startup(self):
+        """Запуск фоновых задач вместе с диспетчером"""
+        if DATA_RELOAD_INTERVAL > 0 and self._reload_task is None:
+            self._reload_task = asyncio.create_task(self._watch_data())
+        await self.notifier.start(self.snapshot)
+        await self.loop_monitor.start()
+        if self.metrics_server is not None:
+            await self.metrics_server.start()
+    
+    async def _on_shutdown(self):
+        """Остановка фоновых задач"""
+        await self.notifier.stop()
+        await self.loop_monitor.stop()
+        if self.metrics_server is not None:
+            await self.metrics_server.stop()
+        if self._reload_task is not None:
+            self._reload_task.cancel()
+            try:
+                await self._reload_task
+            except asyncio.CancelledError:
+                pass
+            self._reload_task = None
+    
     def _register_handlers(self):
         """Регистрация обработчиков"""
+        # Жизненный цикл
+        self.dp.startup.register(self._on_startup)
+        self.dp.shutdown.register(self._on_shutdown)
+        
         # Команды
         self.dp.message(CommandStart())(self.start_handler)
         self.dp.message(Command("help"))(self.help_handler)
         self.dp.message(Command("programs"))(self.programs_handler)
         self.dp.message(Command("compare"))(self.compare_handler)
+        self.dp.message(Command("search"))(self.search_handler)
+        self.dp.message(Command("subscriptions"))(self.subscriptions_handler)
+        self.dp.message(Command("unsubscribe"))(self.unsubscribe_handler)
         
         # Callback кнопки - ИСПРАВЛЕНО
         self.dp.callback_query(F.data == "show_programs")(self.show_programs_handler)
         self.dp.callback_query(F.data == "show_help")(self.show_help_handler)
         self.dp.callback_query(F.data.startswith("program_"))(self.program_info_handler)
         self.dp.callback_query(F.data.startswith("curriculum_"))(self.curriculum_handler)
+        self.dp.callback_query(F.data.startswith(CALLBACK_PREFIX))(self.curriculum_page_handler)
         self.dp.callback_query(F.data.startswith("contacts_"))(self.contacts_handler)
         self.dp.callback_query(F.data.startswith("admission_"))(self.admission_handler)
         self.dp.callback_query(F.data.startswith("download_pdf_"))(self.download_pdf_handler)  # НОВОЕ
+        self.dp.callback_query(F.data.startswith("subscribe_"))(self.subscribe_handler)
+        self.dp.callback_query(F.data.startswith("sim:"))(self.similar_programs_handler)
         self.dp.callback_query(F.data == "compare_programs")(self.compare_programs_handler)
+        self.dp.callback_query(F.data.startswith("cmp_"))(self.compare_select_handler)
         self.dp.callback_query(F.data == "back_main")(self.back_to_main_handler)
         
+        # Inline-режим (@bot запрос)
+        self.dp.inline_query()(self.inline_query_handler)
+        
         # Текстовые сообщения
         self.dp.message(F.text)(self.text_handler)
     
@@ -77,7 +259,7 @@ class ITMOBot:
         """Обработчик команды /start"""
         await state.set_state(BotStates.choosing_program)
         
-        keyboard = self._get_main_keyboard()
+        keyboard = self.views.keyboard('main')
         
         welcome_text = (
             "🎓 *Добро пожаловать в бот ИТМО!*\n\n"
@@ -98,7 +280,10 @@ class ITMOBot:
             "/start - Главное меню\n"
             "/programs - Информация о программах\n"
             "/compare - Сравнить программы\n"
+            "/search - Поиск курсов по всем программам\n"
+            "/subscriptions - Подписки на изменения программ\n"
             "/help - Эта справка\n\n"
+            "🔎 В любом чате наберите имя бота через @ и название программы, направления или курса\n\n"
             "💬 *Вы можете спросить:*\n"
             "• Стоимость обучения\n"
             "• Сроки поступления\n"
@@ -112,13 +297,8 @@ class ITMOBot:
     # НОВЫЕ ОБРАБОТЧИКИ CALLBACK'ОВ
     async def show_programs_handler(self, callback: CallbackQuery):
         """Обработчик кнопки 'Программы'"""
-        keyboard = self._get_programs_keyboard()
-        
-        text = (
-            "📚 *Выберите программу для подробной информации:*\n\n"
-            "🤖 **Искусственный интеллект** - фундаментальная подготовка в области ИИ\n\n"
-            "🎯 **ИИ в продуктах** - практическое применение ИИ в продуктах"
-        )
+        keyboard = self.views.keyboard('programs')
+        text = self.views.text('programs')
         
         await callback.message.edit_text(text, reply_markup=keyboard, parse_mode="Markdown")
         await callback.answer()
@@ -130,7 +310,10 @@ class ITMOBot:
             "/start - Главное меню\n"
             "/programs - Информация о программах\n"
             "/compare - Сравнить программы\n"
+            "/search - Поиск курсов по всем программам\n"
+            "/subscriptions - Подписки на изменения программ\n"
             "/help - Эта справка\n\n"
+            "🔎 В любом чате наберите имя бота через @ и название программы, направления или курса\n\n"
             "💬 *Вы можете спросить:*\n"
             "• Стоимость обучения\n"
             "• Сроки поступления\n"
@@ -139,33 +322,61 @@ class ITMOBot:
             "• И многое другое!"
         )
         
-        keyboard = InlineKeyboardMarkup(inline_keyboard=[[
-            InlineKeyboardButton(text="🏠 Главное меню", callback_data="back_main")
-        ]])
+        keyboard = self.views.keyboard('back_main')
         
         await callback.message.edit_text(help_text, reply_markup=keyboard, parse_mode="Markdown")
         await callback.answer()
     
     async def programs_handler(self, message: Message):
         """Обработчик команды /programs"""
-        keyboard = self._get_programs_keyboard()
-        
-        text = (
-            "📚 *Выберите программу для подробной информации:*\n\n"
-            "🤖 **Искусственный интеллект** - фундаментальная подготовка в области ИИ\n\n"
-            "🎯 **ИИ в продуктах** - практическое применение ИИ в продуктах"
-        )
+        keyboard = self.views.keyboard('programs')
+        text = self.views.text('programs')
         
         await message.answer(text, reply_markup=keyboard, parse_mode="Markdown")
     
-    async def compare_handler(self, message: Message):
+    async def compare_handler(self, message: Message, state: FSMContext):
         """Обработчик команды /compare"""
-        comparison = self._compare_programs()
-        keyboard = InlineKeyboardMarkup(inline_keyboard=[[
-            InlineKeyboardButton(text="🏠 Главное меню", callback_data="back_main")
-        ]])
-        
-        await message.answer(comparison, reply_markup=keyboard, parse_mode="Markdown")
+        text, keyboard = await self._compare_selection_screen(state)
+        await message.answer(text, reply_markup=keyboard, parse_mode="Markdown")
+    
+    async def search_handler(self, message: Message, command: CommandObject):
+        """Обработчик команды /search"""
+        query = (command.args or "").strip()
+        if not query:
+            await message.answer(SEARCH_USAGE_TEXT, parse_mode="Markdown")
+            return
+        
+        result = self.snapshot.search.search(query)
+        await message.answer(search_results(query, result), parse_mode="Markdown")
+    
+    async def subscriptions_handler(self, message: Message):
+        """Обработчик команды /subscriptions"""
+        program_ids = await asyncio.to_thread(self.subscriptions.subscriptions, message.chat.id)
+        await message.answer(subscriptions_list(self.data, program_ids), parse_mode="Markdown")
+    
+    async def unsubscribe_handler(self, message: Message):
+        """Обработчик команды /unsubscribe"""
+        removed = await asyncio.to_thread(self.subscriptions.unsubscribe_all, message.chat.id)
+        if removed:
+            await message.answer("🔕 Уведомления об изменениях программ отключены")
+        else:
+            await message.answer("🔕 У вас нет подписок на изменения программ")
+    
+    async def subscribe_handler(self, callback: CallbackQuery):
+        """Подписка на изменения программы и отписка (повторное нажатие)"""
+        program_id = callback.data.split("_", 1)[1]
+        program = self.data.get(program_id)
+        if program is None:
+            await callback.answer("❌ Программа не найдена", show_alert=True)
+            return
+        
+        subscribed = await asyncio.to_thread(self.subscriptions.toggle, callback.message.chat.id, program_id)
+        if subscribed:
+            text = (f"🔔 Вы подписаны на изменения «{program.title}»: стоимость, места, учебный план. "
+                    f"Повторное нажатие - отписка")
+        else:
+            text = f"🔕 Уведомления об изменениях программы «{program.title}» отключены"
+        await callback.answer(text, show_alert=True)
     
     async def program_info_handler(self, callback: CallbackQuery):
         """Обработчик выбора программы"""
@@ -178,15 +389,8 @@ class ITMOBot:
         
         logger.info(f"Выбрана программа: {program_id}")
         
-        program_info = self._get_program_info(program_id)
-        
-        keyboard = InlineKeyboardMarkup(inline_keyboard=[
-            [InlineKeyboardButton(text="📋 Учебный план", callback_data=f"curriculum_{program_id}")],
-            [InlineKeyboardButton(text="📞 Контакты", callback_data=f"contacts_{program_id}")],
-            [InlineKeyboardButton(text="🎯 Поступление", callback_data=f"admission_{program_id}")],
-            [InlineKeyboardButton(text="🔄 Сравнить программы", callback_data="compare_programs")],
-            [InlineKeyboardButton(text="🏠 Главное меню", callback_data="back_main")]
-        ])
+        program_info = self.views.text('program', program_id)
+        keyboard = self.views.keyboard('program', program_id)
         
         await callback.message.edit_text(program_info, reply_markup=keyboard, parse_mode="Markdown")
         await callback.answer()
@@ -206,6 +410,47 @@ class ITMOBot:
         await self._show_curriculum_menu(callback, program_id, edit_message=True)
         await callback.answer()
     
+    async def curriculum_page_handler(self, callback: CallbackQuery):
+        """Постраничный просмотр курсов: готовый экран из снимка, сообщение редактируется"""
+        parsed = parse_callback(callback.data)
+        screen = self.snapshot.curriculum.screen(*parsed) if parsed else None
+        
+        if screen is None:
+            # Кнопка из сообщения, отрисованного по старому снимку
+            screen = self.snapshot.curriculum.screen(parsed[0], 'blocks') if parsed else None
+            if screen is None:
+                await callback.answer(NOT_FOUND_TEXT, show_alert=True)
+                return
+            await callback.answer(CURRICULUM_UPDATED_TEXT, show_alert=True)
+        else:
+            await callback.answer()
+        
+        text, keyboard = screen
+        await callback.message.edit_text(text, reply_markup=keyboard, parse_mode="Markdown")
+    
+    async def similar_programs_handler(self, callback: CallbackQuery):
+        """Похожие программы (sim:<id>) и общие курсы двух программ (sim:<id>:<другая>)"""
+        program_ids = callback.data[len("sim:"):].split(":")
+        similarity = self.snapshot.similarity
+        program = self.data.get(program_ids[0])
+        other = self.data.get(program_ids[1]) if len(program_ids) == 2 else None
+        
+        if program is None or (len(program_ids) == 2 and other is None) or len(program_ids) > 2:
+            await callback.answer(NOT_FOUND_TEXT, show_alert=True)
+            return
+        
+        if other is None:
+            overlaps = similarity.similar_programs(program.program_id)
+            text = similar_programs(program.title, overlaps)
+            keyboard = similar_programs_keyboard(program.program_id, overlaps)
+        else:
+            shared = similarity.shared_courses(program.program_id, other.program_id)
+            text = shared_courses(program.title, other.title, shared)
+            keyboard = shared_courses_keyboard(program.program_id)
+        
+        await callback.message.edit_text(text, reply_markup=keyboard, parse_mode="Markdown")
+        await callback.answer()
+    
     async def contacts_handler(self, callback: CallbackQuery):
         """Обработчик контактов"""
         # Правильно извлекаем program_id
@@ -217,12 +462,8 @@ class ITMOBot:
         
         logger.info(f"Запрошены контакты для программы: {program_id}")
         
-        contacts_info = self._get_program_contacts(program_id)
-        
-        keyboard = InlineKeyboardMarkup(inline_keyboard=[
-            [InlineKeyboardButton(text="⬅️ Назад к программе", callback_data=f"program_{program_id}")],
-            [InlineKeyboardButton(text="🏠 Главное меню", callback_data="back_main")]
-        ])
+        contacts_info = self.views.text('contacts', program_id)
+        keyboard = self.views.keyboard('back_program', program_id)
         
         await callback.message.edit_text(contacts_info, reply_markup=keyboard, parse_mode="Markdown")
         await callback.answer()
@@ -238,12 +479,8 @@ class ITMOBot:
         
         logger.info(f"Запрошена информация о поступлении для программы: {program_id}")
         
-        admission_info = self._get_admission_info_detailed(program_id)
-        
-        keyboard = InlineKeyboardMarkup(inline_keyboard=[
-            [InlineKeyboardButton(text="⬅️ Назад к программе", callback_data=f"program_{program_id}")],
-            [InlineKeyboardButton(text="🏠 Главное меню", callback_data="back_main")]
-        ])
+        admission_info = self.views.text('admission', program_id)
+        keyboard = self.views.keyboard('back_program', program_id)
         
         await callback.message.edit_text(admission_info, reply_markup=keyboard, parse_mode="Markdown")
         await callback.answer()
@@ -263,26 +500,21 @@ class ITMOBot:
         await callback.answer("📄 Отправляю PDF файл...", show_alert=False)
         
         try:
-            # Ищем PDF файл
-            pdf_path = self._find_pdf_file(program_id)
+            pdf = self.pdf_index.get(program_id)
             
-            if not pdf_path or not pdf_path.exists():
+            if pdf is None:
                 await callback.message.answer("❌ PDF файл учебного плана не найден.")
                 return
             
             # Получаем название программы для описания
-            program = self.data.get(program_id, {})
-            web_data = program.get('web_data', {})
-            program_title = web_data.get('program_title', 'Программа')
+            program = self.data.get(program_id)
+            program_title = program.web_data.program_title if program and program.web_data else 'Программа'
             
-            # Отправляем PDF как документ
-            pdf_file = FSInputFile(pdf_path)
-            caption = f"📚 Учебный план\n🎓 {program_title}\n📄 Файл: {pdf_path.name}"
+            # Отправляем PDF как документ (в хранилище файлы названы по хэшу)
+            filename = f"{program_id}_curriculum.pdf"
+            caption = f"📚 Учебный план\n🎓 {program_title}\n📄 Файл: {filename}"
             
-            await callback.message.answer_document(
-                document=pdf_file,
-                caption=caption
-            )
+            await self._send_pdf(callback.message, pdf.path, pdf.sha256, filename, caption)
             
             # Возвращаемся в меню учебного плана (переиспользуем существующий метод)
             await self._show_curriculum_menu(callback, program_id, success_message="✅ PDF файл отправлен!")
@@ -291,12 +523,33 @@ class ITMOBot:
             logger.error(f"Ошибка отправки PDF: {e}")
             await callback.message.answer("❌ Произошла ошибка при отправке PDF файла.")
     
+    async def _send_pdf(self, message: Message, pdf_path: Path, pdf_hash: str, filename: str, caption: str):
+        """Отправка PDF: повторно используем file_id, загружаем файл только при изменении"""
+        file_id = self.file_ids.get(pdf_hash)
+        
+        if file_id:
+            try:
+                await message.answer_document(document=file_id, caption=caption)
+                return
+            except TelegramBadRequest as e:
+                # file_id мог устареть на стороне Telegram - загружаем заново
+                logger.warning(f"file_id для {filename} не принят Telegram: {e}")
+                await asyncio.to_thread(self.file_ids.discard, pdf_hash, file_id)
+        
+        sent = await message.answer_document(
+            document=FSInputFile(pdf_path, filename=filename),
+            caption=caption
+        )
+        
+        if sent and sent.document:
+            await asyncio.to_thread(self.file_ids.set, pdf_hash, sent.document.file_id)
+    
     async def _show_curriculum_menu(self, callback: CallbackQuery, program_id: str, success_message: str = "", edit_message: bool = False):
         """Показать меню учебного плана (вынесено в отдельный метод)"""
-        curriculum_info = self._get_curriculum_info(program_id)
+        curriculum_info = self.views.text('curriculum', program_id)
         
-        # Проверяем наличие PDF файла
-        pdf_available = self._check_pdf_exists(program_id)
+        # Наличие PDF берется из индекса в памяти
+        pdf_available = self.pdf_index.available(program_id)
         
         # Добавляем предупреждение если PDF нет
         if not pdf_available:
@@ -306,16 +559,7 @@ class ITMOBot:
         if success_message:
             curriculum_info += f"\n\n{success_message}"
         
-        keyboard_buttons = []
-        if pdf_available:
-            keyboard_buttons.append([InlineKeyboardButton(text="📄 Скачать PDF", callback_data=f"download_pdf_{program_id}")])
-        
-        keyboard_buttons.extend([
-            [InlineKeyboardButton(text="⬅️ Назад к программе", callback_data=f"program_{program_id}")],
-            [InlineKeyboardButton(text="🏠 Главное меню", callback_data="back_main")]
-        ])
-        
-        keyboard = InlineKeyboardMarkup(inline_keyboard=keyboard_buttons)
+        keyboard = self.views.keyboard('curriculum_pdf' if pdf_available else 'curriculum', program_id)
         
         # Редактируем существующее сообщение или отправляем новое
         if edit_message:
@@ -331,51 +575,81 @@ class ITMOBot:
                 parse_mode="Markdown"
             )
     
-    def _check_pdf_exists(self, program_id: str) -> bool:
-        """Проверка существования PDF файла"""
-        pdf_path = self._find_pdf_file(program_id)
-        return pdf_path is not None and pdf_path.exists()
+    async def inline_query_handler(self, inline_query: InlineQuery):
+        """Inline-запрос: готовые результаты из префиксного индекса снимка"""
+        results, next_offset = self.snapshot.inline.answer(inline_query.query, inline_query.offset)
+        # Ответ одинаков для всех пользователей - Telegram может отдавать его из своего кэша
+        await inline_query.answer(
+            results, cache_time=INLINE_CACHE_TIME, is_personal=False, next_offset=next_offset
+        )
     
-    def _find_pdf_file(self, program_id: str) -> Optional[Path]:
-        """Поиск PDF файла для программы"""
-        # Папка с PDF файлами
-        pdfs_dir = self.project_root / "data" / "pdf"
-        
-        logger.info(f"Ищем PDF для программы {program_id} в папке: {pdfs_dir}")
-        
-        if not pdfs_dir.exists():
-            logger.warning(f"Папка PDF не найдена: {pdfs_dir}")
-            return None
-        
-        # Простое соответствие program_id -> имя файла
-        pdf_filename = f"{program_id}_curriculum.pdf"
-        pdf_path = pdfs_dir / pdf_filename
-        
-        logger.info(f"Ищем файл: {pdf_filename}")
-        
-        if pdf_path.exists():
-            logger.info(f"Найден PDF файл: {pdf_path}")
-            return pdf_path
-        else:
-            logger.warning(f"PDF файл не найден: {pdf_path}")
-            return None
+    async def compare_programs_handler(self, callback: CallbackQuery, state: FSMContext):
+        """Обработчик сравнения программ: экран выбора"""
+        text, keyboard = await self._compare_selection_screen(state)
+        await callback.message.edit_text(text, reply_markup=keyboard, parse_mode="Markdown")
+        await callback.answer()
     
-    async def compare_programs_handler(self, callback: CallbackQuery):
-        """Обработчик сравнения программ"""
-        comparison = self._compare_programs()
-        
-        keyboard = InlineKeyboardMarkup(inline_keyboard=[[
-            InlineKeyboardButton(text="🏠 Главное меню", callback_data="back_main")
-        ]])
-        
-        await callback.message.edit_text(comparison, reply_markup=keyboard, parse_mode="Markdown")
+    async def _compare_selection_screen(self, state: FSMContext):
+        """Экран выбора программ с сохраненным выбором (без NumPy - сравнение всех программ)"""
+        comparison = self.snapshot.comparison
+        if not COMPARISON_AVAILABLE or len(comparison) < 2:
+            return self.views.text('compare'), self.views.keyboard('back_main')
+        
+        await state.set_state(BotStates.comparing_programs)
+        selected = await self._compare_selection(state)
+        return selection_text(selected), comparison.selection_keyboard(selected)
+    
+    async def _compare_selection(self, state: FSMContext) -> List[str]:
+        """Выбранные программы, которые есть в текущем снимке"""
+        data = await state.get_data()
+        return [program_id for program_id in data.get('compare_selection', []) if program_id in self.data]
+    
+    async def compare_select_handler(self, callback: CallbackQuery, state: FSMContext):
+        """Отметка программ и сравнение выбранных"""
+        comparison = self.snapshot.comparison
+        selected = await self._compare_selection(state)
+        
+        if callback.data.startswith(CALLBACK_TOGGLE):
+            program_id = callback.data[len(CALLBACK_TOGGLE):]
+            if program_id in selected:
+                selected.remove(program_id)
+            elif program_id not in self.data:
+                await callback.answer(NOT_FOUND_TEXT, show_alert=True)
+                return
+            elif len(selected) >= MAX_SELECTED:
+                await callback.answer(f"Можно сравнить не больше {MAX_SELECTED} программ", show_alert=True)
+                return
+            else:
+                selected.append(program_id)
+            
+            await state.set_state(BotStates.comparing_programs)
+            await state.update_data(compare_selection=selected)
+            await callback.message.edit_text(
+                selection_text(selected), reply_markup=comparison.selection_keyboard(selected), parse_mode="Markdown"
+            )
+            await callback.answer()
+            return
+        
+        if callback.data == CALLBACK_ALL:
+            selected = comparison.program_ids[:MAX_SELECTED]
+            await state.update_data(compare_selection=selected)
+        elif callback.data != CALLBACK_SHOW:
+            await callback.answer()
+            return
+        
+        text = comparison.compare(selected)
+        if text is None:
+            await callback.answer("Отметьте хотя бы две программы", show_alert=True)
+            return
+        
+        await callback.message.edit_text(text, reply_markup=result_keyboard(), parse_mode="Markdown")
         await callback.answer()
     
     async def back_to_main_handler(self, callback: CallbackQuery, state: FSMContext):
         """Возврат в главное меню"""
         await state.set_state(BotStates.choosing_program)
         
-        keyboard = self._get_main_keyboard()
+        keyboard = self.views.keyboard('main')
         
         welcome_text = (
             "🎓 *Главное меню*\n\n"
@@ -401,328 +675,77 @@ class ITMOBot:
                 "Например: 'стоимость обучения', 'когда поступать', 'контакты'"
             )
     
-    def _get_main_keyboard(self) -> InlineKeyboardMarkup:
-        """Главное меню"""
-        return InlineKeyboardMarkup(inline_keyboard=[
-            [InlineKeyboardButton(text="📚 Программы", callback_data="show_programs")],
-            [InlineKeyboardButton(text="🔄 Сравнить программы", callback_data="compare_programs")],
-            [InlineKeyboardButton(text="❓ Помощь", callback_data="show_help")]
-        ])
-    
-    def _get_programs_keyboard(self) -> InlineKeyboardMarkup:
-        """Клавиатура выбора программ"""
-        return InlineKeyboardMarkup(inline_keyboard=[
-            [InlineKeyboardButton(text="🤖 Искусственный интеллект", callback_data="program_ai")],
-            [InlineKeyboardButton(text="🎯 ИИ в продуктах", callback_data="program_ai_product")],
-            [InlineKeyboardButton(text="🏠 Главное меню", callback_data="back_main")]
-        ])
-    
-    def _get_program_info(self, program_id: str) -> str:
-        """Получение информации о программе"""
-        if program_id not in self.data:
-            return "❌ Информация о программе не найдена"
-        
-        program = self.data[program_id]
-        web_data = program.get('web_data', {})
-        curriculum = program.get('curriculum_data', {})
-        
-        info = f"🎓 *{web_data.get('program_title', 'Программа')}*\n\n"
-        
-        # Базовая информация
-        basic_info = web_data.get('basic_info', {})
-        if basic_info:
-            info += "📋 *Основная информация:*\n"
-            for key, value in basic_info.items():
-                if value:
-                    info += f"• {key.title()}: {value}\n"
-            info += "\n"
-        
-        # Направления подготовки
-        directions = web_data.get('directions', [])
-        if directions:
-            info += "🎯 *Направления подготовки:*\n"
-            for direction in directions:
-                info += f"• {direction['code']} {direction['name']}\n"
-                info += f"  Бюджет: {direction['budget_places']}, Контракт: {direction['contract_places']}\n"
-            info += "\n"
-        
-        # Учебный план
-        if curriculum:
-            info += f"📚 *Учебный план:*\n"
-            info += f"• Всего курсов: {curriculum.get('total_courses', 0)}\n"
-            info += f"• Трудоемкость: {curriculum.get('total_credits', 0)}\n"
-            info += f"• Блоков: {len(curriculum.get('blocks', []))}\n\n"
-        
-        return info
-    
-    def _get_curriculum_info(self, program_id: str) -> str:
-        """Детальная информация об учебном плане"""
-        if program_id not in self.data:
-            return "❌ Информация о программе не найдена"
-        
-        program = self.data[program_id]
-        web_data = program.get('web_data', {})
-        curriculum = program.get('curriculum_data', {})
-        
-        info = f"📚 *Учебный план - {web_data.get('program_title', 'Программа')}*\n\n"
-        
-        if not curriculum:
-            return info + "❌ Данные учебного плана не загружены"
-        
-        info += f"📊 *Общая статистика:*\n"
-        info += f"• Всего курсов: {curriculum.get('total_courses', 0)}\n"
-        info += f"• Кредитов: {curriculum.get('total_credits', 0)}\n"
-        info += f"• Блоков обучения: {len(curriculum.get('blocks', []))}\n\n"
-        
-        # Показываем блоки
-        blocks = curriculum.get('blocks', [])
-        if blocks:
-            info += "📋 *Блоки обучения:*\n"
-            for i, block in enumerate(blocks[:5], 1):  # Показываем первые 5 блоков
-                info += f"{i}. *{block['name']}*\n"
-                info += f"   Трудоемкость: {block['total_credits']} з.ед\n"
-                info += f"   Количество часов: {block['total_hours']}\n\n"
-            
-            if len(blocks) > 5:
-                info += f"... и еще {len(blocks) - 5} блоков\n"
-        
-        return info
-    
-    def _get_program_contacts(self, program_id: str) -> str:
-        """Контактная информация конкретной программы"""
-        if program_id not in self.data:
-            return "❌ Информация о программе не найдена"
-        
-        program = self.data[program_id]
-        web_data = program.get('web_data', {})
-        
-        info = f"📞 *Контакты - {web_data.get('program_title', 'Программа')}*\n\n"
-        
-        manager = web_data.get('manager_name', 'Не указан')
-        contacts = web_data.get('manager_contacts', [])
-        
-        info += f"👤 *Менеджер программы:* {manager}\n\n"
-        
-        if contacts:
-            info += "📧 *Контактные данные:*\n"
-            for contact in contacts:
-                info += f"• {contact}\n"
-        else:
-            info += "❌ Контактные данные не указаны\n"
-        
-        # Общие контакты ИТМО
-        info += "\n🏛 *Общие контакты ИТМО:*\n"
-        info += "• Сайт: itmo.ru\n"
-        info += "• Приемная комиссия: +7 (812) 457-17-35\n"
-        info += "• Email: admission@itmo.ru\n"
-        
-        return info
-    
-    def _get_admission_info_detailed(self, program_id: str) -> str:
-        """Детальная информация о поступлении"""
-        if program_id not in self.data:
-            return "❌ Информация о программе не найдена"
-        
-        program = self.data[program_id]
-        web_data = program.get('web_data', {})
-        
-        info = f"🎯 *Поступление - {web_data.get('program_title', 'Программа')}*\n\n"
-        
-        directions = web_data.get('directions', [])
-        if directions:
-            info += "📋 *Направления подготовки:*\n\n"
-            for direction in directions:
-                info += f"*{direction['code']} {direction['name']}*\n"
-                info += f"• Бюджетных мест: {direction['budget_places']}\n"
-                info += f"• Контрактных мест: {direction['contract_places']}\n"
-                
-                # Стоимость
-                cost = web_data.get('basic_info', {}).get('стоимость контрактного обучения (год)', 'Не указано')
-                if cost != 'Не указано':
-                    info += f"• Стоимость: {cost}\n"
-                
-                info += "\n"
-        
-        # Общая информация о поступлении
-        info += "📅 *Важные даты:*\n"
-        info += "• Подача документов: июнь-июль\n"
-        info += "• Вступительные испытания: июль-август\n"
-        info += "• Зачисление: август\n\n"
-        
-        info += "📝 *Документы:*\n"
-        info += "• Диплом бакалавра/специалиста\n"
-        info += "• Паспорт\n"
-        info += "• Фотографии 3x4\n"
-        info += "• Заявление\n"
-        
-        return info
-    
-    def _compare_programs(self) -> str:
-        """Сравнение программ"""
-        if len(self.data) < 2:
-            return "❌ Недостаточно данных для сравнения"
-        
-        ai_data = self.data.get('ai', {}).get('web_data', {})
-        ai_product_data = self.data.get('ai_product', {}).get('web_data', {})
-        
-        comparison = "🔄 *Сравнение программ*\n\n"
-        
-        # Сравнение стоимости
-        ai_cost = ai_data.get('basic_info', {}).get('стоимость контрактного обучения (год)', 'Не указано')
-        ai_product_cost = ai_product_data.get('basic_info', {}).get('стоимость контрактного обучения (год)', 'Не указано')
-        
-        comparison += "💰 *Стоимость:*\n"
-        comparison += f"• ИИ: {ai_cost}\n"
-        comparison += f"• ИИ в продуктах: {ai_product_cost}\n\n"
-        
-        # Сравнение направлений
-        ai_directions = len(ai_data.get('directions', []))
-        ai_product_directions = len(ai_product_data.get('directions', []))
-        
-        comparison += "🎯 *Направления подготовки:*\n"
-        comparison += f"• ИИ: {ai_directions} направлений\n"
-        comparison += f"• ИИ в продуктах: {ai_product_directions} направлений\n\n"
-        
-        # Сравнение учебных планов
-        ai_curriculum = self.data.get('ai', {}).get('curriculum_data', {})
-        ai_product_curriculum = self.data.get('ai_product', {}).get('curriculum_data', {})
-        
-        if ai_curriculum and ai_product_curriculum:
-            comparison += "📚 *Учебный план:*\n"
-            comparison += f"• ИИ: {ai_curriculum.get('total_courses', 0)} курсов\n"
-            comparison += f"• ИИ в продуктах: {ai_product_curriculum.get('total_courses', 0)} курсов\n\n"
-        
-        return comparison
-    
     def _get_answer_for_question(self, question: str) -> Optional[str]:
         """Получение ответа на вопрос"""
-        # Ключевые слова и соответствующие ответы
-        keywords_map = {
-            'стоимость': self._get_cost_info,
-            'цена': self._get_cost_info,
-            'сколько стоит': self._get_cost_info,
-            'контакт': self._get_contacts_info,
-            'телефон': self._get_contacts_info,
-            'email': self._get_contacts_info,
-            'менеджер': self._get_contacts_info,
-            'поступление': self._get_admission_info,
-            'экзамен': self._get_admission_info,
-            'когда поступать': self._get_admission_info,
-            'курсы': self._get_courses_info,
-            'предметы': self._get_courses_info,
-            'учебный план': self._get_courses_info,
-            'длительность': self._get_duration_info,
-            'срок': self._get_duration_info,
-            'сколько лет': self._get_duration_info,
-        }
-        
-        for keyword, handler in keywords_map.items():
-            if keyword in question:
-                return handler()
-        
-        return None
-    
-    def _get_cost_info(self) -> str:
-        """Информация о стоимости"""
-        info = "💰 *Стоимость обучения:*\n\n"
-        
-        for program_id, program_data in self.data.items():
-            web_data = program_data.get('web_data', {})
-            title = web_data.get('program_title', program_id)
-            cost = web_data.get('basic_info', {}).get('стоимость контрактного обучения (год)', 'Не указано')
-            
-            info += f"• *{title}*: {cost}\n"
+        # Интент определяется автоматом по всем фразам словаря за один проход
+        intent = self.intents.match(question)
+        if intent:
+            return self.views.text(intent.screen)
         
-        return info
-    
-    def _get_contacts_info(self) -> str:
-        """Контактная информация"""
-        info = "📞 *Контакты:*\n\n"
+        # Иначе ищем курс по названию с учетом опечаток
+        matches = self.snapshot.course_names.search(question)
+        if matches:
+            return fuzzy_course_results(matches)
         
-        for program_id, program_data in self.data.items():
-            web_data = program_data.get('web_data', {})
-            title = web_data.get('program_title', program_id)
-            manager = web_data.get('manager_name', 'Не указан')
-            contacts = web_data.get('manager_contacts', [])
-            
-            info += f"*{title}:*\n"
-            info += f"Менеджер: {manager}\n"
-            
-            for contact in contacts:
-                info += f"• {contact}\n"
-            
-            info += "\n"
+        # Иначе - самые близкие по TF-IDF фрагменты данных программ
+        hits = self.snapshot.passages.search(question)
+        if hits:
+            return retrieval_results(hits)
         
-        return info
-    
-    def _get_admission_info(self) -> str:
-        """Информация о поступлении"""
-        info = "🎯 *Поступление:*\n\n"
-        
-        for program_id, program_data in self.data.items():
-            web_data = program_data.get('web_data', {})
-            title = web_data.get('program_title', program_id)
-            directions = web_data.get('directions', [])
-            
-            info += f"*{title}:*\n"
-            
-            for direction in directions:
-                info += f"• {direction['code']} {direction['name']}\n"
-                info += f"  Бюджет: {direction['budget_places']} мест\n"
-                info += f"  Контракт: {direction['contract_places']} мест\n"
-            
-            info += "\n"
-        
-        return info
-    
-    def _get_courses_info(self) -> str:
-        """Информация о курсах"""
-        info = "📚 *Учебные планы:*\n\n"
-        
-        for program_id, program_data in self.data.items():
-            web_data = program_data.get('web_data', {})
-            curriculum = program_data.get('curriculum_data', {})
-            title = web_data.get('program_title', program_id)
-            
-            info += f"*{title}:*\n"
-            
-            if curriculum:
-                info += f"• Всего курсов: {curriculum.get('total_courses', 0)}\n"
-                info += f"• Кредитов: {curriculum.get('total_credits', 0)}\n"
-                
-                blocks = curriculum.get('blocks', [])
-                if blocks:
-                    info += "• Основные блоки:\n"
-                    for block in blocks[:3]:  # Показываем первые 3 блока
-                        info += f"  - {block['name']} ({block['total_credits']} зет)\n"
-            else:
-                info += "• Данные учебного плана загружаются...\n"
-            
-            info += "\n"
-        
-        return info
-    
-    def _get_duration_info(self) -> str:
-        """Информация о длительности"""
-        info = "⏱ *Длительность обучения:*\n\n"
-        
-        for program_id, program_data in self.data.items():
-            web_data = program_data.get('web_data', {})
-            title = web_data.get('program_title', program_id)
-            duration = web_data.get('basic_info', {}).get('длительность', 'Не указано')
-            
-            info += f"• *{title}*: {duration}\n"
-        
-        return info
+        return None
     
     async def start_polling(self):
         """Запуск бота"""
         logger.info("Бот запущен!")
         await self.dp.start_polling(self.bot)
     
+    async def start_webhook(self, base_url: str, path: str, host: str, port: int,
+                            secret_token: Optional[str] = None, max_concurrency: int = 64):
+        """Запуск бота в режиме webhook (до SIGINT/SIGTERM)"""
+        app = web.Application()
+        handler = LimitedRequestHandler(self.dp, self.bot, max_concurrency, secret_token=secret_token or None)
+        handler.register(app, path=path)
+        # Обработчик регистрируется первым, поэтому при остановке сначала дорабатываются
+        # принятые обновления, и только потом останавливаются фоновые задачи диспетчера
+        setup_application(app, self.dp, bot=self.bot)
+        
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, host, port)
+        await site.start()
+        
+        stop_event = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            try:
+                loop.add_signal_handler(sig, stop_event.set)
+            except NotImplementedError:
+                pass
+        
+        try:
+            if base_url:
+                await self.bot.set_webhook(
+                    url=base_url.rstrip("/") + path,
+                    secret_token=secret_token or None,
+                    max_connections=min(max_concurrency, 100),
+                    allowed_updates=self.dp.resolve_used_update_types()
+                )
+            logger.info(f"Бот запущен (webhook {host}:{port}{path})!")
+            await stop_event.wait()
+        finally:
+            logger.info("Остановка webhook сервера...")
+            for sig in (signal.SIGINT, signal.SIGTERM):
+                try:
+                    loop.remove_signal_handler(sig)
+                except NotImplementedError:
+                    pass
+            await runner.cleanup()
+    
     async def stop(self):
         """Остановка бота"""
+        self.send_scheduler.close()
         await self.bot.session.close()
+        self.subscriptions.close()
 
 # Точка входа
 async def main():
@@ -0,0 +1,613 @@
+from functools import partial
+from typing import Callable, Dict, List, Optional, Tuple
+
+from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
+
+from src.parsers.models import Course, Program
+from src.bot.fuzzy import FuzzyMatch
+from src.bot.retrieval import PassageHit
+from src.bot.search import SearchResult
+from src.bot.similarity import ProgramOverlap, SharedCourse
+
+# Отрисовка экранов бота. Тексты и клавиатуры зависят только от снимка данных,
+# поэтому RenderedViews строит их один раз при загрузке снимка, а обработчики
+# только достают готовую строку по (экран, program_id).
+
+NOT_FOUND_TEXT = "❌ Информация о программе не найдена"
+
+SEARCH_USAGE_TEXT = (
+    "🔎 *Поиск курсов*\n\n"
+    "Напишите запрос после команды, например:\n"
+    "/search компьютерное зрение"
+)
+
+# Подписи известных программ (для остальных используется название со страницы)
+PROGRAM_BUTTONS = {
+    'ai': "🤖 Искусственный интеллект",
+    'ai_product': "🎯 ИИ в продуктах",
+}
+
+# Сколько похожих программ показывать
+SIMILAR_PROGRAMS_SHOWN = 10
+
+# Бюджет длины списка общих курсов (сообщение Telegram - до 4096 символов)
+SHARED_COURSES_BUDGET = 3500
+
+# Сколько блоков показывать в обзорах учебных планов (все блоки - в постраничном просмотре)
+CURRICULUM_BLOCKS_SHOWN = 5
+COURSES_OVERVIEW_BLOCKS_SHOWN = 3
+
+# Бюджет длины обзора учебных планов всех программ (в UTF-16 единицах, как считает Telegram)
+COURSES_OVERVIEW_BUDGET = 3500
+
+ALL_COURSES_HINT = "Все курсы по блокам - в меню программы: «Учебный план» → «Все курсы по блокам»"
+
+PROGRAM_DESCRIPTIONS = {
+    'ai': "🤖 **Искусственный интеллект** - фундаментальная подготовка в области ИИ",
+    'ai_product': "🎯 **ИИ в продуктах** - практическое применение ИИ в продуктах",
+}
+
+
+# --- Клавиатуры ---
+
+def main_keyboard() -> InlineKeyboardMarkup:
+    """Главное меню"""
+    return InlineKeyboardMarkup(inline_keyboard=[
+        [InlineKeyboardButton(text="📚 Программы", callback_data="show_programs")],
+        [InlineKeyboardButton(text="🔄 Сравнить программы", callback_data="compare_programs")],
+        [InlineKeyboardButton(text="❓ Помощь", callback_data="show_help")]
+    ])
+
+
+def back_main_keyboard() -> InlineKeyboardMarkup:
+    """Кнопка возврата в главное меню"""
+    return InlineKeyboardMarkup(inline_keyboard=[[
+        InlineKeyboardButton(text="🏠 Главное меню", callback_data="back_main")
+    ]])
+
+
+def programs_keyboard(programs: Dict[str, Program]) -> InlineKeyboardMarkup:
+    """Клавиатура выбора программ"""
+    program_ids = list(programs) or list(PROGRAM_BUTTONS)
+    buttons = [
+        [InlineKeyboardButton(
+            text=PROGRAM_BUTTONS.get(program_id) or f"🎓 {programs[program_id].title}",
+            callback_data=f"program_{program_id}"
+        )]
+        for program_id in program_ids
+    ]
+    buttons.append([InlineKeyboardButton(text="🏠 Главное меню", callback_data="back_main")])
+    return InlineKeyboardMarkup(inline_keyboard=buttons)
+
+
+def program_keyboard(program_id: str) -> InlineKeyboardMarkup:
+    """Меню программы"""
+    return InlineKeyboardMarkup(inline_keyboard=[
+        [InlineKeyboardButton(text="📋 Учебный план", callback_data=f"curriculum_{program_id}")],
+        [InlineKeyboardButton(text="📞 Контакты", callback_data=f"contacts_{program_id}")],
+        [InlineKeyboardButton(text="🎯 Поступление", callback_data=f"admission_{program_id}")],
+        [InlineKeyboardButton(text="🔄 Сравнить программы", callback_data="compare_programs")],
+        [InlineKeyboardButton(text="🧭 Похожие программы", callback_data=f"sim:{program_id}")],
+        [InlineKeyboardButton(text="🔔 Уведомлять об изменениях", callback_data=f"subscribe_{program_id}")],
+        [InlineKeyboardButton(text="🏠 Главное меню", callback_data="back_main")]
+    ])
+
+
+def back_to_program_keyboard(program_id: str) -> InlineKeyboardMarkup:
+    """Возврат к программе или в главное меню"""
+    return InlineKeyboardMarkup(inline_keyboard=[
+        [InlineKeyboardButton(text="⬅️ Назад к программе", callback_data=f"program_{program_id}")],
+        [InlineKeyboardButton(text="🏠 Главное меню", callback_data="back_main")]
+    ])
+
+
+def curriculum_keyboard(program_id: str, pdf_available: bool) -> InlineKeyboardMarkup:
+    """Меню учебного плана"""
+    keyboard_buttons = []
+    if pdf_available:
+        keyboard_buttons.append([InlineKeyboardButton(text="📄 Скачать PDF", callback_data=f"download_pdf_{program_id}")])
+    keyboard_buttons.append([InlineKeyboardButton(text="📖 Все курсы по блокам", callback_data=f"cur:{program_id}:blocks")])
+
+    keyboard_buttons.extend([
+        [InlineKeyboardButton(text="⬅️ Назад к программе", callback_data=f"program_{program_id}")],
+        [InlineKeyboardButton(text="🏠 Главное меню", callback_data="back_main")]
+    ])
+
+    return InlineKeyboardMarkup(inline_keyboard=keyboard_buttons)
+
+
+def similar_programs_keyboard(program_id: str, overlaps: List[ProgramOverlap]) -> InlineKeyboardMarkup:
+    """Общие курсы с каждой из похожих программ"""
+    buttons = [
+        [InlineKeyboardButton(
+            text=PROGRAM_BUTTONS.get(overlap.program_id) or overlap.title,
+            callback_data=f"sim:{program_id}:{overlap.program_id}"
+        )]
+        for overlap in overlaps[:SIMILAR_PROGRAMS_SHOWN]
+    ]
+    buttons.append([InlineKeyboardButton(text="⬅️ Назад к программе", callback_data=f"program_{program_id}")])
+    return InlineKeyboardMarkup(inline_keyboard=buttons)
+
+
+def shared_courses_keyboard(program_id: str) -> InlineKeyboardMarkup:
+    """Возврат к похожим программам"""
+    return InlineKeyboardMarkup(inline_keyboard=[
+        [InlineKeyboardButton(text="⬅️ Похожие программы", callback_data=f"sim:{program_id}")],
+        [InlineKeyboardButton(text="🏠 Главное меню", callback_data="back_main")]
+    ])
+
+
+# --- Тексты экранов ---
+
+def programs_list(programs: Dict[str, Program]) -> str:
+    """Список программ"""
+    program_ids = list(programs) or list(PROGRAM_DESCRIPTIONS)
+    descriptions = [
+        PROGRAM_DESCRIPTIONS.get(program_id) or f"🎓 **{programs[program_id].title}**"
+        for program_id in program_ids
+    ]
+    return "📚 *Выберите программу для подробной информации:*\n\n" + "\n\n".join(descriptions)
+
+
+def program_info(programs: Dict[str, Program], program_id: str) -> str:
+    """Получение информации о программе"""
+    if program_id not in programs:
+        return NOT_FOUND_TEXT
+
+    program = programs[program_id]
+    web_data = program.web_data
+    curriculum = program.curriculum_data
+
+    info = f"🎓 *{web_data.program_title if web_data else 'Программа'}*\n\n"
+
+    if web_data:
+        # Базовая информация
+        if web_data.basic_info:
+            info += "📋 *Основная информация:*\n"
+            for key, value in web_data.basic_info.items():
+                if value:
+                    info += f"• {key.title()}: {value}\n"
+            info += "\n"
+
+        # Направления подготовки
+        if web_data.directions:
+            info += "🎯 *Направления подготовки:*\n"
+            for direction in web_data.directions:
+                info += f"• {direction.code} {direction.name}\n"
+                info += f"  Бюджет: {direction.budget_places}, Контракт: {direction.contract_places}\n"
+            info += "\n"
+
+    # Учебный план
+    if curriculum:
+        info += f"📚 *Учебный план:*\n"
+        info += f"• Всего курсов: {curriculum.total_courses}\n"
+        info += f"• Трудоемкость: {curriculum.total_credits}\n"
+        info += f"• Блоков: {len(curriculum.blocks)}\n\n"
+
+    return info
+
+
+def curriculum_info(programs: Dict[str, Program], program_id: str) -> str:
+    """Детальная информация об учебном плане"""
+    if program_id not in programs:
+        return NOT_FOUND_TEXT
+
+    program = programs[program_id]
+    web_data = program.web_data
+    curriculum = program.curriculum_data
+
+    info = f"📚 *Учебный план - {web_data.program_title if web_data else 'Программа'}*\n\n"
+
+    if not curriculum:
+        return info + "❌ Данные учебного плана не загружены"
+
+    info += f"📊 *Общая статистика:*\n"
+    info += f"• Всего курсов: {curriculum.total_courses}\n"
+    info += f"• Кредитов: {curriculum.total_credits}\n"
+    info += f"• Блоков обучения: {len(curriculum.blocks)}\n\n"
+
+    # Показываем блоки
+    blocks = curriculum.blocks
+    if blocks:
+        info += "📋 *Блоки обучения:*\n"
+        for i, block in enumerate(blocks[:CURRICULUM_BLOCKS_SHOWN], 1):
+            info += f"{i}. *{block.name}*\n"
+            info += f"   Трудоемкость: {block.total_credits} з.ед\n"
+            info += f"   Количество часов: {block.total_hours}\n\n"
+
+        if len(blocks) > CURRICULUM_BLOCKS_SHOWN:
+            info += f"... и еще {len(blocks) - CURRICULUM_BLOCKS_SHOWN} блоков\n"
+        info += "Курсы каждого блока - по кнопке «Все курсы по блокам»\n"
+
+    return info
+
+
+def program_contacts(programs: Dict[str, Program], program_id: str) -> str:
+    """Контактная информация конкретной программы"""
+    if program_id not in programs:
+        return NOT_FOUND_TEXT
+
+    web_data = programs[program_id].web_data
+
+    info = f"📞 *Контакты - {web_data.program_title if web_data else 'Программа'}*\n\n"
+
+    manager = web_data.manager_name if web_data and web_data.manager_name else 'Не указан'
+    contacts = web_data.manager_contacts if web_data else []
+
+    info += f"👤 *Менеджер программы:* {manager}\n\n"
+
+    if contacts:
+        info += "📧 *Контактные данные:*\n"
+        for contact in contacts:
+            info += f"• {contact}\n"
+    else:
+        info += "❌ Контактные данные не указаны\n"
+
+    # Общие контакты ИТМО
+    info += "\n🏛 *Общие контакты ИТМО:*\n"
+    info += "• Сайт: itmo.ru\n"
+    info += "• Приемная комиссия: +7 (812) 457-17-35\n"
+    info += "• Email: admission@itmo.ru\n"
+
+    return info
+
+
+def admission_info_detailed(programs: Dict[str, Program], program_id: str) -> str:
+    """Детальная информация о поступлении"""
+    if program_id not in programs:
+        return NOT_FOUND_TEXT
+
+    web_data = programs[program_id].web_data
+
+    info = f"🎯 *Поступление - {web_data.program_title if web_data else 'Программа'}*\n\n"
+
+    if web_data and web_data.directions:
+        cost = web_data.basic_info.get('стоимость контрактного обучения (год)')
+
+        info += "📋 *Направления подготовки:*\n\n"
+        for direction in web_data.directions:
+            info += f"*{direction.code} {direction.name}*\n"
+            info += f"• Бюджетных мест: {direction.budget_places}\n"
+            info += f"• Контрактных мест: {direction.contract_places}\n"
+
+            # Стоимость
+            if cost:
+                info += f"• Стоимость: {cost}\n"
+
+            info += "\n"
+
+    # Общая информация о поступлении
+    info += "📅 *Важные даты:*\n"
+    info += "• Подача документов: июнь-июль\n"
+    info += "• Вступительные испытания: июль-август\n"
+    info += "• Зачисление: август\n\n"
+
+    info += "📝 *Документы:*\n"
+    info += "• Диплом бакалавра/специалиста\n"
+    info += "• Паспорт\n"
+    info += "• Фотографии 3x4\n"
+    info += "• Заявление\n"
+
+    return info
+
+
+def compare_programs(programs: Dict[str, Program]) -> str:
+    """Сравнение всех программ снимка (без NumPy вместо выбора программ)"""
+    if len(programs) < 2:
+        return "❌ Недостаточно данных для сравнения"
+
+    comparison = "🔄 *Сравнение программ*\n\n"
+
+    comparison += "💰 *Стоимость:*\n"
+    for program in programs.values():
+        web_data = program.web_data
+        cost = web_data.basic_info.get('стоимость контрактного обучения (год)', 'Не указано') if web_data else 'Не указано'
+        comparison += f"• {program.title}: {cost}\n"
+
+    comparison += "\n🎯 *Направления подготовки:*\n"
+    for program in programs.values():
+        directions = len(program.web_data.directions) if program.web_data else 0
+        comparison += f"• {program.title}: {directions} направлений\n"
+
+    comparison += "\n📚 *Учебный план:*\n"
+    for program in programs.values():
+        curriculum = program.curriculum_data
+        courses = f"{curriculum.total_courses} курсов" if curriculum else "нет данных"
+        comparison += f"• {program.title}: {courses}\n"
+
+    return comparison
+
+
+def cost_info(programs: Dict[str, Program]) -> str:
+    """Информация о стоимости"""
+    info = "💰 *Стоимость обучения:*\n\n"
+
+    for program in programs.values():
+        web_data = program.web_data
+        cost = web_data.basic_info.get('стоимость контрактного обучения (год)', 'Не указано') if web_data else 'Не указано'
+
+        info += f"• *{program.title}*: {cost}\n"
+
+    return info
+
+
+def contacts_info(programs: Dict[str, Program]) -> str:
+    """Контактная информация"""
+    info = "📞 *Контакты:*\n\n"
+
+    for program in programs.values():
+        web_data = program.web_data
+        manager = web_data.manager_name if web_data and web_data.manager_name else 'Не указан'
+        contacts = web_data.manager_contacts if web_data else []
+
+        info += f"*{program.title}:*\n"
+        info += f"Менеджер: {manager}\n"
+
+        for contact in contacts:
+            info += f"• {contact}\n"
+
+        info += "\n"
+
+    return info
+
+
+def admission_info(programs: Dict[str, Program]) -> str:
+    """Информация о поступлении"""
+    info = "🎯 *Поступление:*\n\n"
+
+    for program in programs.values():
+        directions = program.web_data.directions if program.web_data else []
+
+        info += f"*{program.title}:*\n"
+
+        for direction in directions:
+            info += f"• {direction.code} {direction.name}\n"
+            info += f"  Бюджет: {direction.budget_places} мест\n"
+            info += f"  Контракт: {direction.contract_places} мест\n"
+
+        info += "\n"
+
+    return info
+
+
+def courses_info(programs: Dict[str, Program]) -> str:
+    """Информация о курсах"""
+    info = "📚 *Учебные планы:*\n\n"
+    budget = COURSES_OVERVIEW_BUDGET - message_length(info) - message_length(ALL_COURSES_HINT)
+
+    for number, program in enumerate(programs.values()):
+        curriculum = program.curriculum_data
+
+        section = f"*{program.title}:*\n"
+
+        if curriculum:
+            section += f"• Всего курсов: {curriculum.total_courses}\n"
+            section += f"• Кредитов: {curriculum.total_credits}\n"
+
+            if curriculum.blocks:
+                section += "• Основные блоки:\n"
+                for block in curriculum.blocks[:COURSES_OVERVIEW_BLOCKS_SHOWN]:
+                    section += f"  - {block.name} ({block.total_credits} зет)\n"
+                if len(curriculum.blocks) > COURSES_OVERVIEW_BLOCKS_SHOWN:
+                    section += f"  ... и еще {len(curriculum.blocks) - COURSES_OVERVIEW_BLOCKS_SHOWN} блоков\n"
+        else:
+            section += "• Данные учебного плана загружаются...\n"
+
+        section += "\n"
+
+        # Программы, не поместившиеся в одно сообщение, только перечисляем числом
+        budget -= message_length(section)
+        if budget < 0:
+            info += f"... и еще {len(programs) - number} программ\n\n"
+            break
+        info += section
+
+    return info + ALL_COURSES_HINT
+
+
+def duration_info(programs: Dict[str, Program]) -> str:
+    """Информация о длительности"""
+    info = "⏱ *Длительность обучения:*\n\n"
+
+    for program in programs.values():
+        web_data = program.web_data
+        duration = web_data.basic_info.get('длительность', 'Не указано') if web_data else 'Не указано'
+
+        info += f"• *{program.title}*: {duration}\n"
+
+    return info
+
+
+def message_length(text: str) -> int:
+    """Длина текста так, как ее считает Telegram (UTF-16)"""
+    return len(text.encode('utf-16-le')) // 2
+
+
+def escape_markdown(text: str) -> str:
+    """Экранирование пользовательского текста для parse_mode=Markdown"""
+    for char in ('_', '*', '`', '['):
+        text = text.replace(char, f"\\{char}")
+    return text
+
+
+def search_results(query: str, result: SearchResult) -> str:
+    """Результаты поиска курсов"""
+    query = escape_markdown(query)
+    if not result.hits:
+        return f"🔎 По запросу «{query}» курсы не найдены"
+
+    info = f"🔎 *Найдено курсов: {result.total}* по запросу «{query}»\n\n"
+
+    for number, hit in enumerate(result.hits, 1):
+        course = hit.course
+        semester = f"{course.semester} семестр" if course.semester is not None else "семестр не указан"
+        info += f"{number}. *{escape_markdown(course.name)}*\n"
+        info += f"   🎓 {escape_markdown(hit.program_title)}\n"
+        info += f"   📅 {semester} • {course.credits} зет • {course.hours} ч\n"
+        info += f"   📂 {escape_markdown(hit.block.name)}\n"
+
+    if result.total > len(result.hits):
+        info += f"\n_...и еще {result.total - len(result.hits)}. Уточните запрос_"
+
+    return info
+
+
+def fuzzy_course_results(matches: List[FuzzyMatch]) -> str:
+    """Курсы, похожие на вопрос пользователя"""
+    info = "🔍 *Возможно, вы ищете курс:*\n\n"
+
+    for match in matches:
+        info += f"*{escape_markdown(match.name)}* (совпадение {match.similarity:.0%})\n"
+        # Один курс может читаться в нескольких семестрах - группируем по программе
+        by_program: Dict[str, List[Course]] = {}
+        for program_title, course in match.occurrences:
+            by_program.setdefault(program_title, []).append(course)
+
+        for program_title, courses in by_program.items():
+            semesters = sorted({course.semester for course in courses if course.semester is not None})
+            semester = f"{', '.join(map(str, semesters))} семестр" if semesters else "семестр не указан"
+            credits = '/'.join(map(str, sorted({course.credits for course in courses})))
+            info += f"  • {escape_markdown(program_title)}: {semester}, {credits} зет\n"
+        info += "\n"
+
+    return info
+
+
+def retrieval_results(hits: List[PassageHit]) -> str:
+    """Фрагменты данных программ, найденные по вопросу"""
+    info = "📖 *Вот что я нашел:*\n\n"
+
+    for hit in hits:
+        info += f"• *{escape_markdown(hit.passage.program_title)}*: {escape_markdown(hit.passage.text)}\n"
+
+    return info
+
+
+def change_notification(program_title: str, lines: List[str]) -> str:
+    """Уведомление подписчику об изменениях программы"""
+    info = f"🔔 *Изменения в программе «{escape_markdown(program_title)}»*\n\n"
+
+    for line in lines:
+        info += f"• {escape_markdown(line)}\n"
+
+    info += "\n_Отключить уведомления: кнопка в меню программы или /unsubscribe_"
+    return info
+
+
+def subscriptions_list(programs: Dict[str, Program], program_ids: List[str]) -> str:
+    """Подписки пользователя"""
+    if not program_ids:
+        return (
+            "🔕 *Вы не подписаны на изменения программ*\n\n"
+            "Откройте программу в /programs и нажмите «🔔 Уведомлять об изменениях»"
+        )
+
+    info = "🔔 *Вы получаете уведомления об изменениях:*\n\n"
+    for program_id in program_ids:
+        program = programs.get(program_id)
+        info += f"• {program.title if program else program_id}\n"
+
+    info += "\nОтписаться от всех программ: /unsubscribe"
+    return info
+
+
+def similar_programs(program_title: str, overlaps: List[ProgramOverlap]) -> str:
+    """Программы с общими курсами"""
+    info = f"🧭 *Программы, похожие на «{escape_markdown(program_title)}»*\n\n"
+    if not overlaps:
+        return info + "Общих курсов с другими программами не найдено"
+
+    for number, overlap in enumerate(overlaps[:SIMILAR_PROGRAMS_SHOWN], 1):
+        info += f"{number}. *{escape_markdown(overlap.title)}*\n   Общих курсов: {overlap.exact}"
+        if overlap.similar:
+            info += f", еще {overlap.similar} с похожими названиями"
+        info += f"\n   Курсов с парой в другой программе: {overlap.similarity:.0%}\n"
+
+    info += "\nНажмите на программу, чтобы увидеть общие курсы"
+    return info
+
+
+def shared_courses(program_title: str, other_title: str, shared: List[SharedCourse]) -> str:
+    """Общие курсы двух программ (похожие названия отмечены ≈)"""
+    # Курсы с похожими названиями - первыми: их немного, и под лимит длины попадают одинаковые.
+    # Число одинаковых совпадает с числом общих курсов в сравнении программ
+    shared = sorted(shared, key=lambda course: course.exact)
+    exact = sum(course.exact for course in shared)
+    info = (f"🔗 *Общие курсы*\n«{escape_markdown(program_title)}» и «{escape_markdown(other_title)}»\n\n"
+            f"Общих курсов: {exact}\n")
+    if len(shared) > exact:
+        info += f"С похожими названиями (≈): {len(shared) - exact}\n"
+    info += "\n"
+
+    budget = SHARED_COURSES_BUDGET
+    for number, course in enumerate(shared, 1):
+        line = f"{number}. {escape_markdown(course.name)}"
+        if not course.exact:
+            line += f" ≈ {escape_markdown(course.other_name)}"
+        budget -= message_length(line) + 1
+        if budget < 0:
+            info += f"... и еще {len(shared) - number + 1}\n"
+            break
+        info += line + "\n"
+
+    return info
+
+
+# Экраны конкретной программы и сводные экраны по всем программам
+PROGRAM_SCREENS: Dict[str, Callable[[Dict[str, Program], str], str]] = {
+    'program': program_info,
+    'curriculum': curriculum_info,
+    'contacts': program_contacts,
+    'admission': admission_info_detailed,
+}
+
+SUMMARY_SCREENS: Dict[str, Callable[[Dict[str, Program]], str]] = {
+    'programs': programs_list,
+    'compare': compare_programs,
+    'cost': cost_info,
+    'contacts_all': contacts_info,
+    'admission_all': admission_info,
+    'courses_all': courses_info,
+    'duration': duration_info,
+}
+
+PROGRAM_KEYBOARDS: Dict[str, Callable[[str], InlineKeyboardMarkup]] = {
+    'program': program_keyboard,
+    'back_program': back_to_program_keyboard,
+    'curriculum': partial(curriculum_keyboard, pdf_available=False),
+    'curriculum_pdf': partial(curriculum_keyboard, pdf_available=True),
+}
+
+
+class RenderedViews:
+    """Экраны и клавиатуры, отрисованные один раз для снимка данных"""
+    __slots__ = ('texts', 'keyboards')
+
+    def __init__(self, programs: Dict[str, Program]):
+        self.texts: Dict[Tuple[str, Optional[str]], str] = {}
+        self.keyboards: Dict[Tuple[str, Optional[str]], InlineKeyboardMarkup] = {
+            ('main', None): main_keyboard(),
+            ('back_main', None): back_main_keyboard(),
+            ('programs', None): programs_keyboard(programs),
+        }
+
+        for screen, render in SUMMARY_SCREENS.items():
+            self.texts[(screen, None)] = render(programs)
+
+        for program_id in programs:
+            for screen, render in PROGRAM_SCREENS.items():
+                self.texts[(screen, program_id)] = render(programs, program_id)
+            for name, build in PROGRAM_KEYBOARDS.items():
+                self.keyboards[(name, program_id)] = build(program_id)
+
+    def text(self, screen: str, program_id: Optional[str] = None) -> str:
+        """Готовый текст экрана"""
+        return self.texts.get((screen, program_id), NOT_FOUND_TEXT)
+
+    def keyboard(self, name: str, program_id: Optional[str] = None) -> InlineKeyboardMarkup:
+        """Готовая клавиатура"""
+        keyboard = self.keyboards.get((name, program_id))
+        if keyboard is None:
+            # Кнопки из старых сообщений могут ссылаться на программу, которой нет в снимке
+            keyboard = PROGRAM_KEYBOARDS[name](program_id)
+        return keyboard
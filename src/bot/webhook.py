@@ -0,0 +1,76 @@
+import asyncio
+import logging
+from typing import Any, Dict, Optional, Set
+
+from aiogram import Bot, Dispatcher
+from aiogram.webhook.aiohttp_server import SimpleRequestHandler
+from aiohttp import web
+
+logger = logging.getLogger(__name__)
+
+# Сколько секунд при остановке ждать обработки уже принятых обновлений
+DRAIN_TIMEOUT = 30.0
+
+
+class LimitedRequestHandler(SimpleRequestHandler):
+    """Прием обновлений от Telegram с ограничением одновременной обработки
+
+    Обновление обрабатывается в отдельной задаче, но не больше max_concurrency
+    одновременно: пока свободного слота нет, ответ Telegram задерживается,
+    и Telegram сам притормаживает отправку вместо роста очереди в памяти.
+    При остановке новые обновления не принимаются (503, Telegram повторит их
+    позже), а уже принятые дорабатываются.
+    """
+
+    def __init__(self, dispatcher: Dispatcher, bot: Bot, max_concurrency: int,
+                 secret_token: Optional[str] = None, **data: Any):
+        super().__init__(dispatcher, bot, handle_in_background=True, secret_token=secret_token, **data)
+        self.max_concurrency = max_concurrency
+        self._slots = asyncio.Semaphore(max_concurrency)
+        self._tasks: Set[asyncio.Task] = set()
+        self._closing = False
+
+    @property
+    def in_flight(self) -> int:
+        """Число обновлений в обработке"""
+        return len(self._tasks)
+
+    async def _handle_request_background(self, bot: Bot, request: web.Request) -> web.Response:
+        if self._closing:
+            return web.Response(status=503)
+
+        update = await request.json(loads=bot.session.json_loads)
+
+        await self._slots.acquire()
+        if self._closing:
+            # Остановка началась, пока запрос ждал слота
+            self._slots.release()
+            return web.Response(status=503)
+
+        task = asyncio.create_task(self._process(bot, update))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+        return web.json_response({}, dumps=bot.session.json_dumps)
+
+    async def _process(self, bot: Bot, update: Dict[str, Any]) -> None:
+        try:
+            await self._background_feed_update(bot, update)
+        except Exception:
+            logger.exception(f"Ошибка обработки обновления {update.get('update_id')}")
+        finally:
+            self._slots.release()
+
+    async def close(self) -> None:
+        """Дожидаемся принятых обновлений (сессию бота закрывает ITMOBot.stop)"""
+        self._closing = True
+        if not self._tasks:
+            return
+
+        logger.info(f"Ожидание обработки {len(self._tasks)} обновлений...")
+        _, pending = await asyncio.wait(set(self._tasks), timeout=DRAIN_TIMEOUT)
+        if pending:
+            logger.warning(f"Не дождались обработки {len(pending)} обновлений")
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
@@ -0,0 +1,128 @@
+import asyncio
+import random
+import time
+from collections import Counter, deque
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+from aiohttp import web
+
+# Локальная заглушка Telegram Bot API для нагрузочного тестирования.
+# Бот подключается к ней через TELEGRAM_API_URL. Обновления выдаются
+# через getUpdates из очереди, которую наполняет генератор нагрузки, а
+# ответы бота (sendMessage, editMessageText, sendDocument) принимаются
+# с настраиваемой задержкой и передаются в on_reply для подсчета задержек.
+
+# Методы, которыми бот отвечает пользователю
+REPLY_METHODS = frozenset({'sendMessage', 'editMessageText', 'sendDocument'})
+
+BOT_USER = {'id': 123456, 'is_bot': True, 'first_name': 'ITMO Load Test', 'username': 'itmo_load_test_bot'}
+
+# Максимум обновлений в одном ответе getUpdates (как у Telegram)
+UPDATES_LIMIT = 100
+
+
+class FakeBotAPI:
+    """Заглушка Bot API: очередь обновлений и прием ответов бота"""
+
+    def __init__(self, latency: float = 0.0, jitter: float = 0.0,
+                 on_reply: Optional[Callable[[str, int, float], None]] = None):
+        self.latency = latency
+        self.jitter = jitter
+        self.on_reply = on_reply
+        self.calls: Counter = Counter()
+        self.polls = 0
+
+        self._updates: Deque[Tuple[int, Dict[str, Any]]] = deque()
+        self._next_update_id = 1
+        self._new_updates = asyncio.Event()
+        self._message_id = 0
+        self._runner: Optional[web.AppRunner] = None
+
+    def push_update(self, update: Dict[str, Any]) -> int:
+        """Обновление для getUpdates; возвращает присвоенный update_id"""
+        update_id = self._next_update_id
+        self._next_update_id += 1
+        self._updates.append((update_id, {'update_id': update_id, **update}))
+        self._new_updates.set()
+        return update_id
+
+    @property
+    def queued(self) -> int:
+        """Обновления, еще не подтвержденные ботом"""
+        return len(self._updates)
+
+    async def _delay(self) -> None:
+        delay = self.latency + (random.uniform(-self.jitter, self.jitter) if self.jitter else 0.0)
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    def _message(self, chat_id: int, **fields: Any) -> Dict[str, Any]:
+        self._message_id += 1
+        return {
+            'message_id': self._message_id,
+            'date': int(time.time()),
+            'chat': {'id': chat_id, 'type': 'private'},
+            'from': BOT_USER,
+            **fields
+        }
+
+    async def _get_updates(self, params: Dict[str, Any]) -> List[Dict[str, Any]]:
+        offset = int(params.get('offset') or 0)
+        timeout = float(params.get('timeout') or 0)
+        limit = min(int(params.get('limit') or UPDATES_LIMIT), UPDATES_LIMIT)
+
+        # Обновления до offset бот уже получил
+        while self._updates and self._updates[0][0] < offset:
+            self._updates.popleft()
+
+        if not self._updates and timeout > 0:
+            self._new_updates.clear()
+            try:
+                await asyncio.wait_for(self._new_updates.wait(), timeout=timeout)
+            except asyncio.TimeoutError:
+                pass
+
+        return [update for _, update in list(self._updates)[:limit]]
+
+    async def _handle(self, request: web.Request) -> web.Response:
+        method = request.match_info['method']
+        if request.content_type == 'application/json':
+            params = await request.json()
+        else:
+            params = dict(await request.post())
+        self.calls[method] += 1
+
+        if method == 'getUpdates':
+            self.polls += 1
+            return self._ok(await self._get_updates(params))
+        if method == 'getMe':
+            return self._ok(BOT_USER)
+
+        await self._delay()
+
+        chat_id = int(params.get('chat_id') or 0)
+        if method in REPLY_METHODS and self.on_reply is not None:
+            self.on_reply(method, chat_id, time.monotonic())
+
+        if method in ('sendMessage', 'editMessageText'):
+            return self._ok(self._message(chat_id, text=str(params.get('text', ''))))
+        if method == 'sendDocument':
+            document = {'file_id': f"load-test-document-{chat_id}", 'file_unique_id': 'load-test-document'}
+            return self._ok(self._message(chat_id, document=document))
+        return self._ok(True)
+
+    @staticmethod
+    def _ok(result: Any) -> web.Response:
+        return web.json_response({'ok': True, 'result': result})
+
+    async def start(self, host: str, port: int) -> None:
+        app = web.Application(client_max_size=64 * 1024 * 1024)
+        app.router.add_post('/bot{token}/{method}', self._handle)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, host, port).start()
+
+    async def stop(self) -> None:
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
@@ -0,0 +1,171 @@
+import asyncio
+import math
+import random
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, Tuple
+
+# Генератор нагрузки: поток обновлений с заданной интенсивностью.
+# Пользователи ведут себя как люди: новое действие пользователь делает
+# только после ответа бота и паузы THINK_TIME, поэтому задержка считается
+# от отправки обновления до первого ответа бота в этот чат. Интервалы между
+# обновлениями - экспоненциальные (пуассоновский поток).
+
+# Доли типов обновлений
+MIX = (
+    ('start', 0.15),
+    ('callback', 0.55),
+    ('text', 0.30),
+)
+
+CALLBACKS = (
+    'show_programs', 'program_ai', 'program_ai_product', 'curriculum_ai', 'curriculum_ai_product',
+    'contacts_ai', 'contacts_ai_product', 'admission_ai', 'admission_ai_product',
+    'compare_programs', 'back_main', 'show_help', 'download_pdf_ai',
+)
+
+QUESTIONS = (
+    'сколько стоит обучение', 'контакты менеджера', 'как поступить', 'есть ли общежитие',
+    'сколько бюджетных мест', 'какие есть курсы', 'машинное обучение', 'нейроные сети',
+    'сроки обучения', 'глубокое обучение', 'компьютерное зрение', 'что такое ПИШ',
+    'военный учебный центр', 'обработка естественного языка', 'абырвалг',
+)
+
+# Пауза пользователя между ответом бота и следующим действием (секунды)
+THINK_TIME = 1.0
+
+# Первый chat_id пользователей генератора
+FIRST_CHAT_ID = 10_000_000
+
+
+def _user(chat_id: int) -> Dict[str, Any]:
+    return {'id': chat_id, 'is_bot': False, 'first_name': 'Абитуриент', 'language_code': 'ru'}
+
+
+def _chat(chat_id: int) -> Dict[str, Any]:
+    return {'id': chat_id, 'type': 'private', 'first_name': 'Абитуриент'}
+
+
+class UpdateFactory:
+    """Обновления Telegram (без update_id) в пропорциях MIX"""
+
+    def __init__(self, seed: Optional[int] = None):
+        self.random = random.Random(seed)
+        self._kinds = [kind for kind, _ in MIX]
+        self._weights = [weight for _, weight in MIX]
+        self._message_id = 0
+
+    def make(self, chat_id: int) -> Tuple[str, Dict[str, Any]]:
+        kind = self.random.choices(self._kinds, self._weights)[0]
+        self._message_id += 1
+        now = int(time.time())
+
+        if kind == 'callback':
+            data = self.random.choice(CALLBACKS)
+            return data, {'callback_query': {
+                'id': f"{chat_id}-{self._message_id}",
+                'from': _user(chat_id),
+                'chat_instance': str(chat_id),
+                'data': data,
+                # Сообщение бота с кнопками, которое будет отредактировано
+                'message': {'message_id': self._message_id, 'date': now, 'chat': _chat(chat_id), 'text': '...'},
+            }}
+
+        text = '/start' if kind == 'start' else self.random.choice(QUESTIONS)
+        message = {'message_id': self._message_id, 'date': now, 'chat': _chat(chat_id),
+                   'from': _user(chat_id), 'text': text}
+        if kind == 'start':
+            message['entities'] = [{'type': 'bot_command', 'offset': 0, 'length': len(text)}]
+        return kind, {'message': message}
+
+
+def percentile(values: List[float], q: float) -> float:
+    """Перцентиль по отсортированному списку (метод ближайшего ранга)"""
+    if not values:
+        return float('nan')
+    return values[max(0, math.ceil(q * len(values)) - 1)]
+
+
+class StepResult:
+    """Итоги одной ступени нагрузки"""
+
+    def __init__(self, rate: float, duration: float):
+        self.rate = rate
+        self.duration = duration
+        self.sent = 0
+        self.skipped = 0
+        self.latencies: List[float] = []
+
+    @property
+    def completed(self) -> int:
+        return len(self.latencies)
+
+    @property
+    def throughput(self) -> float:
+        return self.completed / self.duration if self.duration else 0.0
+
+    def quantiles(self) -> Tuple[float, float, float]:
+        values = sorted(self.latencies)
+        return percentile(values, 0.5), percentile(values, 0.95), percentile(values, 0.99)
+
+
+class LatencyTracker:
+    """Свободные пользователи и задержки ответов по ступеням"""
+
+    def __init__(self, users: int):
+        self._idle: Deque[Tuple[float, int]] = deque((0.0, FIRST_CHAT_ID + i) for i in range(users))
+        self._pending: Dict[int, Tuple[StepResult, float]] = {}
+
+    def acquire_user(self, now: float) -> Optional[int]:
+        """Пользователь, готовый сделать следующее действие"""
+        if self._idle and self._idle[0][0] <= now:
+            return self._idle.popleft()[1]
+        return None
+
+    def sent(self, chat_id: int, step: StepResult, now: float) -> None:
+        self._pending[chat_id] = (step, now)
+        step.sent += 1
+
+    def on_reply(self, method: str, chat_id: int, now: float) -> None:
+        # Засчитывается первый ответ; остальные ответы на то же действие игнорируются
+        pending = self._pending.pop(chat_id, None)
+        if pending is None:
+            return
+        step, sent_at = pending
+        step.latencies.append(now - sent_at)
+        self._idle.append((now + THINK_TIME, chat_id))
+
+    def outstanding(self, step: StepResult) -> int:
+        return sum(1 for pending_step, _ in self._pending.values() if pending_step is step)
+
+
+async def run_step(rate: float, duration: float, tracker: LatencyTracker, factory: UpdateFactory,
+                   submit: Callable[[Dict[str, Any]], Awaitable[None]], drain: float) -> StepResult:
+    """Пуассоновский поток обновлений с интенсивностью rate в течение duration секунд,
+    затем ожидание ответов не дольше drain секунд"""
+    step = StepResult(rate, duration)
+    started = time.monotonic()
+    next_at = started
+
+    while True:
+        next_at += factory.random.expovariate(rate)
+        if next_at - started >= duration:
+            break
+        delay = next_at - time.monotonic()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+        now = time.monotonic()
+        chat_id = tracker.acquire_user(now)
+        if chat_id is None:
+            step.skipped += 1
+            continue
+        _, update = factory.make(chat_id)
+        tracker.sent(chat_id, step, now)
+        await submit(update)
+
+    deadline = time.monotonic() + drain
+    while tracker.outstanding(step) and time.monotonic() < deadline:
+        await asyncio.sleep(0.1)
+
+    return step
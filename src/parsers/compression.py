@@ -0,0 +1,131 @@
+import gzip
+import io
+import struct
+from pathlib import Path
+from typing import IO, Optional, Union
+
+try:
+    import zstandard
+    ZSTD_AVAILABLE = True
+except ImportError:
+    ZSTD_AVAILABLE = False
+
+# Формат снимка определяется расширением файла
+SUFFIXES = {
+    None: '.json',
+    'gzip': '.json.gz',
+    'zstd': '.json.zst',
+}
+
+CHUNK_SIZE = 1 << 16
+
+
+def snapshot_suffix(compression: Optional[str]) -> str:
+    """Расширение файла для выбранного сжатия"""
+    if compression not in SUFFIXES:
+        raise ValueError(f"Неизвестный формат сжатия: {compression}")
+    if compression == 'zstd' and not ZSTD_AVAILABLE:
+        raise ValueError("Для сжатия zstd установите: pip install zstandard")
+    return SUFFIXES[compression]
+
+
+def detect_compression(path: Path) -> Optional[str]:
+    """Определение сжатия по расширению файла"""
+    name = path.name
+    if name.endswith('.gz'):
+        return 'gzip'
+    if name.endswith('.zst'):
+        return 'zstd'
+    return None
+
+
+def open_text_writer(path: Path) -> IO[str]:
+    """Открытие файла на запись текста со сжатием по расширению"""
+    compression = detect_compression(path)
+
+    if compression == 'gzip':
+        return gzip.open(path, 'wt', encoding='utf-8')
+
+    if compression == 'zstd':
+        if not ZSTD_AVAILABLE:
+            raise ValueError("Для сжатия zstd установите: pip install zstandard")
+        raw = open(path, 'wb')
+        # closefd=True: закрытие обертки закрывает и файл
+        writer = zstandard.ZstdCompressor(level=10, write_content_size=True).stream_writer(raw, closefd=True)
+        return io.TextIOWrapper(writer, encoding='utf-8')
+
+    return open(path, 'w', encoding='utf-8')
+
+
+def read_bytes(path: Path) -> Union[bytes, bytearray]:
+    """Чтение файла с потоковой распаковкой.
+
+    Сжатые данные читаются блоками и распаковываются сразу в буфер,
+    размер которого по возможности берется из заголовка/хвоста файла,
+    поэтому в памяти никогда не лежат одновременно сжатые и распакованные байты.
+    """
+    compression = detect_compression(path)
+
+    if compression is None:
+        return path.read_bytes()
+
+    with open(path, 'rb') as raw:
+        if compression == 'gzip':
+            size_hint = _gzip_size_hint(raw)
+            with gzip.GzipFile(fileobj=raw, mode='rb') as reader:
+                return _read_stream(reader, size_hint)
+
+        if not ZSTD_AVAILABLE:
+            raise ValueError("Для чтения zstd установите: pip install zstandard")
+
+        size_hint = _zstd_size_hint(raw)
+        with zstandard.ZstdDecompressor().stream_reader(raw, read_size=CHUNK_SIZE) as reader:
+            return _read_stream(reader, size_hint)
+
+
+def _gzip_size_hint(raw: IO[bytes]) -> int:
+    """Размер распакованных данных из поля ISIZE (последние 4 байта gzip)"""
+    try:
+        raw.seek(-4, io.SEEK_END)
+        size = struct.unpack('<I', raw.read(4))[0]
+    except (OSError, struct.error):
+        size = 0
+    raw.seek(0)
+    return size
+
+
+def _zstd_size_hint(raw: IO[bytes]) -> int:
+    """Размер распакованных данных из заголовка кадра zstd"""
+    header = raw.read(18)
+    raw.seek(0)
+    try:
+        size = zstandard.frame_content_size(header)
+    except zstandard.ZstdError:
+        return 0
+    return max(size, 0)
+
+
+def _read_stream(reader, size_hint: int) -> bytearray:
+    """Чтение потока в заранее выделенный буфер"""
+    buffer = bytearray(size_hint)
+    position = 0
+
+    with memoryview(buffer) as view:
+        while position < size_hint:
+            count = reader.readinto(view[position:])
+            if not count:
+                break
+            position += count
+
+    if position < size_hint:
+        del buffer[position:]
+
+    # Подсказка размера могла оказаться меньше реальной (например, многотомный gzip)
+    while True:
+        chunk = reader.read(CHUNK_SIZE)
+        if not chunk:
+            break
+        buffer.extend(chunk)
+
+    # bytearray отдается как есть: копия в bytes удвоила бы пик памяти
+    return buffer
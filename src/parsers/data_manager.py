@@ -1,13 +1,20 @@
 import json
+import os
 import shutil
+import tempfile
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, Any
+from typing import Dict, Any, Optional
+
+from .compression import SUFFIXES, open_text_writer, read_bytes, snapshot_suffix
+from .models import Program
+from .schema import load_snapshot
+from .snapshot_diff import diff_snapshots
 
 class DataManager:
     """Менеджер для сохранения и загрузки данных"""
     
-    def __init__(self, project_root: Path = None):
+    def __init__(self, project_root: Path = None, compression: Optional[str] = None):
         if project_root is None:
             current_dir = Path(__file__).resolve()
             project_root = current_dir.parent.parent.parent
@@ -16,6 +23,11 @@ class DataManager:
         self.pdf_dir = project_root / "data" / "pdf"
         self.output_dir = project_root / "data" / "parsed"
         
+        # Формат полного снимка: None (JSON), 'gzip' или 'zstd'
+        self.compression = compression
+        self.snapshot_suffix = snapshot_suffix(compression)
+        self.latest_file = self.output_dir / f"latest_complete{self.snapshot_suffix}"
+        
         # Создаем директории
         self.pdf_dir.mkdir(parents=True, exist_ok=True)
         self.output_dir.mkdir(parents=True, exist_ok=True)
@@ -24,10 +36,14 @@ class DataManager:
         """Сохранение результатов парсинга"""
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         
+        # Изменения относительно предыдущего снимка (до перезаписи latest)
+        self.save_changes(results)
+        
         # Полные данные
-        full_filename = self.output_dir / f"itmo_complete_{timestamp}.json"
-        with open(full_filename, 'w', encoding='utf-8') as f:
-            json.dump(results, f, ensure_ascii=False, indent=2)
+        full_filename = self.output_dir / f"itmo_complete_{timestamp}{self.snapshot_suffix}"
+        with open_text_writer(full_filename) as f:
+            # Сжатые снимки пишем без отступов - их все равно не читают глазами
+            json.dump(results, f, ensure_ascii=False, indent=None if self.compression else 2)
         
         # Краткая сводка
         summary = self.create_summary(results)
@@ -36,17 +52,52 @@ class DataManager:
             json.dump(summary, f, ensure_ascii=False, indent=2)
         
         # Создаем копии как "latest" версии (вместо symlink для Windows)
-        latest_full = self.output_dir / "latest_complete.json"
+        latest_full = self.latest_file
         latest_summary = self.output_dir / "latest_summary.json"
         
-        # Копируем файлы
-        shutil.copy2(full_filename, latest_full)
-        shutil.copy2(summary_filename, latest_summary)
+        # Копируем файлы атомарно: бот может перечитать latest в любой момент
+        self._atomic_copy(full_filename, latest_full)
+        self._atomic_copy(summary_filename, latest_summary)
         
         print(f"💾 Результаты сохранены:")
         print(f"   Полные данные: {full_filename}")
         print(f"   Сводка: {summary_filename}")
-        print(f"   Последние версии: latest_complete.json, latest_summary.json")
+        print(f"   Последние версии: {latest_full.name}, {latest_summary.name}")
+    
+    def _atomic_copy(self, src: Path, dst: Path) -> None:
+        """Копирование через временный файл и os.replace"""
+        fd, tmp_name = tempfile.mkstemp(dir=dst.parent, prefix=f".{dst.name}.", suffix='.tmp')
+        os.close(fd)
+        try:
+            shutil.copy2(src, tmp_name)
+            os.replace(tmp_name, dst)
+        except BaseException:
+            Path(tmp_name).unlink(missing_ok=True)
+            raise
+    
+    def save_changes(self, results: Dict[str, Any]) -> None:
+        """Сохранение структурного diff с предыдущим снимком в latest_changes.json"""
+        latest_file = self.find_latest_file()
+        if latest_file is None:
+            return
+        
+        try:
+            previous = json.loads(read_bytes(latest_file))
+        except Exception as e:
+            print(f"⚠️ Не удалось прочитать предыдущий снимок для сравнения: {e}")
+            return
+        
+        changeset = diff_snapshots(previous, results)
+        
+        changes_filename = self.output_dir / "latest_changes.json"
+        with open(changes_filename, 'w', encoding='utf-8') as f:
+            json.dump(changeset.to_dict(), f, ensure_ascii=False, indent=2)
+        
+        if changeset:
+            print(f"🔀 Изменений с прошлого запуска: {len(changeset.changes)} "
+                  f"(программы: {', '.join(changeset.changed_programs)})")
+        else:
+            print("🔀 Данные не изменились с прошлого запуска")
     
     def create_summary(self, results: Dict[str, Any]) -> Dict[str, Any]:
         """Создание сводки результатов"""
@@ -82,16 +133,33 @@ class DataManager:
         
         return summary
     
-    def load_latest_data(self) -> Dict[str, Any]:
-        """Загрузка последних данных"""
-        latest_file = self.output_dir / "latest_complete.json"
+    def find_latest_file(self) -> Optional[Path]:
+        """Поиск последнего полного снимка в любом из поддерживаемых форматов"""
+        candidates = []
+        for suffix in SUFFIXES.values():
+            path = self.output_dir / f"latest_complete{suffix}"
+            try:
+                candidates.append((path.stat().st_mtime_ns, path))
+            except FileNotFoundError:
+                continue
         
-        if not latest_file.exists():
+        if not candidates:
+            return None
+        
+        return max(candidates)[1]
+    
+    def load_snapshot(self, path: Path) -> Dict[str, Program]:
+        """Загрузка и валидация снимка данных (ошибки пробрасываются)"""
+        return load_snapshot(read_bytes(path))
+    
+    def load_latest_data(self) -> Dict[str, Program]:
+        """Загрузка последних данных"""
+        latest_file = self.find_latest_file()
+        if latest_file is None:
             return {}
         
         try:
-            with open(latest_file, 'r', encoding='utf-8') as f:
-                return json.load(f)
+            return self.load_snapshot(latest_file)
         except Exception as e:
             print(f"❌ Ошибка загрузки данных: {e}")
             return {}
\ No newline at end of file
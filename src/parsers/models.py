@@ -0,0 +1,216 @@
+import sys
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+# Компактная типизированная модель данных программ.
+# Классы повторяют структуру JSON, которую собирает парсер, но хранятся
+# в __slots__ без словаря атрибутов, а повторяющиеся строки интернируются.
+
+_intern = sys.intern
+
+
+def _intern_optional(value: Optional[str]) -> Optional[str]:
+    return _intern(value) if value is not None else None
+
+
+@dataclass
+class Course:
+    """Курс учебного плана"""
+    __slots__ = ('name', 'credits', 'hours', 'semester')
+
+    name: str
+    credits: int
+    hours: int
+    semester: Optional[int]
+
+    def __post_init__(self):
+        self.name = _intern(self.name)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'name': self.name,
+            'credits': self.credits,
+            'hours': self.hours,
+            'semester': self.semester
+        }
+
+
+@dataclass
+class SubBlock:
+    """Подблок учебного плана (например, обязательные дисциплины семестра)"""
+    __slots__ = ('name', 'semester', 'total_credits', 'total_hours', 'courses')
+
+    name: str
+    semester: Optional[int]
+    total_credits: int
+    total_hours: int
+    courses: List[Course]
+
+    def __post_init__(self):
+        self.name = _intern(self.name)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'name': self.name,
+            'semester': self.semester,
+            'total_credits': self.total_credits,
+            'total_hours': self.total_hours,
+            'courses': [course.to_dict() for course in self.courses]
+        }
+
+
+@dataclass
+class Block:
+    """Блок учебного плана"""
+    __slots__ = ('name', 'block_number', 'total_credits', 'total_hours', 'sub_blocks')
+
+    name: str
+    block_number: Optional[int]
+    total_credits: int
+    total_hours: int
+    sub_blocks: List[SubBlock]
+
+    def __post_init__(self):
+        self.name = _intern(self.name)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'name': self.name,
+            'block_number': self.block_number,
+            'total_credits': self.total_credits,
+            'total_hours': self.total_hours,
+            'sub_blocks': [sub_block.to_dict() for sub_block in self.sub_blocks]
+        }
+
+
+@dataclass
+class Curriculum:
+    """Учебный план, извлеченный из PDF"""
+    __slots__ = ('program_name', 'blocks', 'total_credits', 'total_courses')
+
+    program_name: str
+    blocks: List[Block]
+    total_credits: int
+    total_courses: int
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'program_name': self.program_name,
+            'blocks': [block.to_dict() for block in self.blocks],
+            'total_credits': self.total_credits,
+            'total_courses': self.total_courses
+        }
+
+    def iter_courses(self):
+        """Обход всех курсов плана вместе с блоком и подблоком"""
+        for block in self.blocks:
+            for sub_block in block.sub_blocks:
+                for course in sub_block.courses:
+                    yield block, sub_block, course
+
+
+@dataclass
+class Direction:
+    """Направление подготовки"""
+    __slots__ = ('code', 'name', 'budget_places', 'target_places', 'contract_places')
+
+    code: str
+    name: str
+    budget_places: int
+    target_places: int
+    contract_places: int
+
+    def __post_init__(self):
+        self.code = _intern(self.code)
+        self.name = _intern(self.name)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'code': self.code,
+            'name': self.name,
+            'budget_places': self.budget_places,
+            'target_places': self.target_places,
+            'contract_places': self.contract_places
+        }
+
+
+@dataclass
+class Link:
+    """Ссылка со страницы программы"""
+    __slots__ = ('text', 'href')
+
+    text: str
+    href: str
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {'text': self.text, 'href': self.href}
+
+
+@dataclass
+class WebData:
+    """Данные со страницы программы на abit.itmo.ru"""
+    __slots__ = (
+        'program_title', 'directions', 'basic_info', 'manager_name',
+        'manager_contacts', 'social_links', 'pdf_links'
+    )
+
+    program_title: str
+    directions: List[Direction]
+    basic_info: Dict[str, str]
+    manager_name: str
+    manager_contacts: List[str]
+    social_links: List[Link]
+    pdf_links: List[Link]
+
+    def __post_init__(self):
+        self.program_title = _intern(self.program_title)
+        # Ключи basic_info одинаковы у всех программ
+        self.basic_info = {_intern(key): value for key, value in self.basic_info.items()}
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'program_title': self.program_title,
+            'directions': [direction.to_dict() for direction in self.directions],
+            'basic_info': dict(self.basic_info),
+            'manager_name': self.manager_name,
+            'manager_contacts': list(self.manager_contacts),
+            'social_links': [link.to_dict() for link in self.social_links],
+            'pdf_links': [link.to_dict() for link in self.pdf_links]
+        }
+
+
+@dataclass
+class Program:
+    """Программа магистратуры: веб-данные и учебный план"""
+    __slots__ = ('program_id', 'url', 'parsed_at', 'web_data', 'curriculum_data')
+
+    program_id: str
+    url: str
+    parsed_at: Optional[str]
+    web_data: Optional[WebData]
+    curriculum_data: Optional[Curriculum]
+
+    def __post_init__(self):
+        self.program_id = _intern(self.program_id)
+        self.parsed_at = _intern_optional(self.parsed_at)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'program_id': self.program_id,
+            'url': self.url,
+            'parsed_at': self.parsed_at,
+            'web_data': self.web_data.to_dict() if self.web_data else None,
+            'curriculum_data': self.curriculum_data.to_dict() if self.curriculum_data else None
+        }
+
+    @property
+    def title(self) -> str:
+        """Название программы для отображения"""
+        if self.web_data and self.web_data.program_title:
+            return self.web_data.program_title
+        return self.program_id
+
+
+def programs_to_dict(programs: Dict[str, Program]) -> Dict[str, Any]:
+    """Преобразование моделей программ обратно в формат JSON-снимка"""
+    return {program_id: program.to_dict() for program_id, program in programs.items()}
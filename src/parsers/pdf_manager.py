@@ -1,7 +1,9 @@
+import hashlib
 import aiohttp
 from pathlib import Path
 from typing import Optional, Dict, Any
 from .pdf_parser import extract_text_from_pdf, parse_curriculum_text, PDF_AVAILABLE
+from .pdf_store import PDFStore, file_sha256
 
 class PDFManager:
     """Менеджер для работы с PDF файлами"""
@@ -9,16 +11,27 @@ class PDFManager:
     def __init__(self, pdf_dir: Path):
         self.pdf_dir = pdf_dir
         self.pdf_dir.mkdir(parents=True, exist_ok=True)
+        self.store = PDFStore(pdf_dir)
     
     async def download_pdf(self, pdf_url: str, program_id: str) -> Optional[Path]:
-        """Скачивание PDF файла"""
-        filename = f"{program_id}_curriculum.pdf"
-        pdf_path = self.pdf_dir / filename
+        """Скачивание PDF файла в хранилище"""
+        # Этот URL уже скачивали - повторно не качаем
+        sha256 = self.store.url_hash(pdf_url)
+        if sha256 and self.store.blob_path(sha256).exists():
+            if self.store.program_hash(program_id) != sha256:
+                self.store.link(program_id, sha256, pdf_url)
+            pdf_path = self.store.blob_path(sha256)
+            print(f"📄 Используем существующий PDF: {pdf_path}")
+            return pdf_path
         
-        if pdf_path.exists():
+        # Файл в старом формате {program_id}_curriculum.pdf копируем в хранилище
+        pdf_path = self.store.adopt_legacy(program_id)
+        if pdf_path:
+            self.store.link(program_id, pdf_path.stem, pdf_url)
             print(f"📄 Используем существующий PDF: {pdf_path}")
             return pdf_path
         
+        tmp_path = self.store.new_temp_file()
         try:
             headers = {
                 'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
@@ -27,19 +40,34 @@ class PDFManager:
             async with aiohttp.ClientSession(headers=headers) as session:
                 async with session.get(pdf_url) as response:
                     if response.status == 200:
-                        with open(pdf_path, 'wb') as f:
+                        digest = hashlib.sha256()
+                        with open(tmp_path, 'wb') as f:
                             async for chunk in response.content.iter_chunked(8192):
+                                digest.update(chunk)
                                 f.write(chunk)
                         
+                        # Тот же файл мог уже лежать в хранилище под другим URL
+                        sha256 = self.store.add_file(tmp_path, move=True, sha256=digest.hexdigest())
+                        self.store.link(program_id, sha256, pdf_url)
+                        pdf_path = self.store.blob_path(sha256)
+                        
                         print(f"📥 PDF скачан: {pdf_path}")
                         return pdf_path
         except Exception as e:
             print(f"❌ Ошибка скачивания PDF: {e}")
+        finally:
+            tmp_path.unlink(missing_ok=True)
         
         return None
     
     def find_local_pdf(self, program_id: str) -> Optional[Path]:
         """Поиск локального PDF файла"""
+        # PDF, привязанный к программе в хранилище
+        pdf_path = self.store.resolve(program_id) or self.store.adopt_legacy(program_id)
+        if pdf_path:
+            print(f"📄 Найден PDF в хранилище: {pdf_path}")
+            return pdf_path
+        
         # Сначала ищем по стандартным именам
         standard_patterns = [
             f"{program_id}_curriculum.pdf",
@@ -166,14 +194,27 @@ class PDFManager:
         return text
     
     def parse_local_pdf(self, pdf_path: Path) -> Optional[Dict[str, Any]]:
-        """Парсинг локального PDF файла"""
+        """Парсинг локального PDF файла (каждый уникальный PDF разбирается один раз)"""
+        try:
+            sha256 = self.store.blob_hash(pdf_path) or file_sha256(pdf_path)
+        except OSError as e:
+            print(f"❌ Ошибка чтения PDF {pdf_path}: {e}")
+            return None
+        
+        cached = self.store.load_parsed(sha256)
+        if cached is not None:
+            print(f"📄 Учебный план {sha256[:12]} уже разобран, используем кэш")
+            return cached
+        
         if not PDF_AVAILABLE:
             return None
         
         try:
             text = extract_text_from_pdf(pdf_path)
             if text:
-                return parse_curriculum_text(text)
+                curriculum = parse_curriculum_text(text)
+                self.store.save_parsed(sha256, curriculum)
+                return curriculum
         except Exception as e:
             print(f"❌ Ошибка парсинга PDF {pdf_path}: {e}")
         
@@ -0,0 +1,207 @@
+import hashlib
+import json
+import os
+import tempfile
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+# Версия формата кэша разобранных планов: при изменении парсера увеличить,
+# чтобы PDF были разобраны заново
+PARSED_CACHE_VERSION = 1
+
+HASH_CHUNK_SIZE = 1 << 16
+
+
+def file_sha256(path: Path) -> str:
+    """SHA-256 содержимого файла"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class PDFStore:
+    """Контентно-адресуемое хранилище PDF файлов
+
+    Файлы лежат в blobs/<sha256>.pdf, а index.json хранит, какой blob
+    относится к какой программе и какому URL. Одинаковые PDF хранятся
+    и разбираются один раз, сколько бы программ на них ни ссылалось.
+    """
+
+    def __init__(self, pdf_dir: Path):
+        self.pdf_dir = pdf_dir
+        self.blobs_dir = pdf_dir / "blobs"
+        self.index_file = pdf_dir / "index.json"
+        self._index: Dict[str, Any] = {'programs': {}, 'urls': {}}
+        self._index_mtime: Optional[int] = None
+
+    # --- Индекс ---
+
+    def _load_index(self) -> Dict[str, Any]:
+        """Чтение index.json (перечитывается только если файл изменился)"""
+        try:
+            mtime = self.index_file.stat().st_mtime_ns
+        except FileNotFoundError:
+            return self._index
+
+        if mtime != self._index_mtime:
+            try:
+                with open(self.index_file, 'r', encoding='utf-8') as f:
+                    index = json.load(f)
+                index.setdefault('programs', {})
+                index.setdefault('urls', {})
+                self._index = index
+                self._index_mtime = mtime
+            except (OSError, ValueError) as e:
+                print(f"❌ Ошибка чтения индекса PDF {self.index_file}: {e}")
+
+        return self._index
+
+    def _save_index(self) -> None:
+        """Атомарная запись index.json"""
+        self.pdf_dir.mkdir(parents=True, exist_ok=True)
+        self._write_json_atomic(self.index_file, self._index)
+        self._index_mtime = self.index_file.stat().st_mtime_ns
+
+    def _write_json_atomic(self, path: Path, data: Any) -> None:
+        fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False, indent=2)
+            os.replace(tmp_name, path)
+        except BaseException:
+            Path(tmp_name).unlink(missing_ok=True)
+            raise
+
+    # --- Blob'ы ---
+
+    def blob_path(self, sha256: str) -> Path:
+        """Путь к blob'у по хэшу"""
+        return self.blobs_dir / f"{sha256}.pdf"
+
+    def new_temp_file(self) -> Path:
+        """Временный файл для скачивания в той же файловой системе, что и blob'ы"""
+        self.blobs_dir.mkdir(parents=True, exist_ok=True)
+        fd, tmp_name = tempfile.mkstemp(dir=self.blobs_dir, prefix='.download.', suffix='.tmp')
+        os.close(fd)
+        return Path(tmp_name)
+
+    def add_file(self, path: Path, move: bool = False, sha256: Optional[str] = None) -> str:
+        """Добавление файла в хранилище, возвращает его хэш.
+
+        Если такой blob уже есть, копия не создается (при move исходный файл удаляется).
+        """
+        if sha256 is None:
+            sha256 = file_sha256(path)
+        blob = self.blob_path(sha256)
+
+        if blob.exists():
+            if move:
+                path.unlink()
+            return sha256
+
+        self.blobs_dir.mkdir(parents=True, exist_ok=True)
+        if move:
+            os.replace(path, blob)
+        else:
+            tmp = self.new_temp_file()
+            try:
+                with open(path, 'rb') as src, open(tmp, 'wb') as dst:
+                    for chunk in iter(lambda: src.read(HASH_CHUNK_SIZE), b''):
+                        dst.write(chunk)
+                os.replace(tmp, blob)
+            except BaseException:
+                tmp.unlink(missing_ok=True)
+                raise
+
+        return sha256
+
+    # --- Привязки программ ---
+
+    def link(self, program_id: str, sha256: str, url: Optional[str] = None) -> None:
+        """Привязка программы (и URL источника) к blob'у"""
+        index = self._load_index()
+        index['programs'][program_id] = {
+            'sha256': sha256,
+            'url': url,
+            'linked_at': datetime.now().isoformat()
+        }
+        if url:
+            index['urls'][url] = sha256
+        self._save_index()
+
+    def program_hash(self, program_id: str) -> Optional[str]:
+        """Хэш PDF программы"""
+        entry = self._load_index()['programs'].get(program_id)
+        return entry['sha256'] if entry else None
+
+    def url_hash(self, url: str) -> Optional[str]:
+        """Хэш PDF, ранее скачанного по URL"""
+        return self._load_index()['urls'].get(url)
+
+    def programs(self) -> Dict[str, str]:
+        """Все привязки program_id -> sha256"""
+        return {
+            program_id: entry['sha256']
+            for program_id, entry in self._load_index()['programs'].items()
+        }
+
+    def resolve(self, program_id: str) -> Optional[Path]:
+        """Путь к PDF программы через индекс"""
+        sha256 = self.program_hash(program_id)
+        if sha256 is None:
+            return None
+
+        blob = self.blob_path(sha256)
+        return blob if blob.exists() else None
+
+    def adopt_legacy(self, program_id: str) -> Optional[Path]:
+        """Копирование файла {program_id}_curriculum.pdf в хранилище (исходный файл остается на месте)"""
+        legacy = self.pdf_dir / f"{program_id}_curriculum.pdf"
+        if not legacy.exists():
+            return None
+
+        sha256 = self.add_file(legacy)
+        self.link(program_id, sha256)
+        print(f"📦 PDF {legacy.name} добавлен в хранилище: {sha256[:12]}")
+        return self.blob_path(sha256)
+
+    # --- Кэш разобранных учебных планов ---
+
+    def _parsed_path(self, sha256: str) -> Path:
+        return self.blobs_dir / f"{sha256}.curriculum.json"
+
+    def load_parsed(self, sha256: str) -> Optional[Dict[str, Any]]:
+        """Ранее разобранный учебный план для blob'а"""
+        path = self._parsed_path(sha256)
+        if not path.exists():
+            return None
+
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                cached = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        if cached.get('version') != PARSED_CACHE_VERSION:
+            return None
+        return cached.get('curriculum')
+
+    def save_parsed(self, sha256: str, curriculum: Dict[str, Any]) -> None:
+        """Сохранение разобранного учебного плана для blob'а"""
+        self.blobs_dir.mkdir(parents=True, exist_ok=True)
+        self._write_json_atomic(self._parsed_path(sha256), {
+            'version': PARSED_CACHE_VERSION,
+            'curriculum': curriculum
+        })
+
+    def blob_hash(self, path: Path) -> Optional[str]:
+        """Хэш из имени blob'а (None для файлов вне хранилища)"""
+        if path.parent != self.blobs_dir or path.suffix != '.pdf':
+            return None
+        stem = path.stem
+        if len(stem) == 64 and all(c in '0123456789abcdef' for c in stem):
+            return stem
+        return None
@@ -0,0 +1,31 @@
+from typing import Dict, Union
+
+from pydantic import TypeAdapter, ValidationError
+
+from .models import Program
+
+# Схема полного снимка (latest_complete.json): program_id -> Program.
+# Валидация выполняется в pydantic-core за один проход прямо по байтам JSON,
+# объекты моделей создаются сразу, без промежуточных словарей.
+SNAPSHOT_ADAPTER = TypeAdapter(Dict[str, Program])
+
+
+class SnapshotError(ValueError):
+    """Снимок данных не соответствует схеме"""
+
+
+def load_snapshot(raw: Union[bytes, str]) -> Dict[str, Program]:
+    """Валидация и загрузка снимка из JSON"""
+    try:
+        programs = SNAPSHOT_ADAPTER.validate_json(raw)
+    except ValidationError as e:
+        raise SnapshotError(f"Некорректный снимок данных: {e}") from e
+
+    for program_id, program in programs.items():
+        if program.program_id != program_id:
+            raise SnapshotError(
+                f"Ключ {program_id!r} не совпадает с program_id {program.program_id!r}"
+            )
+
+    return programs
+
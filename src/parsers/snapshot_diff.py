@@ -0,0 +1,240 @@
+import hashlib
+import json
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+# Структурный diff двух полных снимков (itmo_complete_*.json).
+#
+# Каждый снимок превращается в дерево хэшей (Merkle):
+#   снимок -> программа -> web_data -> поля
+#                       -> curriculum -> блоки -> подблоки -> курсы
+# Хэш узла зависит только от хэшей детей, поэтому при сравнении
+# совпадающие поддеревья пропускаются целиком и работа пропорциональна
+# количеству изменившихся узлов.
+#
+# Дерево для отчета парсера хранит в узлах значения (для old/new в diff).
+# Боту достаточно хэшей, поэтому он строит дерево без значений (keep_values=False)
+# и не держит в памяти копию снимка в виде словарей.
+
+# Поля, которые меняются при каждом запуске парсера и не считаются изменением
+IGNORED_PROGRAM_FIELDS = ('parsed_at',)
+
+
+def _digest_value(value: Any) -> bytes:
+    data = json.dumps(value, ensure_ascii=False, sort_keys=True, separators=(',', ':'))
+    return hashlib.blake2b(data.encode('utf-8'), digest_size=16).digest()
+
+
+def _digest_children(children: Dict[str, 'HashNode']) -> bytes:
+    digest = hashlib.blake2b(digest_size=16)
+    for key in sorted(children):
+        digest.update(key.encode('utf-8'))
+        digest.update(b'\0')
+        digest.update(children[key].digest)
+    return digest.digest()
+
+
+class HashNode:
+    """Узел дерева хэшей снимка"""
+    __slots__ = ('level', 'digest', 'children', 'value')
+
+    def __init__(self, level: str, digest: bytes,
+                 children: Optional[Dict[str, 'HashNode']] = None, value: Any = None):
+        self.level = level
+        self.digest = digest
+        self.children = children
+        self.value = value
+
+    @classmethod
+    def leaf(cls, level: str, value: Any, keep: bool = True) -> 'HashNode':
+        return cls(level, _digest_value(value), value=value if keep else None)
+
+    @classmethod
+    def branch(cls, level: str, children: Dict[str, 'HashNode'], value: Any = None) -> 'HashNode':
+        return cls(level, _digest_children(children), children=children, value=value)
+
+
+def _unique_keys(items: Iterable[Any], make_key) -> Iterable[Tuple[str, Any]]:
+    """Ключи детей; повторяющиеся ключи получают суффикс #N"""
+    seen: Dict[str, int] = {}
+    for item in items:
+        key = make_key(item)
+        count = seen.get(key, 0)
+        seen[key] = count + 1
+        yield (f"{key}#{count}" if count else key), item
+
+
+def _course_key(course: Dict[str, Any]) -> str:
+    semester = course.get('semester')
+    return f"{course['name']}|{semester}" if semester is not None else course['name']
+
+
+def _build_curriculum(curriculum: Dict[str, Any], keep: bool) -> HashNode:
+    blocks = {}
+    for block_key, block in _unique_keys(curriculum.get('blocks', []), lambda b: b['name']):
+        sub_blocks = {}
+        for sub_key, sub_block in _unique_keys(block.get('sub_blocks', []), lambda s: s['name']):
+            courses = {
+                course_key: HashNode.leaf('course', course, keep)
+                for course_key, course in _unique_keys(sub_block.get('courses', []), _course_key)
+            }
+            sub_meta = {k: v for k, v in sub_block.items() if k != 'courses'}
+            courses['@meta'] = HashNode.leaf('sub_block_meta', sub_meta, keep)
+            sub_blocks[sub_key] = HashNode.branch('sub_block', courses, sub_meta if keep else None)
+
+        block_meta = {k: v for k, v in block.items() if k != 'sub_blocks'}
+        sub_blocks['@meta'] = HashNode.leaf('block_meta', block_meta, keep)
+        blocks[block_key] = HashNode.branch('block', sub_blocks, block_meta if keep else None)
+
+    curriculum_meta = {k: v for k, v in curriculum.items() if k != 'blocks'}
+    blocks['@meta'] = HashNode.leaf('curriculum_meta', curriculum_meta, keep)
+    return HashNode.branch('curriculum', blocks, curriculum_meta if keep else None)
+
+
+def _build_program(program: Dict[str, Any], keep: bool) -> HashNode:
+    children = {}
+
+    for key, value in program.items():
+        if key in IGNORED_PROGRAM_FIELDS:
+            continue
+        if key == 'web_data' and value:
+            children[key] = HashNode.branch('web_data', {
+                field_name: HashNode.leaf('field', field_value, keep)
+                for field_name, field_value in value.items()
+            }, value if keep else None)
+        elif key == 'curriculum_data' and value:
+            children[key] = _build_curriculum(value, keep)
+        else:
+            children[key] = HashNode.leaf('field', value, keep)
+
+    return HashNode.branch('program', children, program if keep else None)
+
+
+def build_tree(snapshot: Dict[str, Any], keep_values: bool = True) -> HashNode:
+    """Построение дерева хэшей для снимка в формате JSON.
+
+    Без keep_values в узлах остаются только хэши: такое дерево не держит
+    ссылок на снимок, а diff по нему дает пути изменений без значений.
+    """
+    return HashNode.branch('snapshot', {
+        program_id: _build_program(program, keep_values)
+        for program_id, program in snapshot.items()
+    })
+
+
+def changed_programs(old: HashNode, new: HashNode) -> List[str]:
+    """Программы, добавленные, удаленные или измененные между деревьями"""
+    if old.digest == new.digest:
+        return []
+    return [
+        program_id for program_id in dict.fromkeys([*old.children, *new.children])
+        if program_id not in old.children or program_id not in new.children
+        or old.children[program_id].digest != new.children[program_id].digest
+    ]
+
+
+@dataclass
+class Change:
+    """Изменение одного узла"""
+    kind: str                 # added / removed / modified
+    level: str                # program / field / block / sub_block / course / ...
+    path: Tuple[str, ...]     # program_id, раздел, блок, подблок, курс
+    old: Any = None
+    new: Any = None
+
+    @property
+    def program_id(self) -> str:
+        return self.path[0]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'kind': self.kind,
+            'level': self.level,
+            'path': list(self.path),
+            'old': self.old,
+            'new': self.new
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'Change':
+        return cls(data['kind'], data['level'], tuple(data['path']), data.get('old'), data.get('new'))
+
+
+@dataclass
+class Changeset:
+    """Набор изменений между двумя снимками"""
+    old_digest: str
+    new_digest: str
+    changes: List[Change] = field(default_factory=list)
+
+    def __bool__(self) -> bool:
+        return bool(self.changes)
+
+    @property
+    def changed_programs(self) -> List[str]:
+        """Программы, затронутые изменениями (в порядке появления)"""
+        return list(dict.fromkeys(change.program_id for change in self.changes))
+
+    def for_program(self, program_id: str) -> List[Change]:
+        return [change for change in self.changes if change.program_id == program_id]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'old_digest': self.old_digest,
+            'new_digest': self.new_digest,
+            'changed_programs': self.changed_programs,
+            'changes': [change.to_dict() for change in self.changes]
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'Changeset':
+        """Загрузка из latest_changes.json"""
+        return cls(
+            data['old_digest'],
+            data['new_digest'],
+            [Change.from_dict(change) for change in data['changes']]
+        )
+
+
+def _collect(kind: str, node: HashNode, path: Tuple[str, ...], changes: List[Change]) -> None:
+    """Добавленное/удаленное поддерево записывается одним изменением"""
+    value = node.value
+    if kind == 'added':
+        changes.append(Change(kind, node.level, path, new=value))
+    else:
+        changes.append(Change(kind, node.level, path, old=value))
+
+
+def _diff_nodes(old: HashNode, new: HashNode, path: Tuple[str, ...], changes: List[Change]) -> None:
+    if old.digest == new.digest:
+        return
+
+    # Лист или смена типа узла - изменение целиком
+    if old.children is None or new.children is None:
+        level = new.level if new.level == old.level else f"{old.level}->{new.level}"
+        changes.append(Change('modified', level, path, old=old.value, new=new.value))
+        return
+
+    for key, old_child in old.children.items():
+        new_child = new.children.get(key)
+        child_path = path if key == '@meta' else path + (key,)
+        if new_child is None:
+            _collect('removed', old_child, child_path, changes)
+        else:
+            _diff_nodes(old_child, new_child, child_path, changes)
+
+    for key, new_child in new.children.items():
+        if key not in old.children:
+            _collect('added', new_child, path + (key,), changes)
+
+
+def diff_trees(old: HashNode, new: HashNode) -> Changeset:
+    """Сравнение двух деревьев хэшей"""
+    changeset = Changeset(old.digest.hex(), new.digest.hex())
+    _diff_nodes(old, new, (), changeset.changes)
+    return changeset
+
+
+def diff_snapshots(old: Dict[str, Any], new: Dict[str, Any]) -> Changeset:
+    """Сравнение двух снимков в формате JSON"""
+    return diff_trees(build_tree(old), build_tree(new))